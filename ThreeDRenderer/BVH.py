@@ -0,0 +1,327 @@
+import heapq
+from typing import Optional, Union
+
+import numpy as np
+
+from ThreeDRenderer.Cuboid import Cuboid
+from ThreeDRenderer.CuboidBatch import CuboidBatch, get_bounds
+from ThreeDRenderer.Frustum import Frustum
+from ThreeDRenderer.Vector_Math import Ray
+
+
+class BVH:
+    """
+A bounding volume hierarchy over the axis aligned bounding boxes of some cuboids.
+Used to find what is in a frustum, what a ray hits first and what overlaps, without checking every cuboid.
+
+The nodes are stored in arrays, node 0 is the root.
+Every node covers a contiguous run of the item order, so the items below a node are order[start:end].
+    """
+
+    __slots__ = (
+        "cuboids", "leaf_size", "item_mins", "item_maxs", "order", "item_leaves",
+        "node_mins", "node_maxs", "starts", "ends", "lefts", "rights", "parents", "depths",
+    )
+
+    def __init__(self, cuboids_: Union[list[Cuboid], CuboidBatch], leaf_size: int = 4):
+        """
+        :param cuboids_: The cuboids to build the hierarchy over, indexes returned by queries are indexes into this.
+        :param leaf_size: The most items a leaf node can hold.
+        """
+        self.cuboids = cuboids_
+        self.leaf_size = leaf_size
+
+        # The bounds of every item, kept so the hierarchy can be refit without asking for all of them again
+        self.item_mins, self.item_maxs = get_bounds(cuboids_)
+
+        self._build()
+
+    def __len__(self):
+        return len(self.item_mins)
+
+    def __str__(self):
+        return f"BVH: {len(self)} items, {len(self.node_mins)} nodes"
+
+    # region - Building
+    def _build(self):
+        """
+Builds the hierarchy from scratch, splitting each node at the median along its longest axis.
+        """
+        item_count = len(self.item_mins)
+        self.order = np.arange(item_count)
+        centers = (self.item_mins + self.item_maxs) / 2
+
+        starts, ends, lefts, rights, parents, depths = [], [], [], [], [], []
+
+        # Nodes are made in depth first order, so every child has a larger index than its parent
+        stack = [(0, item_count, -1, 0)]
+        while stack:
+            start, end, parent, depth = stack.pop()
+            node = len(starts)
+            starts.append(start)
+            ends.append(end)
+            lefts.append(-1)
+            rights.append(-1)
+            parents.append(parent)
+            depths.append(depth)
+            if parent != -1:
+                if lefts[parent] == -1:
+                    lefts[parent] = node
+                else:
+                    rights[parent] = node
+
+            if end - start <= self.leaf_size:
+                continue
+
+            # Split along the longest axis of the centers
+            items = self.order[start:end]
+            item_centers = centers[items]
+            axis = int(np.argmax(item_centers.max(axis=0) - item_centers.min(axis=0)))
+            middle = (end - start) // 2
+            self.order[start:end] = items[np.argpartition(item_centers[:, axis], middle)]
+
+            # The right child is pushed first so the left child is made first
+            stack.append((start + middle, end, node, depth + 1))
+            stack.append((start, start + middle, node, depth + 1))
+
+        self.starts = np.array(starts, dtype=np.int64)
+        self.ends = np.array(ends, dtype=np.int64)
+        self.lefts = np.array(lefts, dtype=np.int64)
+        self.rights = np.array(rights, dtype=np.int64)
+        self.parents = np.array(parents, dtype=np.int64)
+        self.depths = np.array(depths, dtype=np.int64)
+
+        # Which leaf each item is in
+        leaves = np.flatnonzero(self.lefts == -1)
+        self.item_leaves = np.empty(item_count, dtype=np.int64)
+        self.item_leaves[self.order] = np.repeat(leaves, self.ends[leaves] - self.starts[leaves])
+
+        # An empty hierarchy gets a root that nothing can be inside of
+        self.node_mins = np.full((len(starts), 3), np.inf)
+        self.node_maxs = np.full((len(starts), 3), -np.inf)
+        if item_count:
+            self._update_nodes()
+
+    def _update_nodes(self, nodes: np.ndarray = None):
+        """
+Recalculates the bounds of the given nodes, and of every node above them.
+Works up from the deepest of them, one level at a time, only ever looking at the nodes that changed and their parents,
+so the cost depends on how many nodes changed rather than on how big the hierarchy is.
+        :param nodes: The indexes of the nodes that changed, if None then every node is recalculated.
+        """
+        if nodes is None:
+            for depth in range(int(self.depths.max()), -1, -1):
+                self._update_level(np.flatnonzero(self.depths == depth))
+            return
+
+        nodes = np.unique(nodes)
+        while len(nodes):
+            # Only the deepest are done, a parent has to wait until all of its children are
+            depths = self.depths[nodes]
+            deepest = depths == depths.max()
+            nodes, waiting = nodes[deepest], nodes[~deepest]
+            self._update_level(nodes)
+
+            parents = self.parents[nodes]
+            nodes = np.union1d(waiting, parents[parents != -1])
+
+    def _update_level(self, nodes: np.ndarray):
+        """
+Recalculates the bounds of nodes whose children are already up to date.
+        """
+        is_leaf = self.lefts[nodes] == -1
+        leaves = nodes[is_leaf]
+        if len(leaves):
+            # Gather the items of all the leaves, then reduce each leaf's run of items
+            counts = self.ends[leaves] - self.starts[leaves]
+            offsets = np.repeat(self.starts[leaves] - np.cumsum(counts) + counts, counts)
+            items = self.order[offsets + np.arange(counts.sum())]
+            run_starts = np.cumsum(counts) - counts
+            self.node_mins[leaves] = np.minimum.reduceat(self.item_mins[items], run_starts)
+            self.node_maxs[leaves] = np.maximum.reduceat(self.item_maxs[items], run_starts)
+
+        branches = nodes[~is_leaf]
+        if len(branches):
+            lefts, rights = self.lefts[branches], self.rights[branches]
+            self.node_mins[branches] = np.minimum(self.node_mins[lefts], self.node_mins[rights])
+            self.node_maxs[branches] = np.maximum(self.node_maxs[lefts], self.node_maxs[rights])
+
+    def refit(self, indexes: np.ndarray = None):
+        """
+Updates the hierarchy after cuboids have moved or changed size, without rebuilding it.
+Only the leaves holding the given cuboids, and the nodes above them, are recalculated.
+If things have moved a long way the hierarchy gets less efficient, and it is better to make a new one.
+        :param indexes: The indexes of the cuboids that changed, if None then all of them are assumed to have changed.
+        """
+        if not len(self):
+            return
+        if indexes is None:
+            self.item_mins, self.item_maxs = get_bounds(self.cuboids)
+            self._update_nodes()
+            return
+
+        indexes = np.unique(np.asarray(indexes, dtype=np.int64).reshape(-1))
+        if not len(indexes):
+            return
+        self.item_mins[indexes], self.item_maxs[indexes] = get_bounds(self.cuboids, indexes)
+
+        self._update_nodes(self.item_leaves[indexes])
+    # endregion - Building
+
+    # region - Queries
+    def query_frustum(self, frustum: Frustum) -> np.ndarray:
+        """
+Finds the cuboids whose bounding boxes are at least partly inside the frustum.
+Whole branches that are completely inside or outside the frustum are dealt with without looking at their items.
+        :param frustum: The frustum to check against, such as Camera.frustum.
+        :return: A sorted array of the indexes of the cuboids.
+        """
+        if not len(self):
+            return np.empty(0, dtype=np.int64)
+
+        normals = frustum.plane_array[:, :3]
+        constants = frustum.plane_array[:, 3]
+        positive = normals >= 0
+
+        found = []
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            mins, maxs = self.node_mins[node], self.node_maxs[node]
+
+            # The corner furthest along each normal, if that is behind a plane then the whole box is
+            furthest = np.where(positive, maxs, mins)
+            if ((normals * furthest).sum(axis=1) + constants < 0).any():
+                continue
+
+            # The corner least far along each normal, if that is in front of every plane then the whole box is inside
+            nearest = np.where(positive, mins, maxs)
+            if ((normals * nearest).sum(axis=1) + constants >= 0).all():
+                found.append(self.order[self.starts[node]:self.ends[node]])
+                continue
+
+            if self.lefts[node] != -1:
+                stack.append(self.lefts[node])
+                stack.append(self.rights[node])
+                continue
+
+            # A leaf that crosses the frustum, check each item
+            items = self.order[self.starts[node]:self.ends[node]]
+            furthest = np.where(positive, self.item_maxs[items][:, None, :], self.item_mins[items][:, None, :])
+            inside = ((normals * furthest).sum(axis=2) + constants >= 0).all(axis=1)
+            found.append(items[inside])
+
+        if not found:
+            return np.empty(0, dtype=np.int64)
+        return np.sort(np.concatenate(found))
+
+    def _ray_slabs(self, start: np.ndarray, inverse: np.ndarray, mins: np.ndarray, maxs: np.ndarray):
+        """
+Finds where a ray enters and leaves some boxes.
+        :return: Arrays of the entry and exit distances, the ray misses where entry > exit.
+        """
+        with np.errstate(invalid="ignore"):
+            near = (mins - start) * inverse
+            far = (maxs - start) * inverse
+        # 0 * inf gives nan, which happens when the ray starts on a slab and runs along it
+        near = np.nan_to_num(near, nan=-np.inf)
+        far = np.nan_to_num(far, nan=np.inf)
+        entry = np.maximum(np.minimum(near, far).max(axis=-1), 0)
+        exit_ = np.maximum(near, far).min(axis=-1)
+        return entry, exit_
+
+    def query_ray(self, ray: Ray) -> Optional[tuple[int, float]]:
+        """
+Finds the first cuboid hit by a ray, such as one from the camera through the mouse.
+        :param ray: The ray to check.
+        :return: The index of the cuboid and the value of t where it is hit (start + t * vector), or None for a miss.
+        """
+        if not len(self):
+            return None
+
+        start = np.array(ray.start, dtype=np.float64)
+        with np.errstate(divide="ignore"):
+            inverse = 1 / np.array(ray.vector.vector, dtype=np.float64)
+
+        best_index, best_t = None, np.inf
+        entry, exit_ = self._ray_slabs(start, inverse, self.node_mins[0], self.node_maxs[0])
+        if entry > exit_:
+            return None
+
+        # Visit the nodes nearest first, so anything further than the best hit can be skipped
+        heap = [(float(entry), 0)]
+        while heap:
+            entry, node = heapq.heappop(heap)
+            if entry >= best_t:
+                break
+
+            if self.lefts[node] != -1:
+                children = [self.lefts[node], self.rights[node]]
+                entries, exits = self._ray_slabs(start, inverse, self.node_mins[children], self.node_maxs[children])
+                for child, child_entry, child_exit in zip(children, entries, exits):
+                    if child_entry <= child_exit and child_entry < best_t:
+                        heapq.heappush(heap, (float(child_entry), int(child)))
+                continue
+
+            items = self.order[self.starts[node]:self.ends[node]]
+            entries, exits = self._ray_slabs(start, inverse, self.item_mins[items], self.item_maxs[items])
+            entries[entries > exits] = np.inf
+            nearest = int(np.argmin(entries))
+            if entries[nearest] < best_t:
+                best_index, best_t = int(items[nearest]), float(entries[nearest])
+
+        if best_index is None:
+            return None
+        return best_index, best_t
+
+    def query_overlaps(self) -> np.ndarray:
+        """
+Finds every pair of cuboids that collide, using the same test as Cuboid.collides_with.
+        :return: An (K, 2) array of index pairs, the smaller index first, sorted.
+        """
+        pairs = []
+        stack = [(0, 0)] if len(self) else []
+        while stack:
+            a, b = stack.pop()
+            a_leaf, b_leaf = self.lefts[a] == -1, self.lefts[b] == -1
+
+            if a == b:
+                if a_leaf:
+                    items = self.order[self.starts[a]:self.ends[a]]
+                    first, second = np.triu_indices(len(items), 1)
+                    pairs.append(self._overlapping(items[first], items[second]))
+                else:
+                    left, right = self.lefts[a], self.rights[a]
+                    stack.extend(((left, left), (right, right), (left, right)))
+                continue
+
+            # Nodes that only touch can't have colliding items, as collides_with needs them to overlap
+            if (self.node_mins[a] >= self.node_maxs[b]).any() or (self.node_mins[b] >= self.node_maxs[a]).any():
+                continue
+
+            if a_leaf and b_leaf:
+                a_items = self.order[self.starts[a]:self.ends[a]]
+                b_items = self.order[self.starts[b]:self.ends[b]]
+                pairs.append(self._overlapping(np.repeat(a_items, len(b_items)), np.tile(b_items, len(a_items))))
+            elif b_leaf or (not a_leaf and self.ends[a] - self.starts[a] >= self.ends[b] - self.starts[b]):
+                # Descend into the bigger node
+                stack.extend(((self.lefts[a], b), (self.rights[a], b)))
+            else:
+                stack.extend(((a, self.lefts[b]), (a, self.rights[b])))
+
+        if not pairs:
+            return np.empty((0, 2), dtype=np.int64)
+        pairs = np.concatenate(pairs)
+        pairs.sort(axis=1)
+        return pairs[np.lexsort((pairs[:, 1], pairs[:, 0]))]
+
+    def _overlapping(self, first: np.ndarray, second: np.ndarray) -> np.ndarray:
+        """
+The same test as Cuboid.collides_with for arrays of item pairs.
+        :return: An (K, 2) array of the pairs that overlap.
+        """
+        overlap = (
+            (self.item_mins[first] < self.item_maxs[second]) & (self.item_maxs[first] > self.item_mins[second])
+        ).all(axis=1)
+        return np.stack((first[overlap], second[overlap]), axis=1)
+    # endregion - Queries
@@ -1,6 +1,9 @@
-from math import cos, sin, pi
+from math import atan, cos, sin, pi
 from typing import Union
 
+import numpy as np
+
+from ThreeDRenderer.Frustum import Frustum
 from ThreeDRenderer.Vector_Math import Vector, Ray, Plane
 
 
@@ -17,7 +20,13 @@ class Camera:
             window_size: Union[list[int, int], tuple[int, int]],
             x_fov: float = pi/3,
             start_position: list[float, float, float] = None,
+            near_distance: float = 0.1,
+            far_distance: float = 10000,
     ):
+        # Goes up every time the position, rotation or fov changes, so anything worked out from the camera
+        # can tell whether it is still right without comparing everything
+        self.version: int = 0
+
         # The size of the surface things will be drawn to, is used to scale things appropriately
         self.window_size = window_size
 
@@ -39,6 +48,7 @@ class Camera:
 
         # Rotational information
         self.yaw = 0  # Looking left and right
+        self.pitch = 0  # Looking up and down
 
         # Field of view
         self.x_fov: float = x_fov
@@ -52,28 +62,132 @@ class Camera:
             self.position
         )
         temp_point = self.view_plane.get_intersect_with_ray(temp_ray)
-        self.x_limit = temp_point[0]
+        self.x_limit = temp_point[0] - self.position[0]
 
         # Finding the y limit
         self.y_limit = self.x_limit * self.x_to_y_ratio
 
+        # The distances to the near and far planes of the frustum, anything outside these isn't drawn
+        self.near_distance: float = near_distance
+        self.far_distance: float = far_distance
+
+        # The volume that can be seen by the camera, used to skip things that are off-screen
+        self.frustum: Frustum = Frustum(
+            self.position,
+            self.position,
+            self.position,
+            self.looking_vector,
+            self.x_fov,
+            self.y_fov
+        )
+        self._update_frustum()
+
+        # The matrices used to transform points, only calculated when they are needed after something changes
+        self._view_matrix: np.ndarray = None
+        self._projection_matrix: np.ndarray = None
+        self._view_projection_matrix: np.ndarray = None
+
         print(f"X limit: {self.x_limit}")
         print(f"Y limit: {self.y_limit}")
         print(f"Ratio:   {self.x_limit / self.y_limit}")
 
+    @property
+    def y_fov(self) -> float:
+        """
+The y fov of the camera, found from the y limit as the view plane sits a distance of 10 away.
+        """
+        return 2 * atan(self.y_limit / 10)
+
+    @property
+    def right_vector(self) -> Vector:
+        """
+The unit vector pointing to the right of the camera, the camera never rolls so this is always flat.
+        """
+        return Vector(cos(self.yaw), 0, -sin(self.yaw))
+
+    @property
+    def up_vector(self) -> Vector:
+        """
+The unit vector pointing up from the camera.
+        """
+        return self.looking_vector.cross(self.right_vector)
+
+    @property
+    def view_matrix(self) -> np.ndarray:
+        """
+4x4 matrix that moves points so the camera is at the origin, looking along z, with x to the right and y up.
+        """
+        if self._view_matrix is None:
+            axes = np.array([self.right_vector.vector, self.up_vector.vector, self.looking_vector.vector])
+            self._view_matrix = np.identity(4)
+            self._view_matrix[:3, :3] = axes
+            self._view_matrix[:3, 3] = -axes @ self.position
+        return self._view_matrix
+
+    @property
+    def projection_matrix(self) -> np.ndarray:
+        """
+4x4 matrix that takes points from view space to clip space.
+After dividing by w, x and y go from -1 to 1 across the screen and z from 0 at the near plane to 1 at the far plane.
+The view plane sits a distance of 10 away, so x_limit and y_limit at 10 are the edges of the screen.
+        """
+        if self._projection_matrix is None:
+            near, far = self.near_distance, self.far_distance
+            self._projection_matrix = np.array(
+                [
+                    [10 / self.x_limit, 0, 0, 0],
+                    [0, 10 / self.y_limit, 0, 0],
+                    [0, 0, far / (far - near), -near * far / (far - near)],
+                    [0, 0, 1, 0],
+                ]
+            )
+        return self._projection_matrix
+
+    @property
+    def view_projection_matrix(self) -> np.ndarray:
+        """
+The view matrix followed by the projection matrix, takes points straight from 3D space to clip space.
+        """
+        if self._view_projection_matrix is None:
+            self._view_projection_matrix = self.projection_matrix @ self.view_matrix
+        return self._view_projection_matrix
+
+    def _update_frustum(self):
+        """
+Recalculates the frustum, should be called whenever the position, rotation or fov changes.
+        """
+        self.frustum.update(
+            self.position,
+            [a * self.near_distance + b for a, b in zip(self.looking_vector.vector, self.position)],
+            [a * self.far_distance + b for a, b in zip(self.looking_vector.vector, self.position)],
+            self.looking_vector,
+            self.x_fov,
+            self.y_fov
+        )
+
+    def _move_view_plane(self):
+        """
+Moves the view plane so it is 10 in front of the camera again, changing its point in place rather than making a new one.
+        """
+        point, looking_vector = self.view_plane.point, self.looking_vector
+        point[0] = self.position[0] + looking_vector.x * 10
+        point[1] = self.position[1] + looking_vector.y * 10
+        point[2] = self.position[2] + looking_vector.z * 10
+        self.view_plane.update_constant()
+
     def move_to(self, new_pos: Union[list[float, float, float], tuple[float, float, float]]):
         """
 Moves the camera to the given position.
         :param new_pos: The position to move the camera to.
         """
-        self.position = list(new_pos)
-        self.view_plane.change_point(
-            [
-                new_pos[0] + self.looking_vector.x * 10,
-                new_pos[1] + self.looking_vector.y * 10,
-                new_pos[2] + self.looking_vector.z * 10,
-            ]
-        )
+        new_pos = list(new_pos)
+        if new_pos == self.position:
+            return
+        self.position = new_pos
+        self._move_view_plane()
+        self._update_frustum()
+        self._view_matrix = self._view_projection_matrix = None
+        self.version += 1
 
     def move(self, pos_change: Union[list[float, float, float], tuple[float, float, float]]):
         """
@@ -99,6 +213,8 @@ Clamps the angle to between pi/100 and 99/100 pi.
             angle = pi / 100
         elif angle > 99 / 100 * pi:
             angle = 99 / 100 * pi
+        if angle == self.x_fov:
+            return
         # Set the angle
         self.x_fov = angle
         # Calculate the x limit
@@ -111,6 +227,9 @@ Clamps the angle to between pi/100 and 99/100 pi.
         self.x_limit = temp_point[0]
         # Calculate the y limit
         self.y_limit = self.x_limit * self.x_to_y_ratio
+        self._update_frustum()
+        self._projection_matrix = self._view_projection_matrix = None
+        self.version += 1
 
     def change_x_fov_by(self, angle: float):
         """
@@ -119,27 +238,41 @@ Adds the given angle to the current fov of the camera.
         """
         self.change_x_fov_to(self.x_fov + angle)
 
-    def rotate_to(self, angle: float):
+    def rotate_to(self, angle: float, pitch: float = None):
         """
 Rotates the camera to the given angle.
-        :param angle: Angle (in radians) to rotate the camera to.
+Clamps the pitch to just under straight up and straight down.
+        :param angle: Angle (in radians) to rotate the camera to, left and right.
+        :param pitch: Angle (in radians) to rotate the camera to, up and down. If None, the pitch is not changed.
         """
+        if pitch is None:
+            pitch = self.pitch
+        # Clamping the pitch, looking straight up or down would leave the camera not knowing which way is right
+        pitch = max(-pi / 2 + 0.001, min(pi / 2 - 0.001, pitch))
+        if angle == self.yaw and pitch == self.pitch:
+            return
+
         # Get the new looking vector and create the view plane from that
-        # I don't think there is anymore to do with the camera
-        self.looking_vector.x = sin(angle)
-        self.looking_vector.y = 0
-        self.looking_vector.z = cos(angle)
+        self.looking_vector.x = sin(angle) * cos(pitch)
+        self.looking_vector.y = sin(pitch)
+        self.looking_vector.z = cos(angle) * cos(pitch)
         # The view plane contains a reference to the looking vector so there is no need to redefine the vector inside
-        # the plane
-        self.view_plane.update_constant()
-        # Save the angle
+        # the plane, but it does need moving so it is still in front of the camera
+        self._move_view_plane()
+        # Save the angles
         self.yaw = angle
+        self.pitch = pitch
+        self._update_frustum()
+        self._view_matrix = self._view_projection_matrix = None
+        self.version += 1
 
-    def rotate(self, angle_change: float):
+    def rotate(self, angle_change: float, pitch_change: float = 0):
         """
-Adds the given angle to the current rotation of the camera.
-        :param angle_change: Angle (in radians) to rotate the camera by.
+Adds the given angles to the current rotation of the camera.
+        :param angle_change: Angle (in radians) to rotate the camera by, left and right.
+        :param pitch_change: Angle (in radians) to rotate the camera by, up and down.
         """
         self.rotate_to(
-            self.yaw + angle_change
+            self.yaw + angle_change,
+            self.pitch + pitch_change
         )
@@ -0,0 +1,307 @@
+from typing import Union
+
+import numpy as np
+
+from ThreeDRenderer.Cuboid import Cuboid
+from ThreeDRenderer.CuboidBatch import CuboidBatch, get_bounds
+
+
+class CollisionWorld:
+    """
+Finds every pair of colliding cuboids, each step, without checking every cuboid against every other cuboid.
+
+The broad phase is a uniform spatial hash, space is split into cubes of cell_size and each cuboid is put in every
+cell it touches. Only cuboids that share a cell are checked against each other, all at once with NumPy.
+A pair sharing more than one cell is only checked in the cell holding the smallest corner of where they overlap,
+so every pair is found exactly once.
+The table of cells and the pairs sharing them are kept between steps, update only moves the cuboids that have left
+their cells, so a step is just checking the pairs sharing a cell.
+The narrow phase is Cuboid.collides_with, for a CuboidBatch the broad phase test is already the same test.
+    """
+
+    __slots__ = "cuboids", "cell_size", "mins", "maxs", "pairs", "grid", "lowest", "highest", "entries", "candidates"
+
+    def __init__(self, cuboids_: Union[list[Cuboid], CuboidBatch] = None, cell_size: float = None):
+        """
+        :param cuboids_: The cuboids in the world, a list of cuboids or a CuboidBatch. Pairs are indexes into this.
+        :param cell_size: The size of the cells, if None then twice the average size of the cuboids is used.
+        Cells around the size of the cuboids work best, too small and cuboids are in lots of cells,
+        too big and lots of cuboids share a cell.
+        """
+        self.cuboids: Union[list[Cuboid], CuboidBatch] = [] if cuboids_ is None else cuboids_
+        self.cell_size: float = cell_size
+
+        # The bounds of every cuboid as of the last update
+        self.mins, self.maxs = get_bounds(self.cuboids)
+
+        # The colliding pairs found by the last step
+        self.pairs: np.ndarray = np.empty((0, 2), dtype=np.int64)
+
+        # The origin, cell size, number of cells along each axis and bits used for the cuboid in each entry,
+        # None until the first step, or when it has to be made again
+        self.grid: Union[tuple[np.ndarray, float, np.ndarray, int], None] = None
+        # The range of cells every cuboid is in the table for, along each axis, which can be more than it touches now
+        self.lowest: Union[np.ndarray, None] = None
+        self.highest: Union[np.ndarray, None] = None
+        # The sorted cell key and cuboid of every cell every cuboid is in the table for, as one number each
+        self.entries: Union[np.ndarray, None] = None
+        # Every pair of cuboids that share a cell, the same way, only these can be colliding
+        self.candidates: Union[np.ndarray, None] = None
+
+    def __len__(self):
+        return len(self.mins)
+
+    def __str__(self):
+        return f"CollisionWorld: {len(self)} cuboids, {len(self.pairs)} colliding pairs"
+
+    def add(self, cuboid_: Cuboid) -> int:
+        """
+Adds a cuboid to the world.
+        :return: The index of the cuboid.
+        """
+        index = len(self)
+        if isinstance(self.cuboids, CuboidBatch):
+            self.cuboids.add(cuboid_.x, cuboid_.y, cuboid_.z, cuboid_.width, cuboid_.height, cuboid_.length)
+        else:
+            self.cuboids.append(cuboid_)
+
+        mins, maxs = get_bounds(self.cuboids, [index])
+        self.mins = np.concatenate((self.mins, mins))
+        self.maxs = np.concatenate((self.maxs, maxs))
+        self.grid = None
+        return index
+
+    def remove(self, indexes: Union[int, list[int], np.ndarray]):
+        """
+Removes cuboids from the world, the remaining cuboids keep their order, the same as CuboidBatch.remove.
+        :param indexes: An index, or indexes, or a boolean mask of cuboids to remove.
+        """
+        keep = np.ones(len(self), dtype=bool)
+        keep[indexes] = False
+
+        if isinstance(self.cuboids, CuboidBatch):
+            self.cuboids.remove(~keep)
+        else:
+            self.cuboids[:] = [cuboid_ for cuboid_, kept in zip(self.cuboids, keep) if kept]
+
+        self.mins = self.mins[keep]
+        self.maxs = self.maxs[keep]
+        self.pairs = np.empty((0, 2), dtype=np.int64)
+        self.grid = None
+
+    def update(self, indexes: np.ndarray = None):
+        """
+Reads the bounds of cuboids that have moved, and puts the ones that moved out of their cells back in the table.
+        :param indexes: The indexes of the cuboids that moved, if None then all of them are read.
+        """
+        if indexes is None:
+            self.mins, self.maxs = get_bounds(self.cuboids)
+            mins, maxs = self.mins, self.maxs
+        else:
+            indexes = np.asarray(indexes, dtype=np.int64).reshape(-1)
+            mins, maxs = get_bounds(self.cuboids, indexes)
+            self.mins[indexes], self.maxs[indexes] = mins, maxs
+        if self.grid is None:
+            return
+        if self.grid[1] != self.cell_size or self.lowest.shape[1] != len(self):
+            self.grid = None
+            return
+
+        cells = self._get_cells(mins, maxs)
+        if cells is None:
+            # Something went outside of the grid, so it is built again next step
+            self.grid = None
+            return
+        lowest, highest = cells
+        old_lowest, old_highest = (
+            (self.lowest, self.highest) if indexes is None else (self.lowest[:, indexes], self.highest[:, indexes])
+        )
+        # A cuboid that is still inside the cells it is in the table for doesn't need to be moved, its extra cells only
+        # add a few more candidates, and it saves moving cuboids going back and forth over the side of a cell
+        changed = np.flatnonzero((lowest < old_lowest).any(axis=0) | (highest > old_highest).any(axis=0))
+        if not len(changed):
+            return
+        moved = changed if indexes is None else indexes[changed]
+        # Any index given more than once has the same bounds each time
+        moved, first = np.unique(moved, return_index=True)
+        changed = changed[first]
+        self._take_out(moved)
+        self.lowest[:, moved], self.highest[:, moved] = lowest[:, changed], highest[:, changed]
+        self._put_in(moved)
+
+    @staticmethod
+    def _get_cell_keys(x: np.ndarray, y: np.ndarray, z: np.ndarray, cells: list[int, int, int]) -> np.ndarray:
+        """
+Numbers integer cell coordinates, one integer key each.
+        :param cells: How many cells there are along each axis, every coordinate is less than these.
+        """
+        return (x * cells[1] + y) * cells[2] + z
+
+    def _get_cells(self, mins: np.ndarray, maxs: np.ndarray) -> Union[tuple[np.ndarray, np.ndarray], None]:
+        """
+Finds the range of cells in the grid each cuboid touches.
+        :param mins: An (N, 3) array of the smallest corner of each cuboid.
+        :param maxs: An (N, 3) array of the biggest corner of each cuboid.
+        :return: (3, N) arrays of the lowest and highest cell along each axis, or None if anything is outside the grid.
+        """
+        origin, cell_size, cells = self.grid[:3]
+        # Everything is done one axis at a time, as NumPy is much faster with 1D arrays
+        lowest = (mins.T.copy() - origin) / cell_size
+        highest = (maxs.T.copy() - origin) / cell_size
+        # Inside the grid nothing is negative, so rounding down is only cutting off the fraction
+        if not ((lowest >= 0).all() and (highest < cells).all()):
+            return None
+        return lowest.astype(np.int64), highest.astype(np.int64)
+
+    def _build(self):
+        """
+Makes a new grid around every cuboid, and puts all of them in its table.
+Raises a ValueError when the grid has so many cells that they can't all be numbered.
+        """
+        if not (np.isfinite(self.mins).all() and np.isfinite(self.maxs).all()):
+            raise ValueError("cuboids have to be finite to be put in cells")
+        smallest, biggest = self.mins.min(axis=0), self.maxs.max(axis=0)
+
+        # Empty cells around the cuboids, a quarter of the way across them on each side, so they can move a while
+        # before the grid has to be made again
+        margin = np.floor((biggest - smallest) / self.cell_size / 4) + 1
+        origin = (smallest - margin * self.cell_size).reshape(3, 1)
+        cells = (((biggest - origin[:, 0]) / self.cell_size).astype(np.int64) + margin.astype(np.int64) + 1).tolist()
+        # Each entry's cell key and cuboid are sorted as one number, the cuboid in the lowest bits
+        index_bits = (len(self) - 1).bit_length()
+        if cells[0] * cells[1] * cells[2] >= 1 << (63 - index_bits):
+            raise ValueError(
+                f"cuboids reach across {cells[0]} x {cells[1]} x {cells[2]} cells of size {self.cell_size}, "
+                f"too many to number, cell_size needs to be bigger"
+            )
+
+        self.grid = (origin, self.cell_size, np.array(cells).reshape(3, 1), index_bits)
+        self.lowest, self.highest = self._get_cells(self.mins, self.maxs)
+        self.entries = np.empty(0, dtype=np.int64)
+        self.candidates = np.empty(0, dtype=np.int64)
+        self._put_in(np.arange(len(self)))
+
+    def _get_entries(self, indexes: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+Makes one entry for every cell each cuboid is in the table for, from lowest to highest.
+        :param indexes: The cuboids to make entries for.
+        :return: The cell key and cuboid of each entry.
+        """
+        cells = self.grid[2][:, 0].tolist()
+        lowest, highest = self.lowest[:, indexes], self.highest[:, indexes]
+        spans = highest - lowest + 1
+        keys = self._get_cell_keys(*lowest, cells)
+
+        # Each cell is an offset from the cell of the cuboid's smallest corner, cuboids are mostly in 1 or 2 cells
+        # along each axis so there are only a few offsets to go through
+        most = spans.max(axis=1).tolist()
+        if most[0] * most[1] * most[2] <= 27:
+            entry_cuboids = [indexes]
+            entry_keys = [keys]
+            for offset in np.ndindex(*most):
+                if any(offset):
+                    reaching = np.flatnonzero((spans[0] > offset[0]) & (spans[1] > offset[1]) & (spans[2] > offset[2]))
+                    entry_cuboids.append(indexes[reaching])
+                    entry_keys.append(keys[reaching] + self._get_cell_keys(*offset, cells))
+            return np.concatenate(entry_keys), np.concatenate(entry_cuboids)
+
+        # Something is very big compared to the cells, so the offsets are worked out for each entry instead
+        counts = spans[0] * spans[1] * spans[2]
+        entries = np.repeat(np.arange(len(indexes)), counts)
+        local = np.arange(len(entries)) - np.repeat(np.cumsum(counts) - counts, counts)
+        z_spans = spans[2][entries]
+        y_spans = spans[1][entries]
+        entry_keys = keys[entries] + self._get_cell_keys(
+            local // (z_spans * y_spans), (local // z_spans) % y_spans, local % z_spans, cells
+        )
+        return entry_keys, indexes[entries]
+
+    def _take_out(self, indexes: np.ndarray):
+        """
+Takes cuboids out of the table, and every candidate pair they are in, using the cells they are in the table for.
+        :param indexes: The sorted indexes of the cuboids to take out.
+        """
+        index_bits = self.grid[3]
+        index_mask = (1 << index_bits) - 1
+        moved = np.zeros(len(self), dtype=bool)
+        moved[indexes] = True
+
+        # Their entries are worked out again to find them, rather than looking through the whole table
+        entry_keys, entry_cuboids = self._get_entries(indexes)
+        entries = (entry_keys << index_bits) | entry_cuboids
+        self.entries = np.delete(self.entries, np.searchsorted(self.entries, entries))
+        self.candidates = self.candidates[
+            ~(moved[self.candidates >> index_bits] | moved[self.candidates & index_mask])
+        ]
+
+    def _put_in(self, indexes: np.ndarray):
+        """
+Puts cuboids in the table for the cells in lowest and highest, and adds every candidate pair they are now in.
+        :param indexes: The sorted indexes of the cuboids to put in, which aren't in the table.
+        """
+        cells, index_bits = self.grid[2][:, 0].tolist(), self.grid[3]
+        index_mask = (1 << index_bits) - 1
+        adding = np.zeros(len(self), dtype=bool)
+        adding[indexes] = True
+
+        # Keeping the table sorted so each cell's entries are next to each other
+        entry_keys, entry_cuboids = self._get_entries(indexes)
+        entries = np.sort((entry_keys << index_bits) | entry_cuboids)
+        self.entries = np.insert(self.entries, np.searchsorted(self.entries, entries), entries)
+
+        # Each new entry is paired with every other entry in its cell, most entries are alone in their cell
+        entry_keys = entries >> index_bits
+        starts = np.searchsorted(self.entries, entry_keys << index_bits)
+        counts = np.searchsorted(self.entries, (entry_keys + 1) << index_bits) - starts
+        pairing = np.flatnonzero(counts > 1)
+        starts, counts = starts[pairing], counts[pairing]
+        total = int(counts.sum())
+        firsts = np.repeat(entries[pairing] & index_mask, counts)
+        seconds = self.entries[np.arange(total) - np.repeat(np.cumsum(counts) - counts - starts, counts)] & index_mask
+        keys = np.repeat(entry_keys[pairing], counts)
+
+        # A pair of cuboids both being put in is found from both of them, so only the one from the smaller is kept
+        kept = np.flatnonzero((firsts < seconds) | ((firsts > seconds) & ~adding[seconds]))
+        firsts, seconds, keys = firsts[kept], seconds[kept], keys[kept]
+        firsts, seconds = np.minimum(firsts, seconds), np.maximum(firsts, seconds)
+        # And only in the cell where their cells start to overlap, so each pair is found once
+        home = self._get_cell_keys(*np.maximum(self.lowest[:, firsts], self.lowest[:, seconds]), cells) == keys
+
+        candidates = np.sort((firsts[home] << index_bits) | seconds[home])
+        self.candidates = np.insert(self.candidates, np.searchsorted(self.candidates, candidates), candidates)
+
+    def step(self) -> np.ndarray:
+        """
+Finds every pair of colliding cuboids.
+Raises a ValueError when the cuboids reach across so many cells that they can't all be numbered,
+with 50,000 cuboids that is over 2^47 cells, a bigger cell_size fixes it.
+        :return: An (K, 2) array of index pairs, the smaller index first, sorted. Also saved as pairs.
+        """
+        self.pairs = np.empty((0, 2), dtype=np.int64)
+        if len(self) < 2:
+            return self.pairs
+
+        if self.cell_size is None:
+            self.cell_size = 2 * float((self.maxs - self.mins).mean()) or 1.0
+        if self.grid is None or self.grid[1] != self.cell_size:
+            self._build()
+
+        # Only keep the candidates that overlap, which are already sorted by their first and then second cuboid.
+        # One axis at a time, as NumPy is much faster with 1D arrays and each axis has fewer pairs to check
+        index_bits = self.grid[3]
+        firsts, seconds = self.candidates >> index_bits, self.candidates & ((1 << index_bits) - 1)
+        mins, maxs = self.mins.T.copy(), self.maxs.T.copy()
+        for axis in range(3):
+            first_mins, second_mins = mins[axis][firsts], mins[axis][seconds]
+            overlap = np.flatnonzero((first_mins < maxs[axis][seconds]) & (maxs[axis][firsts] > second_mins))
+            firsts, seconds = firsts[overlap], seconds[overlap]
+        pairs = np.stack((firsts, seconds), axis=1)
+
+        # Narrow phase
+        if not isinstance(self.cuboids, CuboidBatch):
+            cuboids_ = self.cuboids
+            colliding = [cuboids_[a].collides_with(cuboids_[b]) for a, b in pairs.tolist()]
+            pairs = pairs[np.array(colliding, dtype=bool).reshape(-1)]
+
+        self.pairs = pairs
+        return self.pairs
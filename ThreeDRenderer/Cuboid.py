@@ -9,8 +9,8 @@ class Cuboid:
         (0, 0, -1),     # Front
         (-1, 0, 0),     # Left
         (1, 0, 0),      # Right
-        (0, 1, 0),      # Top
-        (0, -1, 0),     # Bottom
+        (0, -1, 0),     # Top
+        (0, 1, 0),      # Bottom
         (0, 0, 1),      # Back
     )
 
@@ -50,7 +50,7 @@ class Cuboid:
         (8, 9, 10, 11),  # Back
     )
 
-    __slots__ = "x", "y", "z", "width", "height", "length", "center", "radius", "corners", "faces"
+    __slots__ = "x", "y", "z", "width", "height", "length", "center", "radius", "corners", "faces", "version"
 
     def __init__(self, x: float, y: float, z: float, width: float, height: float, length: float):
         self.x = x
@@ -60,6 +60,47 @@ class Cuboid:
         self.height = height
         self.length = length
 
+        # Goes up every time the cuboid moves
+        self.version = 0
+
+        self._calculate_geometry()
+
+    def __str__(self):
+        return f"Cuboid: corner1 = {self.corners[0]}, corner2 = {self.corners[7]}"
+
+    def collides_with(self, other_cuboid: 'Cuboid'):
+        if self.x < other_cuboid.x + other_cuboid.width and self.x + self.width > other_cuboid.x:
+            if self.y < other_cuboid.y + other_cuboid.height and self.y + self.height > other_cuboid.y:
+                if self.z < other_cuboid.z + other_cuboid.length and self.z + self.length > other_cuboid.z:
+                    return True
+        return False
+
+    def move_to(self, x: float, y: float, z: float):
+        """
+Moves the cuboid so that its bottom, front left corner is at the given position.
+        :param x: The new x position.
+        :param y: The new y position.
+        :param z: The new z position.
+        """
+        self.x = x
+        self.y = y
+        self.z = z
+        self._calculate_geometry()
+        self.version += 1
+
+    def move(self, x_change: float, y_change: float, z_change: float):
+        """
+Moves the cuboid by the given amounts.
+        """
+        self.move_to(self.x + x_change, self.y + y_change, self.z + z_change)
+
+    def _calculate_geometry(self):
+        """
+Calculates the corners, faces, center and radius from the position and size.
+        """
+        x, y, z = self.x, self.y, self.z
+        width, height, length = self.width, self.height, self.length
+
         # The corners of the cuboid
         self.corners: list[list[float, float, float]] = [
             [x,         y + height, z],           # 0
@@ -95,13 +136,3 @@ class Cuboid:
             z + length / 2
         )
         self.radius = sqrt(sum([(a - b) * (a - b) for a, b in zip(self.center, self.corners[0])]))
-
-    def __str__(self):
-        return f"Cuboid: corner1 = {self.corners[0]}, corner2 = {self.corners[7]}"
-
-    def collides_with(self, other_cuboid: 'Cuboid'):
-        if self.x < other_cuboid.x + other_cuboid.width and self.x + self.width > other_cuboid.x:
-            if self.y < other_cuboid.y + other_cuboid.height and self.y + self.height > other_cuboid.y:
-                if self.z < other_cuboid.z + other_cuboid.length and self.z + self.length > other_cuboid.z:
-                    return True
-        return False
@@ -0,0 +1,274 @@
+from typing import Union
+
+import numpy as np
+
+from ThreeDRenderer.Cuboid import Cuboid
+
+
+class CuboidBatch:
+    """
+Stores a lot of cuboids in contiguous arrays instead of one Cuboid object each.
+Row i of every array belongs to the i'th cuboid in the batch.
+    """
+
+    # The same definitions as the Cuboid class, so the corner and face indexes mean the same thing
+    normals: np.ndarray = np.array(Cuboid.normals, dtype=np.float64)
+    corner_connections: tuple[tuple[int, int]] = Cuboid.corner_connections
+    surface_corners: tuple[tuple[int, int, int, int]] = Cuboid.surface_corners
+    surface_corner_connections: tuple[tuple[int, int, int, int]] = Cuboid.surface_corner_connections
+
+    # Where each corner is, in multiples of the width, height and length, from the x, y and z of the cuboid
+    corner_offsets: np.ndarray = np.array(
+        [
+            [0, 1, 0],  # 0
+            [1, 1, 0],  # 1
+            [0, 0, 0],  # 2
+            [1, 0, 0],  # 3
+            [0, 1, 1],  # 4
+            [1, 1, 1],  # 5
+            [0, 0, 1],  # 6
+            [1, 0, 1],  # 7
+        ],
+        dtype=np.float64
+    )
+
+    __slots__ = "version", "_count", "_dimensions", "_corners", "_centers", "_radii"
+
+    def __init__(self, capacity: int = 0):
+        # Goes up every time cuboids are added, removed or moved
+        self.version = 0
+        self._count = 0
+
+        # x, y, z, width, height and length of each cuboid, in that order
+        self._dimensions = np.empty((capacity, 6), dtype=np.float64)
+        self._corners = np.empty((capacity, 8, 3), dtype=np.float64)
+        self._centers = np.empty((capacity, 3), dtype=np.float64)
+        self._radii = np.empty(capacity, dtype=np.float64)
+
+    def __len__(self):
+        return self._count
+
+    def __str__(self):
+        return f"CuboidBatch: {self._count} cuboids"
+
+    @classmethod
+    def from_arrays(cls,
+                    x: np.ndarray,
+                    y: np.ndarray,
+                    z: np.ndarray,
+                    width: np.ndarray,
+                    height: np.ndarray,
+                    length: np.ndarray) -> 'CuboidBatch':
+        """
+Creates a batch from arrays of the same values that are given to Cuboid.
+        """
+        x = np.asarray(x, dtype=np.float64)
+        batch = cls(x.size)
+        batch.add(x, y, z, width, height, length)
+        return batch
+
+    @classmethod
+    def from_cuboids(cls, cuboids_: list[Cuboid]) -> 'CuboidBatch':
+        """
+Creates a batch containing copies of the given cuboids.
+        """
+        dimensions = np.array(
+            [[a.x, a.y, a.z, a.width, a.height, a.length] for a in cuboids_], dtype=np.float64
+        ).reshape(-1, 6)
+        return cls.from_arrays(*dimensions.T)
+
+    # region - Stored data
+    @property
+    def dimensions(self) -> np.ndarray:
+        """
+(N, 6) array of the x, y, z, width, height and length of each cuboid.
+        """
+        return self._dimensions[:self._count]
+
+    @property
+    def x(self) -> np.ndarray:
+        return self._dimensions[:self._count, 0]
+
+    @property
+    def y(self) -> np.ndarray:
+        return self._dimensions[:self._count, 1]
+
+    @property
+    def z(self) -> np.ndarray:
+        return self._dimensions[:self._count, 2]
+
+    @property
+    def width(self) -> np.ndarray:
+        return self._dimensions[:self._count, 3]
+
+    @property
+    def height(self) -> np.ndarray:
+        return self._dimensions[:self._count, 4]
+
+    @property
+    def length(self) -> np.ndarray:
+        return self._dimensions[:self._count, 5]
+
+    @property
+    def corners(self) -> np.ndarray:
+        """
+(N, 8, 3) array of the corners of each cuboid, in the same order as Cuboid.corners.
+        """
+        return self._corners[:self._count]
+
+    @property
+    def center(self) -> np.ndarray:
+        """
+(N, 3) array of the center of each cuboid.
+        """
+        return self._centers[:self._count]
+
+    @property
+    def radius(self) -> np.ndarray:
+        """
+(N,) array of the distance from the center to the corners of each cuboid.
+        """
+        return self._radii[:self._count]
+    # endregion - Stored data
+
+    # region - Derived data
+    @property
+    def mins(self) -> np.ndarray:
+        """
+(N, 3) array of the smallest x, y and z of each cuboid, the same as x, y and z.
+        """
+        return self._dimensions[:self._count, :3]
+
+    @property
+    def maxs(self) -> np.ndarray:
+        """
+(N, 3) array of the largest x, y and z of each cuboid.
+        """
+        return self._dimensions[:self._count, :3] + self._dimensions[:self._count, 3:]
+
+    @property
+    def face_centers(self) -> np.ndarray:
+        """
+(N, 6, 3) array of the center of each face, the same points used by the planes in Cuboid.faces.
+        """
+        return self.corners[:, self.surface_corners].mean(axis=2)
+
+    @property
+    def faces(self) -> np.ndarray:
+        """
+(N, 6, 4) array of the plane of each face, in the same order as Cuboid.faces.
+The first three values are the normal and the last is the constant, same as Plane.
+        """
+        faces = np.empty((self._count, 6, 4), dtype=np.float64)
+        faces[:, :, :3] = self.normals
+        faces[:, :, 3] = -np.einsum("fk,nfk->nf", self.normals, self.face_centers)
+        return faces
+    # endregion - Derived data
+
+    def get_cuboid(self, index: int) -> Cuboid:
+        """
+Creates a Cuboid from the cuboid at the given index.
+        """
+        return Cuboid(*self.dimensions[index].tolist())
+
+    def add(self,
+            x: Union[float, np.ndarray],
+            y: Union[float, np.ndarray],
+            z: Union[float, np.ndarray],
+            width: Union[float, np.ndarray],
+            height: Union[float, np.ndarray],
+            length: Union[float, np.ndarray]) -> np.ndarray:
+        """
+Adds one or more cuboids to the end of the batch.
+Takes the same values as Cuboid, either as single values or as arrays of values.
+        :return: The indexes of the new cuboids.
+        """
+        new_dimensions = np.stack(np.broadcast_arrays(x, y, z, width, height, length), axis=-1).reshape(-1, 6)
+        start = self._count
+        end = start + len(new_dimensions)
+
+        self._reserve(end)
+        self._dimensions[start:end] = new_dimensions
+        self._count = end
+        self._calculate_geometry(slice(start, end))
+
+        return np.arange(start, end)
+
+    def remove(self, indexes: Union[int, list[int], np.ndarray]):
+        """
+Removes the cuboids at the given indexes, the remaining cuboids keep their order.
+        :param indexes: An index, or indexes, or a boolean mask of cuboids to remove.
+        """
+        keep = np.ones(self._count, dtype=bool)
+        keep[indexes] = False
+        new_count = int(keep.sum())
+
+        self._dimensions[:new_count] = self.dimensions[keep]
+        self._corners[:new_count] = self.corners[keep]
+        self._centers[:new_count] = self.center[keep]
+        self._radii[:new_count] = self.radius[keep]
+        self._count = new_count
+        self.version += 1
+
+    def move_to(self, indexes: Union[int, list[int], np.ndarray], positions: np.ndarray):
+        """
+Moves the cuboids at the given indexes so that their bottom, front left corners are at the given positions.
+        :param indexes: An index, or indexes, or a boolean mask of cuboids to move.
+        :param positions: The new x, y and z of each cuboid, either (3,) or (M, 3).
+        """
+        indexes = np.atleast_1d(np.arange(self._count)[indexes])
+        self._dimensions[indexes, :3] = positions
+        self._calculate_geometry(indexes)
+
+    def move(self, indexes: Union[int, list[int], np.ndarray], changes: np.ndarray):
+        """
+Moves the cuboids at the given indexes by the given amounts.
+        :param indexes: An index, or indexes, or a boolean mask of cuboids to move.
+        :param changes: How far to move each cuboid, either (3,) or (M, 3).
+        """
+        indexes = np.atleast_1d(np.arange(self._count)[indexes])
+        self.move_to(indexes, self._dimensions[indexes, :3] + changes)
+
+    def _reserve(self, capacity: int):
+        """
+Grows the arrays so that they can hold at least the given number of cuboids.
+        """
+        if capacity <= len(self._dimensions):
+            return
+        capacity = max(capacity, 2 * len(self._dimensions))
+
+        for name in self.__slots__[2:]:
+            old = getattr(self, name)
+            new = np.empty((capacity, *old.shape[1:]), dtype=old.dtype)
+            new[:self._count] = old[:self._count]
+            setattr(self, name, new)
+
+    def _calculate_geometry(self, indexes: Union[slice, np.ndarray]):
+        """
+Calculates the corners, centers and radii of the cuboids at the given indexes.
+        """
+        positions = self._dimensions[indexes, :3]
+        sizes = self._dimensions[indexes, 3:]
+
+        self._corners[indexes] = positions[:, None, :] + self.corner_offsets * sizes[:, None, :]
+        self._centers[indexes] = positions + sizes / 2
+        self._radii[indexes] = np.sqrt(((sizes / 2) ** 2).sum(axis=1))
+        self.version += 1
+
+
+def get_bounds(cuboids_, indexes: np.ndarray = None) -> tuple[np.ndarray, np.ndarray]:
+    """
+Gets the axis aligned bounding box of every cuboid given.
+    :param cuboids_: A list of cuboids, or a CuboidBatch.
+    :param indexes: Optional indexes of the only cuboids to get the bounds of.
+    :return: An (N, 3) array of the smallest corners and an (N, 3) array of the largest corners.
+    """
+    if isinstance(cuboids_, CuboidBatch):
+        dimensions = cuboids_.dimensions if indexes is None else cuboids_.dimensions[indexes]
+    else:
+        if indexes is not None:
+            cuboids_ = [cuboids_[i] for i in np.asarray(indexes).reshape(-1)]
+        dimensions = np.array(
+            [[a.x, a.y, a.z, a.width, a.height, a.length] for a in cuboids_], dtype=np.float64
+        ).reshape(-1, 6)
+    return dimensions[:, :3].copy(), dimensions[:, :3] + dimensions[:, 3:]
@@ -1,8 +1,41 @@
-from ThreeDRenderer.Vector_Math import Vector, Plane
+from math import cos, sin
 from typing import Union
 
+import numpy as np
+
+from ThreeDRenderer.Vector_Math import Vector, Plane
+
+
+def _add_scaled(a: float, vector_a: Vector, b: float, vector_b: Vector) -> Vector:
+    """
+Returns a * vector_a + b * vector_b.
+    """
+    return Vector(
+        a * vector_a.x + b * vector_b.x,
+        a * vector_a.y + b * vector_b.y,
+        a * vector_a.z + b * vector_b.z,
+    )
+
+
+def spheres_are_inside(planes: np.ndarray, centers: np.ndarray, radii: np.ndarray) -> np.ndarray:
+    """
+Checks lots of spheres against a set of planes at once.
+    :param planes: A (P, 4) array of planes with unit normals pointing inwards, the normal followed by the constant.
+    :param centers: An (N, 3) array of sphere centers.
+    :param radii: An (N,) array of sphere radii.
+    :return: An (N,) boolean array, True where the sphere is at least partly in front of every plane.
+    """
+    centers = np.asarray(centers, dtype=np.float64).reshape(-1, 3)
+    distances = centers @ planes[:, :3].T + planes[:, 3]
+    return (distances >= -np.asarray(radii, dtype=np.float64).reshape(-1, 1)).all(axis=1)
+
 
 class Frustum:
+    """
+The volume that can be seen by a camera, made up of six planes.
+The normal of every plane points into the frustum, so a point is inside when it is in front of every plane.
+    """
+
     def __init__(self,
                  camera_position: Union[list[float, float, float], tuple[float, float, float]],
                  near_plane_point: Union[list[float, float, float], tuple[float, float, float]],
@@ -11,12 +44,92 @@ class Frustum:
                  fov_x: float,
                  fov_y: float
                  ):
-        self.near_plane = Plane(view_direction, near_plane_point)
-        self.far_plane = Plane(view_direction.get_reverse(), far_plane_point)
-
-        #
-        #
-        self.right_plane = None
-        self.left_plane = None
-        self.top_plane = None
-        self.bottom_plane = None
+        self.near_plane: Plane = None
+        self.far_plane: Plane = None
+        self.right_plane: Plane = None
+        self.left_plane: Plane = None
+        self.top_plane: Plane = None
+        self.bottom_plane: Plane = None
+
+        # (6, 4) array of the planes above, the normal followed by the constant, for testing lots of things at once
+        self.plane_array: np.ndarray = np.zeros((6, 4), dtype=np.float64)
+
+        self.update(camera_position, near_plane_point, far_plane_point, view_direction, fov_x, fov_y)
+
+    def __str__(self):
+        return "Frustum:\n" + "\n".join(f"\t{plane}" for plane in self.planes)
+
+    @property
+    def planes(self) -> tuple[Plane, Plane, Plane, Plane, Plane, Plane]:
+        return self.near_plane, self.far_plane, self.right_plane, self.left_plane, self.top_plane, self.bottom_plane
+
+    def update(self,
+               camera_position: Union[list[float, float, float], tuple[float, float, float]],
+               near_plane_point: Union[list[float, float, float], tuple[float, float, float]],
+               far_plane_point: Union[list[float, float, float], tuple[float, float, float]],
+               view_direction: Vector,
+               fov_x: float,
+               fov_y: float):
+        """
+Recalculates all the planes of the frustum.
+        :param camera_position: Where the camera is, all the side planes pass through this point.
+        :param near_plane_point: A point on the near plane.
+        :param far_plane_point: A point on the far plane.
+        :param view_direction: The unit vector the camera is looking along.
+        :param fov_x: The horizontal fov in radians.
+        :param fov_y: The vertical fov in radians.
+        """
+        view_direction = Vector.from_instance(view_direction)
+
+        # Vectors pointing to the right and up of the camera, the camera never rolls so right is always flat
+        right = Vector(0, 1, 0).cross(view_direction)
+        right = right / right.magnitude
+        up = view_direction.cross(right)
+
+        self.near_plane = Plane(view_direction, list(near_plane_point))
+        self.far_plane = Plane(view_direction.get_reverse(), list(far_plane_point))
+
+        # The side planes are the view direction rotated by half the fov, then turned 90 degrees to face inwards
+        half_x, half_y = fov_x / 2, fov_y / 2
+        position = list(camera_position)
+        self.right_plane = Plane(_add_scaled(sin(half_x), view_direction, -cos(half_x), right), position)
+        self.left_plane = Plane(_add_scaled(sin(half_x), view_direction, cos(half_x), right), position)
+        self.top_plane = Plane(_add_scaled(sin(half_y), view_direction, -cos(half_y), up), position)
+        self.bottom_plane = Plane(_add_scaled(sin(half_y), view_direction, cos(half_y), up), position)
+
+        # All at once, setting each row on its own costs more than making the planes
+        self.plane_array[:] = [
+            (plane.normal.x, plane.normal.y, plane.normal.z, plane.constant) for plane in self.planes
+        ]
+
+    def sphere_is_visible(self,
+                          center: Union[list[float, float, float], tuple[float, float, float]],
+                          radius: float) -> bool:
+        """
+Checks if any part of a sphere could be inside the frustum.
+        :param center: The center of the sphere.
+        :param radius: The radius of the sphere.
+        """
+        for plane in self.planes:
+            distance = (
+                plane.normal.x * center[0] + plane.normal.y * center[1] + plane.normal.z * center[2] + plane.constant
+            )
+            if distance < -radius:
+                return False
+        return True
+
+    def cuboid_is_visible(self, cuboid_) -> bool:
+        """
+Checks if a cuboid could be visible, treating it as a sphere.
+        :param cuboid_: The Cuboid to check.
+        """
+        return self.sphere_is_visible(cuboid_.center, cuboid_.radius)
+
+    def spheres_are_visible(self, centers: np.ndarray, radii: np.ndarray) -> np.ndarray:
+        """
+Checks lots of spheres against the frustum at once.
+        :param centers: An (N, 3) array of sphere centers.
+        :param radii: An (N,) array of sphere radii.
+        :return: An (N,) boolean array, True where the sphere could be visible.
+        """
+        return spheres_are_inside(self.plane_array, centers, radii)
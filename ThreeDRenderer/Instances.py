@@ -0,0 +1,291 @@
+from typing import Union
+
+import numpy as np
+
+from ThreeDRenderer.Cuboid import Cuboid
+from ThreeDRenderer.CuboidBatch import CuboidBatch
+from ThreeDRenderer.Mesh import Mesh
+
+
+def get_rotation_matrices(rotations: np.ndarray) -> np.ndarray:
+    """
+Makes the 3x3 rotation matrix for each set of angles, rotating in the same order as get_transform_matrix.
+    :param rotations: An (N, 3) array of the angles in radians to rotate around the x, y and z axes.
+    :return: An (N, 3, 3) array of matrices.
+    """
+    rotations = np.asarray(rotations, dtype=np.float64).reshape(-1, 3)
+    (cos_x, cos_y, cos_z), (sin_x, sin_y, sin_z) = np.cos(rotations).T, np.sin(rotations).T
+
+    # rotate_z @ rotate_y @ rotate_x, multiplied out
+    matrices = np.empty((len(rotations), 3, 3), dtype=np.float64)
+    matrices[:, 0, 0] = cos_z * cos_y
+    matrices[:, 0, 1] = cos_z * sin_y * sin_x - sin_z * cos_x
+    matrices[:, 0, 2] = cos_z * sin_y * cos_x + sin_z * sin_x
+    matrices[:, 1, 0] = sin_z * cos_y
+    matrices[:, 1, 1] = sin_z * sin_y * sin_x + cos_z * cos_x
+    matrices[:, 1, 2] = sin_z * sin_y * cos_x - cos_z * sin_x
+    matrices[:, 2, 0] = -sin_y
+    matrices[:, 2, 1] = cos_y * sin_x
+    matrices[:, 2, 2] = cos_y * cos_x
+    return matrices
+
+
+class InstanceBatch:
+    """
+Lots of copies of one template mesh, each with its own offset, scale and rotation, kept in contiguous arrays.
+The template is only stored once, so a thousand copies of a cuboid cost three rows of numbers each, not a whole Cuboid.
+Row i of every array belongs to the i'th instance in the batch.
+    """
+
+    __slots__ = (
+        "version", "template", "_count", "_offsets", "_scales", "_rotations", "_matrices", "_inverses", "_centers",
+        "_radii"
+    )
+
+    def __init__(self, template: Mesh, capacity: int = 0):
+        """
+        :param template: The mesh every instance is a copy of, in its own space.
+        :param capacity: How many instances to make room for.
+        """
+        self.template: Mesh = template
+        self._count = 0
+
+        # Goes up every time instances are added, removed or changed
+        self.version: int = 0
+
+        # Each instance is scaled, then rotated, then moved, the same as a SceneNode
+        self._offsets = np.empty((capacity, 3), dtype=np.float64)
+        self._scales = np.empty((capacity, 3), dtype=np.float64)
+        self._rotations = np.empty((capacity, 3), dtype=np.float64)
+
+        # The scale and rotation together, which takes the template to world space before the offset is added,
+        # and its inverse, which takes the camera into the template's space for back face culling
+        self._matrices = np.empty((capacity, 3, 3), dtype=np.float64)
+        self._inverses = np.empty((capacity, 3, 3), dtype=np.float64)
+
+        # The template's sphere, moved to each instance, for frustum culling
+        self._centers = np.empty((capacity, 3), dtype=np.float64)
+        self._radii = np.empty(capacity, dtype=np.float64)
+
+    def __len__(self):
+        return self._count
+
+    def __str__(self):
+        return f"InstanceBatch: {self._count} instances of {self.template}"
+
+    @classmethod
+    def from_cuboids(cls, cuboids_: Union[list[Cuboid], CuboidBatch]) -> 'InstanceBatch':
+        """
+Creates a batch of instances of a cube of size 1, scaled and moved to match each cuboid given.
+        """
+        if isinstance(cuboids_, CuboidBatch):
+            dimensions = cuboids_.dimensions
+        else:
+            dimensions = np.array(
+                [[a.x, a.y, a.z, a.width, a.height, a.length] for a in cuboids_], dtype=np.float64
+            ).reshape(-1, 6)
+        batch = cls(Mesh.from_cuboids([Cuboid(0, 0, 0, 1, 1, 1)]), len(dimensions))
+        batch.add(dimensions[:, :3], dimensions[:, 3:])
+        return batch
+
+    # region - Stored data
+    @property
+    def offsets(self) -> np.ndarray:
+        """
+(N, 3) array of how far each instance is moved from the template.
+        """
+        return self._offsets[:self._count]
+
+    @property
+    def scales(self) -> np.ndarray:
+        """
+(N, 3) array of how much each instance is stretched along x, y and z.
+        """
+        return self._scales[:self._count]
+
+    @property
+    def rotations(self) -> np.ndarray:
+        """
+(N, 3) array of the angles in radians each instance is rotated around the x, y and z axes.
+        """
+        return self._rotations[:self._count]
+
+    @property
+    def matrices(self) -> np.ndarray:
+        """
+(N, 3, 3) array of the matrix that scales and rotates the template for each instance.
+        """
+        return self._matrices[:self._count]
+
+    @property
+    def center(self) -> np.ndarray:
+        """
+(N, 3) array of the center of the template's sphere for each instance.
+        """
+        return self._centers[:self._count]
+
+    @property
+    def radius(self) -> np.ndarray:
+        """
+(N,) array of the radius of the template's sphere for each instance.
+        """
+        return self._radii[:self._count]
+    # endregion - Stored data
+
+    # region - Transforming
+    def get_vertices(self, indexes: np.ndarray = None) -> np.ndarray:
+        """
+Transforms the template's vertices for every instance in one go.
+        :param indexes: Optional indexes, or a boolean mask, of the only instances to transform.
+        :return: A (K, V, 3) array of the vertices of each instance in world space.
+        """
+        indexes = slice(0, self._count) if indexes is None else indexes
+        return self.template.vertices @ self._matrices[indexes].transpose(0, 2, 1) + self._offsets[indexes, None]
+
+    def get_local_positions(self,
+                            position: Union[list[float, float, float], tuple[float, float, float]],
+                            indexes: np.ndarray = None) -> np.ndarray:
+        """
+Finds where a position is relative to each instance, in the template's space.
+The template's triangles facing that position are the ones facing the real position for that instance.
+        :param indexes: Optional indexes, or a boolean mask, of the only instances to use.
+        :return: A (K, 3) array of positions.
+        """
+        indexes = slice(0, self._count) if indexes is None else indexes
+        relative = np.asarray(position, dtype=np.float64) - self._offsets[indexes]
+        return np.einsum("nij,nj->ni", self._inverses[indexes], relative)
+
+    def get_normals(self, indexes: np.ndarray = None) -> np.ndarray:
+        """
+Turns the template's triangle normals for every instance, scaling can change their direction as well.
+        :param indexes: Optional indexes, or a boolean mask, of the only instances to use.
+        :return: A (K, T, 3) array of unit normals.
+        """
+        indexes = slice(0, self._count) if indexes is None else indexes
+        # Normals are turned by the inverse transpose, so that they stay at right angles to the triangles
+        normals = self.template.normals @ self._inverses[indexes]
+        lengths = np.linalg.norm(normals, axis=2, keepdims=True)
+        return np.divide(normals, lengths, out=np.zeros_like(normals), where=lengths > 0)
+    # endregion - Transforming
+
+    def add(self,
+            offsets: np.ndarray,
+            scales: np.ndarray = (1, 1, 1),
+            rotations: np.ndarray = (0, 0, 0)) -> np.ndarray:
+        """
+Adds one or more instances to the end of the batch.
+        :param offsets: How far to move each instance, either (3,) or (M, 3).
+        :param scales: How much to stretch each instance, either (3,) or (M, 3), none of them can be 0.
+        :param rotations: The angles in radians to rotate each instance around the x, y and z axes, (3,) or (M, 3).
+        :return: The indexes of the new instances.
+        """
+        offsets, scales, rotations = (
+            a.reshape(-1, 3) for a in np.broadcast_arrays(
+                np.asarray(offsets, dtype=np.float64), np.asarray(scales, dtype=np.float64),
+                np.asarray(rotations, dtype=np.float64)
+            )
+        )
+        start = self._count
+        end = start + len(offsets)
+
+        self._reserve(end)
+        self._offsets[start:end] = offsets
+        self._scales[start:end] = scales
+        self._rotations[start:end] = rotations
+        self._count = end
+        self._calculate_geometry(slice(start, end))
+
+        return np.arange(start, end)
+
+    def remove(self, indexes: Union[int, list[int], np.ndarray]):
+        """
+Removes the instances at the given indexes, the remaining instances keep their order.
+        :param indexes: An index, or indexes, or a boolean mask of instances to remove.
+        """
+        keep = np.ones(self._count, dtype=bool)
+        keep[indexes] = False
+        new_count = int(keep.sum())
+
+        for name in self.__slots__[3:]:
+            array = getattr(self, name)
+            array[:new_count] = array[:self._count][keep]
+        self._count = new_count
+        self.version += 1
+
+    def move_to(self, indexes: Union[int, list[int], np.ndarray], offsets: np.ndarray):
+        """
+Moves the instances at the given indexes to the given offsets.
+        :param indexes: An index, or indexes, or a boolean mask of instances to move.
+        :param offsets: The new offset of each instance, either (3,) or (M, 3).
+        """
+        indexes = np.atleast_1d(np.arange(self._count)[indexes])
+        self._offsets[indexes] = offsets
+        self._calculate_geometry(indexes)
+
+    def move(self, indexes: Union[int, list[int], np.ndarray], changes: np.ndarray):
+        """
+Moves the instances at the given indexes by the given amounts.
+        :param indexes: An index, or indexes, or a boolean mask of instances to move.
+        :param changes: How far to move each instance, either (3,) or (M, 3).
+        """
+        indexes = np.atleast_1d(np.arange(self._count)[indexes])
+        self.move_to(indexes, self._offsets[indexes] + changes)
+
+    def scale_to(self, indexes: Union[int, list[int], np.ndarray], scales: np.ndarray):
+        """
+Sets how much the instances at the given indexes are stretched along x, y and z.
+        :param indexes: An index, or indexes, or a boolean mask of instances to scale.
+        :param scales: The new scale of each instance, either (3,) or (M, 3), none of them can be 0.
+        """
+        indexes = np.atleast_1d(np.arange(self._count)[indexes])
+        self._scales[indexes] = scales
+        self._calculate_geometry(indexes)
+
+    def rotate_to(self, indexes: Union[int, list[int], np.ndarray], rotations: np.ndarray):
+        """
+Sets the angles in radians the instances at the given indexes are rotated around the x, y and z axes.
+        :param indexes: An index, or indexes, or a boolean mask of instances to rotate.
+        :param rotations: The new angles of each instance, either (3,) or (M, 3).
+        """
+        indexes = np.atleast_1d(np.arange(self._count)[indexes])
+        self._rotations[indexes] = rotations
+        self._calculate_geometry(indexes)
+
+    def rotate(self, indexes: Union[int, list[int], np.ndarray], changes: np.ndarray):
+        """
+Adds to the angles in radians the instances at the given indexes are rotated around the x, y and z axes.
+        :param indexes: An index, or indexes, or a boolean mask of instances to rotate.
+        :param changes: How much to rotate each instance, either (3,) or (M, 3).
+        """
+        indexes = np.atleast_1d(np.arange(self._count)[indexes])
+        self.rotate_to(indexes, self._rotations[indexes] + changes)
+
+    def _reserve(self, capacity: int):
+        """
+Grows the arrays so that they can hold at least the given number of instances.
+        """
+        if capacity <= len(self._offsets):
+            return
+        capacity = max(capacity, 2 * len(self._offsets))
+
+        for name in self.__slots__[3:]:
+            old = getattr(self, name)
+            new = np.empty((capacity, *old.shape[1:]), dtype=old.dtype)
+            new[:self._count] = old[:self._count]
+            setattr(self, name, new)
+
+    def _calculate_geometry(self, indexes: Union[slice, np.ndarray]):
+        """
+Calculates the matrices and spheres of the instances at the given indexes.
+        """
+        rotations = get_rotation_matrices(self._rotations[indexes])
+        scales = self._scales[indexes]
+
+        # Scaling first then rotating, so each column of the rotation is multiplied by its scale
+        self._matrices[indexes] = rotations * scales[:, None, :]
+        # And the inverse undoes the rotation then the scaling, each row of the transposed rotation divided instead
+        self._inverses[indexes] = rotations.transpose(0, 2, 1) / scales[:, :, None]
+
+        self._centers[indexes] = self._matrices[indexes] @ np.array(self.template.center) + self._offsets[indexes]
+        self._radii[indexes] = self.template.radius * np.abs(scales).max(axis=1)
+        self.version += 1
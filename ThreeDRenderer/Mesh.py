@@ -0,0 +1,282 @@
+from itertools import chain
+from typing import Union
+
+import numpy as np
+
+from ThreeDRenderer.Cuboid import Cuboid
+from ThreeDRenderer.CuboidBatch import CuboidBatch
+
+
+def get_unique_edges(edges: np.ndarray) -> np.ndarray:
+    """
+Removes edges that are repeated, in either direction.
+    :param edges: An (E, 2) array of indexes, the start and end of each edge.
+    :return: An (U, 2) array of each edge once, with the smaller index first, sorted.
+    """
+    edges = np.sort(np.asarray(edges, dtype=np.int64).reshape(-1, 2), axis=1)
+    if not len(edges):
+        return edges.astype(np.int32)
+
+    # Both indexes packed into one number, much faster to find the unique ones of than rows
+    keys = np.unique(edges[:, 0] << 32 | edges[:, 1])
+    return np.stack((keys >> 32, keys & 0xFFFFFFFF), axis=1).astype(np.int32)
+
+
+def _flatten_faces(faces: Union[list[list[int]], np.ndarray]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    :param faces: The indexes of the corners of each face, or an (F, k) array when every face has k corners.
+    :return: The corners of every face one after another, and how many corners each face has.
+    """
+    if isinstance(faces, np.ndarray):
+        return faces.reshape(-1), np.full(len(faces), faces.shape[1])
+    counts = np.fromiter((len(face) for face in faces), dtype=np.int64, count=len(faces))
+    return np.fromiter(chain.from_iterable(faces), dtype=np.int64, count=int(counts.sum())), counts
+
+
+def _triangulate_faces(corners: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """
+Splits faces with any number of corners into triangles, fanning out from the first corner of each face.
+    :param corners: The corners of every face one after another.
+    :param counts: How many corners each face has.
+    :return: A (T, 3) array of indexes.
+    """
+    starts = np.cumsum(counts) - counts
+    triangle_counts = np.maximum(counts - 2, 0)
+
+    # A face with k corners makes k - 2 triangles, the i'th being its corners 0, i and i + 1
+    first_corners = np.repeat(starts, triangle_counts)
+    i = np.arange(len(first_corners)) - np.repeat(np.cumsum(triangle_counts) - triangle_counts, triangle_counts) + 1
+    return np.stack(
+        (corners[first_corners], corners[first_corners + i], corners[first_corners + i + 1]), axis=1
+    ).astype(np.int32)
+
+
+def _get_face_edges(corners: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """
+Gets the edges around the outside of each face, the diagonals made when splitting them into triangles aren't included.
+    :param corners: The corners of every face one after another.
+    :param counts: How many corners each face has.
+    :return: An (E, 2) array of indexes, with repeats.
+    """
+    starts = np.repeat(np.cumsum(counts) - counts, counts)
+    following = starts + (np.arange(len(corners)) - starts + 1) % np.repeat(counts, counts)
+    return np.stack((corners, corners[following]), axis=1)
+
+
+def _turn_faces_outwards(faces: np.ndarray, corners: np.ndarray, normals: np.ndarray) -> np.ndarray:
+    """
+Reverses the faces that go clockwise when looking at them from the side their normal points to.
+    :param faces: An (F, k) array of indexes into corners.
+    :param corners: An (N, 3) array of points.
+    :param normals: An (F, 3) array of the direction each face should face.
+    """
+    faces = np.array(faces)
+    face_corners = corners[faces]
+    clockwise = np.einsum(
+        "fk,fk->f", np.cross(face_corners[:, 1] - face_corners[:, 0], face_corners[:, 2] - face_corners[:, 0]), normals
+    ) < 0
+    faces[clockwise] = faces[clockwise, ::-1]
+    return faces
+
+
+# The corners of each face of a cuboid, turned so they go anticlockwise looking at the outside of the face
+cuboid_faces: np.ndarray = _turn_faces_outwards(
+    Cuboid.surface_corners, CuboidBatch.corner_offsets, CuboidBatch.normals
+)
+
+
+class Mesh:
+    """
+A shape made of triangles, stored as arrays instead of an object for each vertex.
+Triangles are indexes into the vertices, and go anticlockwise when looking at the front of them.
+Edges are kept separately, each one only once however many triangles share it,
+so a mesh made of squares can have its wireframe drawn without the diagonals.
+    """
+
+    __slots__ = "vertices", "triangles", "edges", "normals", "center", "radius", "version", "_edge_incidence"
+
+    def __init__(self, vertices: np.ndarray, triangles: np.ndarray, edges: np.ndarray = None):
+        """
+        :param vertices: A (V, 3) array of the position of each vertex.
+        :param triangles: A (T, 3) array of indexes into vertices, the corners of each triangle.
+        :param edges: Optional (E, 2) array of indexes into vertices, the edges drawn in a wireframe.
+        If None then every edge of every triangle, repeats are always removed.
+        """
+        self.vertices: np.ndarray = np.ascontiguousarray(vertices, dtype=np.float64).reshape(-1, 3)
+        self.triangles: np.ndarray = np.ascontiguousarray(triangles, dtype=np.int32).reshape(-1, 3)
+        if edges is None:
+            edges = self.triangles[:, [0, 1, 1, 2, 2, 0]]
+        self.edges: np.ndarray = get_unique_edges(edges)
+
+        # The edge and triangle of each place an edge is one of the sides of a triangle, for back face culling
+        self._edge_incidence: tuple[np.ndarray, np.ndarray] = self._find_edge_incidence()
+
+        self.normals: np.ndarray = None
+        self.center: tuple[float, float, float] = None
+        self.radius: float = None
+        self._calculate_geometry()
+
+        # Goes up every time the vertices are moved
+        self.version: int = 0
+
+    def __len__(self):
+        return len(self.triangles)
+
+    def __str__(self):
+        return f"Mesh: {len(self.vertices)} vertices, {len(self.triangles)} triangles, {len(self.edges)} edges"
+
+    @classmethod
+    def from_faces(cls, vertices: np.ndarray, faces: Union[list[list[int]], np.ndarray]) -> 'Mesh':
+        """
+Creates a mesh from faces with any number of corners, like squares, as found in model files.
+The faces are split into triangles, but only the edges around the outside of each face are kept.
+        :param vertices: A (V, 3) array of the position of each vertex.
+        :param faces: The indexes of the corners of each face, going anticlockwise when looking at the front.
+        Or an (F, k) array when every face has k corners.
+        """
+        return cls.from_face_arrays(vertices, *_flatten_faces(faces))
+
+    @classmethod
+    def from_face_arrays(cls, vertices: np.ndarray, corners: np.ndarray, counts: np.ndarray) -> 'Mesh':
+        """
+The same as from_faces, with the faces already in arrays, as they are read from model files.
+        :param vertices: A (V, 3) array of the position of each vertex.
+        :param corners: The indexes of the corners of every face one after another.
+        :param counts: How many corners each face has.
+        """
+        corners = np.asarray(corners, dtype=np.int64).reshape(-1)
+        counts = np.asarray(counts, dtype=np.int64).reshape(-1)
+        return cls(vertices, _triangulate_faces(corners, counts), _get_face_edges(corners, counts))
+
+    @classmethod
+    def from_cuboids(cls, cuboids_: Union[list[Cuboid], CuboidBatch]) -> 'Mesh':
+        """
+Creates one mesh of every cuboid given, using Cuboid.surface_corners and Cuboid.corner_connections.
+        :param cuboids_: A list of cuboids, or a CuboidBatch.
+        """
+        if isinstance(cuboids_, CuboidBatch):
+            corners = cuboids_.corners.reshape(-1, 3)
+        else:
+            corners = np.array([cuboid_.corners for cuboid_ in cuboids_], dtype=np.float64).reshape(-1, 3)
+        offsets = np.arange(len(corners) // 8)[:, None, None] * 8
+
+        faces = cuboid_faces + offsets
+        triangles = np.concatenate((faces[:, :, [0, 1, 2]], faces[:, :, [0, 2, 3]]), axis=2).reshape(-1, 3)
+        edges = np.array(Cuboid.corner_connections) + offsets
+        return cls(corners, triangles, edges)
+
+    @classmethod
+    def from_arrays(cls, arrays: dict[str, np.ndarray]) -> 'Mesh':
+        """
+Creates a mesh straight from arrays made by get_arrays, without copying or checking them or working anything out.
+So a mesh loaded from a memory mapped file stays in the file until it is used.
+        """
+        mesh_ = cls.__new__(cls)
+        mesh_.vertices = arrays["vertices"]
+        mesh_.triangles = arrays["triangles"]
+        mesh_.edges = arrays["edges"]
+        mesh_.normals = arrays["normals"]
+        mesh_._edge_incidence = arrays["incident_edges"], arrays["incident_triangles"]
+        mesh_.center = tuple(arrays["sphere"][:3].tolist())
+        mesh_.radius = float(arrays["sphere"][3])
+        mesh_.version = 0
+        return mesh_
+
+    def get_arrays(self) -> dict[str, np.ndarray]:
+        """
+Every array the mesh is made of, including everything worked out when it was made, for saving it.
+        """
+        return {
+            "vertices": self.vertices,
+            "triangles": self.triangles,
+            "edges": self.edges,
+            "normals": self.normals,
+            "incident_edges": self._edge_incidence[0],
+            "incident_triangles": self._edge_incidence[1],
+            "sphere": np.array([*self.center, self.radius], dtype=np.float64),
+        }
+
+    def _find_edge_incidence(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+Matches the sides of every triangle to the edges.
+Sides that aren't edges, like the diagonals of squares, are left out.
+        :return: An array of indexes into edges, and an array of the same length of indexes into triangles.
+        """
+        sides = np.sort(self.triangles[:, [0, 1, 1, 2, 2, 0]].reshape(-1, 2).astype(np.int64), axis=1)
+        side_keys = sides[:, 0] << 32 | sides[:, 1]
+        edge_keys = self.edges[:, 0].astype(np.int64) << 32 | self.edges[:, 1]
+
+        # Edges are sorted by their key already, so each side can be looked up
+        found = np.minimum(np.searchsorted(edge_keys, side_keys), max(len(edge_keys) - 1, 0))
+        is_edge = edge_keys[found] == side_keys if len(edge_keys) else np.zeros(len(side_keys), dtype=bool)
+        return found[is_edge].astype(np.int32), (np.flatnonzero(is_edge) // 3).astype(np.int32)
+
+    def _calculate_geometry(self):
+        """
+Calculates the normal of each triangle, and the sphere around every vertex used for frustum culling.
+        """
+        corners = self.vertices[self.triangles]
+        normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+        lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+        # Triangles with no area don't face anywhere
+        self.normals = np.divide(normals, lengths, out=np.zeros_like(normals), where=lengths > 0)
+
+        if len(self.vertices):
+            mins, maxs = self.vertices.min(axis=0), self.vertices.max(axis=0)
+            center = (mins + maxs) / 2
+            self.center = tuple(center.tolist())
+            self.radius = float(np.sqrt(((self.vertices - center) ** 2).sum(axis=1).max()))
+        else:
+            self.center, self.radius = (0.0, 0.0, 0.0), 0.0
+
+    def get_facing_triangles(self,
+                             position: Union[list[float, float, float], tuple[float, float, float], np.ndarray]
+                             ) -> np.ndarray:
+        """
+Finds which triangles face towards a position, the rest are back faces that can't be seen from there.
+        :param position: A position, or an (N, 3) array of positions to check every triangle against.
+        :return: A (T,) boolean array, True where the position is in front of the triangle, or (N, T) for N positions.
+        """
+        position = np.asarray(position, dtype=np.float64)
+        first_corners = self.vertices[self.triangles[:, 0]]
+        if position.ndim == 1:
+            return np.einsum("tk,tk->t", self.normals, position - first_corners) > 0
+        # The same as above, split up so it is one matrix multiplication for every position
+        return position @ self.normals.T > np.einsum("tk,tk->t", self.normals, first_corners)
+
+    def get_facing_edges(self, facing: np.ndarray) -> np.ndarray:
+        """
+Finds the edges of the triangles that face the camera, an edge is kept if any triangle it is a side of is.
+Edges that aren't the side of any triangle are always kept.
+        :param facing: A (T,) boolean array of the triangles to keep, as made by get_facing_triangles, or (N, T).
+        :return: An (E,) boolean array of the edges to keep, or (N, E).
+        """
+        edge_indexes, triangle_indexes = self._edge_incidence
+        keep = np.ones((*facing.shape[:-1], len(self.edges)), dtype=bool)
+        keep[..., edge_indexes] = False
+        if facing.ndim == 1:
+            keep[edge_indexes[facing[triangle_indexes]]] = True
+        else:
+            rows, incidences = np.nonzero(facing[:, triangle_indexes])
+            keep[rows, edge_indexes[incidences]] = True
+        return keep
+
+    def transform(self, matrix: np.ndarray):
+        """
+Moves every vertex by a 4x4 matrix, like one made by get_transform_matrix.
+        """
+        matrix = np.asarray(matrix, dtype=np.float64)
+        self.vertices = self.vertices @ matrix[:3, :3].T + matrix[:3, 3]
+        if np.linalg.det(matrix[:3, :3]) < 0:
+            # Mirroring turns every triangle inside out
+            self.triangles = np.ascontiguousarray(self.triangles[:, ::-1])
+        self._calculate_geometry()
+        self.version += 1
+
+    def move(self, change: Union[list[float, float, float], tuple[float, float, float]]):
+        """
+Moves every vertex by the given amounts.
+        """
+        self.vertices = self.vertices + np.asarray(change, dtype=np.float64)
+        self._calculate_geometry()
+        self.version += 1
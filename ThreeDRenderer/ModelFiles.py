@@ -0,0 +1,337 @@
+import json
+import re
+import struct
+from itertools import compress
+from typing import BinaryIO, Union
+
+import numpy as np
+
+from ThreeDRenderer.Cuboid import Cuboid
+from ThreeDRenderer.CuboidBatch import CuboidBatch
+from ThreeDRenderer.Mesh import Mesh
+
+
+def _count_words(text: bytes, lines: int) -> np.ndarray:
+    """
+Counts the words on each line of some text, without splitting it up.
+    :param text: Lines of words separated by whitespace.
+    :param lines: How many lines there are.
+    :return: A (lines,) array of the number of words on each line.
+    """
+    characters = np.frombuffer(text, dtype=np.uint8)
+    spaces = np.isin(characters, np.frombuffer(b" \t\r\n", dtype=np.uint8))
+    # A word starts wherever something that isn't a space comes after a space, or at the very start
+    starts = ~spaces & np.concatenate(([True], spaces[:-1]))
+    line_numbers = np.cumsum(characters == ord("\n"))
+    return np.bincount(line_numbers[starts], minlength=lines)[:lines]
+
+
+# region - OBJ
+def load_obj(path: str) -> Mesh:
+    """
+Loads the vertices and faces of a Wavefront OBJ file into one mesh, everything else in the file is ignored.
+The numbers are read straight into arrays, without splitting every line up into objects first.
+    :param path: The path to the OBJ file.
+    """
+    with open(path, "rb") as file:
+        lines = file.read().splitlines()
+
+    is_vertex = np.fromiter((line[:2] in (b"v ", b"v\t") for line in lines), dtype=bool, count=len(lines))
+    is_face = np.fromiter((line[:2] in (b"f ", b"f\t") for line in lines), dtype=bool, count=len(lines))
+
+    # The letter at the start of each line is the only thing that isn't a number
+    vertex_lines = list(compress(lines, is_vertex))
+    vertex_text = b"\n".join(vertex_lines).replace(b"v", b" ")
+    value_counts = _count_words(vertex_text, len(vertex_lines))
+    values = np.fromstring(vertex_text, dtype=np.float64, sep=" ")
+    if vertex_lines and (value_counts == value_counts[0]).all() and values.size == value_counts.sum():
+        # x, y and z, sometimes followed by w or a colour, the same on every line
+        vertices = values.reshape(len(vertex_lines), -1)[:, :3]
+    else:
+        # Lines with different numbers of values
+        vertices = np.array([line.split()[1:4] for line in vertex_lines], dtype=np.float64).reshape(-1, 3)
+
+    # Each corner can also have a texture coordinate and a normal after slashes, only the vertex is needed
+    face_text = re.sub(rb"/\S*", b"", b"\n".join(compress(lines, is_face)).replace(b"f", b" "))
+    counts = _count_words(face_text, int(is_face.sum()))
+    corners = np.fromstring(face_text, dtype=np.int64, sep=" ")
+    if corners.size != counts.sum():
+        raise ValueError(f"{path} has faces that couldn't be read")
+
+    # Indexes start at 1, negative ones count back from the last vertex before the face
+    vertices_before = np.repeat(np.cumsum(is_vertex)[is_face], counts)
+    corners = np.where(corners < 0, corners + vertices_before, corners - 1)
+
+    return Mesh.from_face_arrays(vertices, corners, counts)
+# endregion - OBJ
+
+
+# region - PLY
+# The types a PLY file can use, as NumPy types without the byte order
+_ply_types: dict[str, str] = {
+    "char": "i1", "int8": "i1", "uchar": "u1", "uint8": "u1",
+    "short": "i2", "int16": "i2", "ushort": "u2", "uint16": "u2",
+    "int": "i4", "int32": "i4", "uint": "u4", "uint32": "u4",
+    "float": "f4", "float32": "f4", "double": "f8", "float64": "f8",
+}
+
+
+def _read_ply_header(file: BinaryIO) -> tuple[str, list[tuple[str, int, list[tuple]]]]:
+    """
+Reads the header of a PLY file, leaving the file at the start of the data.
+    :return: The format, and the name, count and properties of each element.
+    Each property is its name and type, or for lists its name, the type of the count and the type of the values.
+    """
+    if file.readline().strip() != b"ply":
+        raise ValueError(f"{file.name} isn't a PLY file")
+
+    file_format = None
+    elements = []
+    while True:
+        line = file.readline()
+        if not line:
+            raise ValueError(f"{file.name} has no end to its header")
+        words = line.decode("ascii").split()
+        if not words or words[0] in ("comment", "obj_info"):
+            continue
+        if words[0] == "end_header":
+            return file_format, elements
+        if words[0] == "format":
+            file_format = words[1]
+        elif words[0] == "element":
+            elements.append((words[1], int(words[2]), []))
+        elif words[0] == "property":
+            if words[1] == "list":
+                elements[-1][2].append((words[4], _ply_types[words[2]], _ply_types[words[3]]))
+            else:
+                elements[-1][2].append((words[2], _ply_types[words[1]]))
+
+
+def _read_ply_element(
+        data: bytes,
+        offset: int,
+        count: int,
+        properties: list[tuple],
+        byte_order: str
+) -> tuple[dict[str, np.ndarray], int]:
+    """
+Reads every row of one element from binary PLY data.
+    :return: Each property's values, lists as their values one after another with "_counts" after the name for the
+    length of each, and where the element ends.
+    """
+    lists = [i for i, prop in enumerate(properties) if len(prop) == 3]
+    if not lists:
+        dtype = np.dtype([(name, byte_order + kind) for name, kind in properties])
+        rows = np.frombuffer(data, dtype=dtype, count=count, offset=offset)
+        return {name: rows[name] for name, _ in properties}, offset + dtype.itemsize * count
+    if len(lists) > 1 or count == 0:
+        raise ValueError("Only elements with one list in them can be read")
+
+    # The sizes of the properties before and after the list, and of the list's count and values
+    before = np.dtype([(name, byte_order + kind) for name, kind in properties[:lists[0]]])
+    after = np.dtype([(name, byte_order + kind) for name, kind in properties[lists[0] + 1:]])
+    name, count_kind, value_kind = properties[lists[0]]
+    count_type, value_type = np.dtype(byte_order + count_kind), np.dtype(byte_order + value_kind)
+
+    # Usually every list is the same length, like a file of only triangles, then every row is the same size
+    length = int(np.frombuffer(data, dtype=count_type, count=1, offset=offset + before.itemsize)[0])
+    row_type = np.dtype(
+        [("before", before), ("count", count_type), ("values", value_type, (length,)), ("after", after)]
+    )
+    if offset + row_type.itemsize * count <= len(data):
+        rows = np.frombuffer(data, dtype=row_type, count=count, offset=offset)
+        if (rows["count"] == length).all():
+            values = {prop[0]: rows["before"][prop[0]] for prop in properties[:lists[0]]}
+            values.update({prop[0]: rows["after"][prop[0]] for prop in properties[lists[0] + 1:]})
+            values[name] = rows["values"].reshape(-1)
+            values[name + "_counts"] = rows["count"].astype(np.int64)
+            return values, offset + row_type.itemsize * count
+
+    # Otherwise each row has to be found one after another, only the lengths are read one at a time
+    count_format = byte_order + count_type.char
+    starts = np.empty(count, dtype=np.int64)
+    lengths = np.empty(count, dtype=np.int64)
+    position = offset
+    for i in range(count):
+        starts[i] = position
+        lengths[i] = struct.unpack_from(count_format, data, position + before.itemsize)[0]
+        position += before.itemsize + count_type.itemsize + int(lengths[i]) * value_type.itemsize + after.itemsize
+
+    # Then everything is copied out at once, from where each row starts
+    raw = np.frombuffer(data, dtype=np.uint8)
+    list_starts = starts + before.itemsize + count_type.itemsize
+    value_starts = np.repeat(list_starts, lengths)
+    value_starts += (np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)) * value_type.itemsize
+    before_rows = _gather_rows(raw, starts, before)
+    after_rows = _gather_rows(raw, list_starts + lengths * value_type.itemsize, after)
+
+    values = {prop[0]: before_rows[prop[0]] for prop in properties[:lists[0]]}
+    values.update({prop[0]: after_rows[prop[0]] for prop in properties[lists[0] + 1:]})
+    values[name] = _gather_rows(raw, value_starts, value_type)
+    values[name + "_counts"] = lengths
+    return values, position
+
+
+def _gather_rows(raw: np.ndarray, starts: np.ndarray, dtype: np.dtype) -> np.ndarray:
+    """
+Copies values that start at the given positions in some bytes into one array.
+    :param raw: The bytes, as a uint8 array.
+    :param starts: Where each value starts.
+    :param dtype: The type of the values.
+    """
+    if not dtype.itemsize:
+        return np.empty(len(starts), dtype=dtype)
+    return raw[starts[:, None] + np.arange(dtype.itemsize)].copy().view(dtype).reshape(-1)
+
+
+def load_ply(path: str) -> Mesh:
+    """
+Loads the vertices and faces of a binary PLY file into a mesh, everything else in the file is ignored.
+Rows are read straight from the file's bytes into arrays.
+    :param path: The path to the PLY file.
+    """
+    with open(path, "rb") as file:
+        file_format, elements = _read_ply_header(file)
+        data = file.read()
+
+    if file_format == "binary_little_endian":
+        byte_order = "<"
+    elif file_format == "binary_big_endian":
+        byte_order = ">"
+    else:
+        raise ValueError(f"{path} is a {file_format} PLY file, only binary ones can be loaded")
+
+    vertices = np.empty((0, 3), dtype=np.float64)
+    corners, counts = np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    offset = 0
+    for name, count, properties in elements:
+        values, offset = _read_ply_element(data, offset, count, properties, byte_order)
+        if name == "vertex":
+            vertices = np.stack((values["x"], values["y"], values["z"]), axis=1).astype(np.float64)
+        elif name == "face":
+            # Usually called vertex_indices, but sometimes vertex_index
+            list_name = next(prop[0] for prop in properties if len(prop) == 3)
+            corners, counts = values[list_name].astype(np.int64), values[list_name + "_counts"]
+
+    return Mesh.from_face_arrays(vertices, corners, counts)
+# endregion - PLY
+
+
+# region - Native format
+# The first bytes of every file saved by save_arrays
+_magic: bytes = b"TDRARRAY"
+
+# Arrays start at multiples of this many bytes, so they are always aligned when memory mapped
+_alignment: int = 64
+
+
+def save_arrays(path: str, kind: str, arrays: dict[str, np.ndarray]):
+    """
+Saves named arrays in one file that load_arrays can memory map, so loading them doesn't read or copy anything.
+The file is the magic bytes, the length of a JSON header, the header, then each array's raw bytes.
+    :param kind: What the arrays are, like "mesh", checked when loading.
+    """
+    arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+    arrays = {name: array.astype(array.dtype.newbyteorder("<")) for name, array in arrays.items()}
+
+    # The header holds where each array starts, which depends on how long the header is,
+    # so make room for it and try again until it fits
+    room = 256
+    while True:
+        header = {"kind": kind, "version": 1, "arrays": {}}
+        offset = -(-(len(_magic) + 8 + room) // _alignment) * _alignment
+        for name, array in arrays.items():
+            header["arrays"][name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+            offset += -(-array.nbytes // _alignment) * _alignment
+        header_bytes = json.dumps(header).encode("utf-8")
+        if len(header_bytes) <= room:
+            break
+        room = len(header_bytes) + 64
+
+    with open(path, "wb") as file:
+        file.write(_magic)
+        file.write(struct.pack("<Q", len(header_bytes)))
+        file.write(header_bytes)
+        for name, array in arrays.items():
+            file.seek(header["arrays"][name]["offset"])
+            file.write(array.tobytes())
+        file.truncate(offset)
+
+
+def load_arrays(path: str, memory_map: bool = True) -> tuple[str, dict[str, np.ndarray]]:
+    """
+Loads arrays saved by save_arrays.
+    :param memory_map: If True the arrays are read only views of the file, only read from disk when they are used.
+    Otherwise the whole file is read in.
+    :return: What the arrays are, and the arrays by name.
+    """
+    with open(path, "rb") as file:
+        if file.read(len(_magic)) != _magic:
+            raise ValueError(f"{path} wasn't saved by save_arrays")
+        header_length = struct.unpack("<Q", file.read(8))[0]
+        header = json.loads(file.read(header_length))
+
+    data = np.memmap(path, dtype=np.uint8, mode="r") if memory_map else np.fromfile(path, dtype=np.uint8)
+    arrays = {}
+    for name, info in header["arrays"].items():
+        dtype = np.dtype(info["dtype"])
+        size = int(np.prod(info["shape"], dtype=np.int64)) * dtype.itemsize
+        arrays[name] = data[info["offset"]:info["offset"] + size].view(dtype).reshape(info["shape"])
+    return header["kind"], arrays
+
+
+def save_mesh(path: str, mesh_: Mesh):
+    """
+Saves a mesh, along with everything worked out when it was made, so loading it is almost instant.
+    """
+    save_arrays(path, "mesh", mesh_.get_arrays())
+
+
+def load_mesh(path: str, memory_map: bool = True) -> Mesh:
+    """
+Loads a mesh saved by save_mesh.
+    :param memory_map: If True the mesh's arrays are read only views of the file.
+    """
+    kind, arrays = load_arrays(path, memory_map)
+    if kind != "mesh":
+        raise ValueError(f"{path} has {kind} in it, not a mesh")
+    return Mesh.from_arrays(arrays)
+
+
+def save_cuboids(path: str, cuboids_: Union[list[Cuboid], CuboidBatch]):
+    """
+Saves the position and size of every cuboid given.
+    :param cuboids_: A list of cuboids, or a CuboidBatch.
+    """
+    if isinstance(cuboids_, CuboidBatch):
+        dimensions = cuboids_.dimensions
+    else:
+        dimensions = np.array(
+            [[a.x, a.y, a.z, a.width, a.height, a.length] for a in cuboids_], dtype=np.float64
+        ).reshape(-1, 6)
+    save_arrays(path, "cuboids", {"dimensions": dimensions})
+
+
+def load_cuboids(path: str) -> list[Cuboid]:
+    """
+Loads cuboids saved by save_cuboids, as a list of cuboids.
+    """
+    return [Cuboid(*row) for row in _load_cuboid_dimensions(path).tolist()]
+
+
+def load_cuboid_batch(path: str) -> CuboidBatch:
+    """
+Loads cuboids saved by save_cuboids, as a CuboidBatch.
+    """
+    return CuboidBatch.from_arrays(*_load_cuboid_dimensions(path).T)
+
+
+def _load_cuboid_dimensions(path: str) -> np.ndarray:
+    """
+    :return: The (N, 6) array of the x, y, z, width, height and length of each cuboid in the file.
+    """
+    kind, arrays = load_arrays(path)
+    if kind != "cuboids":
+        raise ValueError(f"{path} has {kind} in it, not cuboids")
+    return arrays["dimensions"]
+# endregion - Native format
@@ -0,0 +1,400 @@
+from typing import Optional, Union
+
+import numpy as np
+
+from ThreeDRenderer.Cuboid import Cuboid
+from ThreeDRenderer.CuboidBatch import CuboidBatch
+from ThreeDRenderer.Frustum import Frustum, spheres_are_inside
+
+
+def get_transform_matrix(
+        translation: Union[list[float, float, float], tuple[float, float, float]],
+        rotation: Union[list[float, float, float], tuple[float, float, float]],
+        scale: Union[list[float, float, float], tuple[float, float, float]]
+) -> np.ndarray:
+    """
+Makes the 4x4 matrix that scales, then rotates, then translates points.
+    :param translation: How far to move along x, y and z.
+    :param rotation: The angles in radians to rotate around the x, y and z axes, done in that order.
+    :param scale: How much to stretch along x, y and z.
+    """
+    (cos_x, cos_y, cos_z), (sin_x, sin_y, sin_z) = np.cos(rotation), np.sin(rotation)
+    rotate_x = np.array([[1, 0, 0], [0, cos_x, -sin_x], [0, sin_x, cos_x]])
+    rotate_y = np.array([[cos_y, 0, sin_y], [0, 1, 0], [-sin_y, 0, cos_y]])
+    rotate_z = np.array([[cos_z, -sin_z, 0], [sin_z, cos_z, 0], [0, 0, 1]])
+
+    matrix = np.identity(4)
+    matrix[:3, :3] = (rotate_z @ rotate_y @ rotate_x) * np.asarray(scale, dtype=np.float64)
+    matrix[:3, 3] = translation
+    return matrix
+
+
+class SceneNode:
+    """
+A node in a scene graph, with a transform relative to its parent and any number of children.
+Cuboids can be attached to any node, they are positioned in the node's space and so move with it.
+
+The world space corners of a node's cuboids, and the bounds of everything under a node, are kept between frames.
+Changing a node's transform marks it as dirty, and update only visits the parts of the graph under a dirty node, so
+a scene where little moves costs little to update however big it is.
+    """
+
+    __slots__ = (
+        "name", "parent", "children", "version", "_translation", "_rotation", "_scale", "_local_corners",
+        "_world_matrix", "_world_corners", "_centers", "_radii", "_mins", "_maxs", "_count", "_slot", "_child_bounds",
+        "_child_counts", "_dirty", "_cuboids_dirty", "_child_dirty", "_dirty_children"
+    )
+
+    def __init__(self,
+                 cuboids_: Union[list[Cuboid], CuboidBatch] = None,
+                 translation: Union[list[float, float, float], tuple[float, float, float]] = (0, 0, 0),
+                 rotation: Union[list[float, float, float], tuple[float, float, float]] = (0, 0, 0),
+                 scale: Union[list[float, float, float], tuple[float, float, float]] = (1, 1, 1),
+                 name: str = ""):
+        """
+        :param cuboids_: Optional cuboids attached to this node, in its space.
+        :param translation: How far the node is moved from its parent.
+        :param rotation: The angles in radians the node is rotated around the x, y and z axes, in that order.
+        :param scale: How much the node is stretched along x, y and z.
+        :param name: Only used to tell nodes apart when debugging.
+        """
+        self.name: str = name
+        self.parent: Optional[SceneNode] = None
+        self.children: list[SceneNode] = []
+
+        self._translation: tuple[float, float, float] = tuple(translation)
+        self._rotation: tuple[float, float, float] = tuple(rotation)
+        self._scale: tuple[float, float, float] = tuple(scale)
+
+        # (N, 8, 3) array of the corners of the attached cuboids, in this node's space
+        self._local_corners: np.ndarray = np.empty((0, 8, 3), dtype=np.float64)
+
+        # Kept between frames, only calculated again after something changes
+        self._world_matrix: np.ndarray = np.identity(4)
+        self._world_corners: np.ndarray = self._local_corners
+        self._centers: np.ndarray = np.empty((0, 3), dtype=np.float64)
+        self._radii: np.ndarray = np.empty(0, dtype=np.float64)
+
+        # The bounds of every cuboid in this node and every node under it, None when there are no cuboids
+        self._mins: Optional[np.ndarray] = None
+        self._maxs: Optional[np.ndarray] = None
+        # How many cuboids are in this node and under it
+        self._count: int = 0
+
+        # Where this node's bounds are kept in its parent's _child_bounds and _child_counts,
+        # the same as its index in the parent's children
+        self._slot: int = -1
+        # (2, 3, C) array of the smallest then largest x, y and z of each child, infinitely small when a child has no
+        # cuboids, so only the children that changed need looking at to find the bounds again
+        # Each axis is kept in one row, finding the smallest of a row is much faster than going down a column
+        self._child_bounds: np.ndarray = np.empty((2, 3, 0), dtype=np.float64)
+        # (C,) array of how many cuboids are in and under each child, kept the same way
+        self._child_counts: np.ndarray = np.empty(0, dtype=np.int64)
+
+        # The transform changed, so everything under it moved
+        self._dirty: bool = True
+        # Only the attached cuboids changed
+        self._cuboids_dirty: bool = False
+        # Something under this node changed, so the bounds need finding again
+        self._child_dirty: bool = False
+        # The children that are dirty or have something dirty under them, the only ones update needs to visit
+        self._dirty_children: set[SceneNode] = set()
+
+        # Goes up every time this node or anything under it changes, unlike the dirty flags it is never reset
+        self.version: int = 0
+
+        if cuboids_ is not None:
+            self.set_cuboids(cuboids_)
+
+    def __str__(self):
+        return f"SceneNode {self.name}: {len(self._local_corners)} cuboids, {len(self.children)} children"
+
+    def __iter__(self):
+        """
+Goes through this node and every node under it, parents before their children.
+        """
+        yield self
+        for child in self.children:
+            yield from child
+
+    # region - Transform
+    @property
+    def translation(self) -> tuple[float, float, float]:
+        return self._translation
+
+    @property
+    def rotation(self) -> tuple[float, float, float]:
+        return self._rotation
+
+    @property
+    def scale(self) -> tuple[float, float, float]:
+        return self._scale
+
+    def move_to(self, translation: Union[list[float, float, float], tuple[float, float, float]]):
+        """
+Sets how far the node is moved from its parent.
+        """
+        self._translation = tuple(translation)
+        self._mark_dirty()
+
+    def move(self, change: Union[list[float, float, float], tuple[float, float, float]]):
+        """
+Moves the node by the given amounts, in its parent's space.
+        """
+        self.move_to([a + b for a, b in zip(self._translation, change)])
+
+    def rotate_to(self, rotation: Union[list[float, float, float], tuple[float, float, float]]):
+        """
+Sets the angles in radians the node is rotated around the x, y and z axes.
+        """
+        self._rotation = tuple(rotation)
+        self._mark_dirty()
+
+    def rotate(self, change: Union[list[float, float, float], tuple[float, float, float]]):
+        """
+Adds to the angles in radians the node is rotated around the x, y and z axes.
+        """
+        self.rotate_to([a + b for a, b in zip(self._rotation, change)])
+
+    def scale_to(self, scale: Union[list[float, float, float], tuple[float, float, float]]):
+        """
+Sets how much the node is stretched along x, y and z.
+        """
+        self._scale = tuple(scale)
+        self._mark_dirty()
+
+    @property
+    def local_matrix(self) -> np.ndarray:
+        """
+4x4 matrix that takes points from this node's space to its parent's.
+        """
+        return get_transform_matrix(self._translation, self._rotation, self._scale)
+
+    @property
+    def world_matrix(self) -> np.ndarray:
+        """
+4x4 matrix that takes points from this node's space to world space, as of the last update.
+        """
+        return self._world_matrix
+    # endregion - Transform
+
+    # region - Graph
+    def add_child(self, child: 'SceneNode') -> 'SceneNode':
+        """
+Puts a node under this one, taking it away from its old parent.
+        :return: The child, so nodes can be made and added in one go.
+        """
+        if child.parent is not None:
+            child.parent.remove_child(child)
+        child.parent = self
+        child._slot = len(self.children)
+        self.children.append(child)
+
+        capacity = self._child_bounds.shape[2]
+        if child._slot >= capacity:
+            # Doubled when it is full, so adding lots of children doesn't copy it every time
+            child_bounds = np.empty((2, 3, max(4, 2 * capacity)), dtype=np.float64)
+            child_bounds[:, :, :child._slot] = self._child_bounds[:, :, :child._slot]
+            self._child_bounds = child_bounds
+            self._child_counts = np.resize(self._child_counts, child_bounds.shape[2])
+        self._store_child_bounds(child)
+
+        child._mark_dirty()
+        return child
+
+    def remove_child(self, child: 'SceneNode'):
+        """
+Takes a node out from under this one, it is no longer part of the scene.
+        """
+        self.children.remove(child)
+        self._dirty_children.discard(child)
+        child.parent = None
+        child._slot = -1
+
+        # The children after it move along a slot
+        for slot, other_child in enumerate(self.children):
+            other_child._slot = slot
+            self._store_child_bounds(other_child)
+
+        # The bounds need to be found again without it
+        self._child_dirty = True
+        self._mark_child_dirty()
+
+    def set_cuboids(self, cuboids_: Union[list[Cuboid], CuboidBatch]):
+        """
+Changes the cuboids attached to this node, they are copied so changing them afterwards does nothing.
+        :param cuboids_: The cuboids, in this node's space, a list of cuboids or a CuboidBatch.
+        """
+        if isinstance(cuboids_, CuboidBatch):
+            self._local_corners = cuboids_.corners.copy()
+        else:
+            self._local_corners = np.array(
+                [cuboid_.corners for cuboid_ in cuboids_], dtype=np.float64
+            ).reshape(-1, 8, 3)
+        self._cuboids_dirty = True
+        self._mark_child_dirty()
+
+    def _mark_dirty(self):
+        """
+Marks this node's transform as changed, and lets every node above it know.
+        """
+        self._dirty = True
+        self._mark_child_dirty()
+
+    def _mark_child_dirty(self):
+        """
+Lets every node above this one know which of its children has something under it that needs updating.
+Stops at the first one that already knows, as everything above it does too.
+Every version from this node up is still changed, as they go up every time.
+        """
+        node = self
+        while node is not None:
+            node.version += 1
+            node = node.parent
+
+        node = self
+        while node.parent is not None and node not in node.parent._dirty_children:
+            node.parent._child_dirty = True
+            node.parent._dirty_children.add(node)
+            node = node.parent
+
+    def _store_child_bounds(self, child: 'SceneNode'):
+        """
+Copies a child's bounds into this node's _child_bounds, and how many cuboids it has into _child_counts.
+        """
+        self._child_counts[child._slot] = child._count
+        if child._mins is None:
+            self._child_bounds[0, :, child._slot] = np.inf
+            self._child_bounds[1, :, child._slot] = -np.inf
+        else:
+            self._child_bounds[0, :, child._slot] = child._mins
+            self._child_bounds[1, :, child._slot] = child._maxs
+    # endregion - Graph
+
+    # region - Cached geometry
+    @property
+    def world_corners(self) -> np.ndarray:
+        """
+(N, 8, 3) array of the corners of the attached cuboids in world space, in the same order as Cuboid.corners.
+        """
+        return self._world_corners
+
+    @property
+    def centers(self) -> np.ndarray:
+        """
+(N, 3) array of the center of each attached cuboid in world space.
+        """
+        return self._centers
+
+    @property
+    def radii(self) -> np.ndarray:
+        """
+(N,) array of the distance from the center to the furthest corner of each attached cuboid.
+        """
+        return self._radii
+
+    @property
+    def bounds(self) -> Optional[tuple[np.ndarray, np.ndarray]]:
+        """
+The smallest and largest x, y and z of every cuboid in this node and under it, None if there are none.
+        """
+        if self._mins is None:
+            return None
+        return self._mins, self._maxs
+
+    @property
+    def count(self) -> int:
+        """
+How many cuboids are in this node and under it, as of the last update.
+        """
+        return self._count
+
+    def update(self) -> int:
+        """
+Recalculates everything that changed since the last update, should be called on the root node once a frame.
+        :return: How many nodes were recalculated.
+        """
+        parent_matrix = np.identity(4) if self.parent is None else self.parent._world_matrix
+        return self._update(parent_matrix, False)
+
+    def _update(self, parent_matrix: np.ndarray, parent_moved: bool) -> int:
+        """
+        :param parent_matrix: The world matrix of the parent.
+        :param parent_moved: Whether the parent's world matrix changed, which moves this node too.
+        :return: How many nodes were recalculated.
+        """
+        moved = self._dirty or parent_moved
+        if not (moved or self._cuboids_dirty or self._child_dirty):
+            return 0
+
+        if moved:
+            self._world_matrix = parent_matrix @ self.local_matrix
+
+        if moved or self._cuboids_dirty:
+            self._world_corners = self._local_corners @ self._world_matrix[:3, :3].T + self._world_matrix[:3, 3]
+            self._centers = self._world_corners.mean(axis=1)
+            self._radii = np.sqrt(((self._world_corners - self._centers[:, None]) ** 2).sum(axis=2).max(axis=1))
+
+        # Everything under a node that moved has moved too, otherwise only the children with something dirty under them
+        # need visiting, so the cost depends on what changed rather than on how many children there are
+        updated = 1
+        for child in self.children if moved else self._dirty_children:
+            updated += child._update(self._world_matrix, moved)
+            self._store_child_bounds(child)
+        self._dirty_children = set()
+
+        # The bounds of everything under this node, from the bounds each child already has
+        child_bounds = self._child_bounds[:, :, :len(self.children)]
+        mins = child_bounds[0].min(axis=1, initial=np.inf)
+        maxs = child_bounds[1].max(axis=1, initial=-np.inf)
+        if len(self._world_corners):
+            mins = np.minimum(mins, self._world_corners.min(axis=(0, 1)))
+            maxs = np.maximum(maxs, self._world_corners.max(axis=(0, 1)))
+        self._count = len(self._world_corners) + int(self._child_counts[:len(self.children)].sum())
+        # Still infinitely small when there are no cuboids in this node or under it
+        if mins[0] > maxs[0]:
+            self._mins = self._maxs = None
+        else:
+            self._mins, self._maxs = mins, maxs
+
+        self._dirty = self._cuboids_dirty = self._child_dirty = False
+        return updated
+
+    def get_visible_corners(self, frustum: Frustum) -> np.ndarray:
+        """
+Collects the world space corners of every cuboid in this node and under it that could be visible.
+Whole branches outside the frustum are skipped using their bounds, update should be called first.
+        :return: (N, 8, 3) array of corners.
+        """
+        corners = []
+        self._collect_visible(frustum.plane_array, corners, False)
+        if not corners:
+            return np.empty((0, 8, 3), dtype=np.float64)
+        return np.concatenate(corners)
+
+    def _collect_visible(self, planes: np.ndarray, corners: list[np.ndarray], inside: bool):
+        """
+Adds the corners of the visible cuboids in this node and under it to the list.
+        :param planes: The (6, 4) planes of the frustum.
+        :param inside: Whether this whole branch is already known to be inside the frustum.
+        """
+        if self._mins is None:
+            return
+
+        if not inside:
+            # A sphere around the bounds of the branch, if it is completely inside nothing under it needs checking
+            center = (self._mins + self._maxs) / 2
+            radius = np.linalg.norm(self._maxs - center)
+            distances = planes[:, :3] @ center + planes[:, 3]
+            if (distances < -radius).any():
+                return
+            inside = (distances >= radius).all()
+
+        if len(self._world_corners):
+            if inside:
+                corners.append(self._world_corners)
+            else:
+                corners.append(self._world_corners[spheres_are_inside(planes, self._centers, self._radii)])
+        for child in self.children:
+            child._collect_visible(planes, corners, inside)
+    # endregion - Cached geometry
@@ -1,6 +1,8 @@
 import math
 from typing import Union
 
+import numpy as np
+
 
 class ParallelError(Exception):
     pass
@@ -18,22 +20,14 @@ class Vector:
         return f"Vector: {self.x} x, {self.y} y, {self.z} y"
 
     def __mul__(self, constant: float) -> 'Vector':
-        new_vector = Vector.from_instance(self)
-        new_vector.x *= constant
-        new_vector.y *= constant
-        new_vector.z *= constant
-        return new_vector
+        return Vector(self.x * constant, self.y * constant, self.z * constant)
 
     def __truediv__(self, constant: float) -> 'Vector':
-        new_vector = Vector.from_instance(self)
-        new_vector.x /= constant
-        new_vector.y /= constant
-        new_vector.z /= constant
-        return new_vector
+        return Vector(self.x / constant, self.y / constant, self.z / constant)
 
     def __eq__(self, other_vector: 'Vector') -> bool:
         if isinstance(other_vector, Vector):
-            return self.vector == other_vector.vector
+            return self.x == other_vector.x and self.y == other_vector.y and self.z == other_vector.z
         return False
 
     @property
@@ -60,6 +54,22 @@ class Vector:
             iterable[2]
         )
 
+    def imul(self, constant: float):
+        """
+Multiplies the vector by a constant in place, without making a new vector like * does.
+        """
+        self.x *= constant
+        self.y *= constant
+        self.z *= constant
+
+    def iadd(self, other_vector: 'Vector'):
+        """
+Adds another vector to this one in place, without making a new vector.
+        """
+        self.x += other_vector.x
+        self.y += other_vector.y
+        self.z += other_vector.z
+
     def dot(self, other_vector: 'Vector') -> float:
         return self.x * other_vector.x + self.y * other_vector.y + self.z * other_vector.z
 
@@ -116,13 +126,14 @@ class Plane:
     def __init__(self, normal: 'Vector', point: Union[list[float, float, float], tuple[float, float, float]]):
         self.normal: Vector = normal
         self.point = point
-        self.constant: float = -sum([a * b for a, b in zip(normal.vector, point)])
+        self.constant: float = -(normal.x * point[0] + normal.y * point[1] + normal.z * point[2])
 
     def __str__(self):
         return f"Plane: {self.normal.x}x + {self.normal.y}y + {self.normal.z}z = {-self.constant}"
 
     def update_constant(self):
-        self.constant = -sum([a * b for a, b in zip(self.normal.vector, self.point)])
+        normal, point = self.normal, self.point
+        self.constant = -(normal.x * point[0] + normal.y * point[1] + normal.z * point[2])
 
     def change_normal(self, new_normal: Vector):
         self.normal = new_normal
@@ -140,14 +151,27 @@ class Plane:
         self.update_constant()
 
     def get_intersect_with_ray(self, ray: Ray) -> list[float, float, float]:
-        if self.normal.dot(ray.vector) == 0:
+        return self.intersect_into(ray, [0.0, 0.0, 0.0])
+
+    def intersect_into(self, ray: Ray, out: list[float, float, float]) -> list[float, float, float]:
+        """
+Finds where a ray hits the plane, writing the point into out rather than making a new list.
+Reusing the same out for every ray keeps things like picking from making any lists at all.
+        :param out: A list of 3 floats, or anything else that can be set by index, that the point is written into.
+        :return: out
+        """
+        normal, vector, start = self.normal, ray.vector, ray.start
+        denominator = normal.x * vector.x + normal.y * vector.y + normal.z * vector.z
+        if denominator == 0:
             raise ParallelError(f"{self} and {ray} are parallel")
 
-        numerator = self.constant + sum([a * b for a, b in zip(self.normal.vector, ray.start)])
-        denominator = sum([a * b for a, b in zip(self.normal.vector, ray.vector.vector)])
+        numerator = self.constant + (normal.x * start[0] + normal.y * start[1] + normal.z * start[2])
         t = - numerator / denominator
 
-        return [a + b * t for a, b in zip(ray.start, ray.vector.vector)]
+        out[0] = start[0] + vector.x * t
+        out[1] = start[1] + vector.y * t
+        out[2] = start[2] + vector.z * t
+        return out
 
     def get_shortest_distance_to_point(self, point: Union[list[float, float, float], tuple[float, float, float]]):
         numerator = abs(self.normal.x * point[0] + self.normal.y * point[1] + self.normal.z * point[2] + self.constant)
@@ -178,6 +202,226 @@ def get_vector_from_yaw_pitch(yaw: float, pitch: float) -> Vector:
     )
 
 
+def _dot_rows(vectors1: np.ndarray, vectors2: np.ndarray) -> np.ndarray:
+    """
+The dot of each row of one (N, 3) array with the same row of another, either can have one row to use for every row.
+    """
+    return np.einsum("ij,ij->i", *np.broadcast_arrays(vectors1, vectors2))
+
+
+def _as_vector_array(vectors: Union['VectorArray', Vector, np.ndarray]) -> np.ndarray:
+    """
+Turns a VectorArray, a Vector, or anything NumPy can turn into an array, into a (N, 3) array.
+    """
+    if isinstance(vectors, VectorArray):
+        return vectors.vectors
+    if isinstance(vectors, Vector):
+        return np.array([vectors.vector], dtype=np.float64)
+    return np.asarray(vectors, dtype=np.float64).reshape(-1, 3)
+
+
+class VectorArray:
+    """
+Lots of vectors in one (N, 3) array, doing the same things as Vector to every one of them at once.
+Anything given another set of vectors pairs them up row by row, or uses the same one for every row when it only has one.
+    """
+
+    __slots__ = "vectors",
+
+    def __init__(self, vectors: np.ndarray):
+        """
+        :param vectors: An (N, 3) array of the x, y and z of each vector.
+        """
+        self.vectors: np.ndarray = np.array(vectors, dtype=np.float64).reshape(-1, 3)
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def __str__(self):
+        return f"VectorArray: {len(self.vectors)} vectors"
+
+    def __getitem__(self, index: int) -> Vector:
+        return Vector(*self.vectors[index].tolist())
+
+    def __mul__(self, constant: Union[float, np.ndarray]) -> 'VectorArray':
+        return VectorArray(self.vectors * np.reshape(constant, (-1, 1)))
+
+    def __truediv__(self, constant: Union[float, np.ndarray]) -> 'VectorArray':
+        return VectorArray(self.vectors / np.reshape(constant, (-1, 1)))
+
+    @property
+    def x(self) -> np.ndarray:
+        return self.vectors[:, 0]
+
+    @property
+    def y(self) -> np.ndarray:
+        return self.vectors[:, 1]
+
+    @property
+    def z(self) -> np.ndarray:
+        return self.vectors[:, 2]
+
+    @property
+    def magnitude(self) -> np.ndarray:
+        return np.sqrt(_dot_rows(self.vectors, self.vectors))
+
+    @classmethod
+    def from_vectors(cls, vectors: list[Vector]) -> 'VectorArray':
+        return cls([[a.x, a.y, a.z] for a in vectors])
+
+    def dot(self, other_vectors: Union['VectorArray', Vector, np.ndarray]) -> np.ndarray:
+        """
+        :return: An (N,) array of the dot of each pair of vectors.
+        """
+        return _dot_rows(self.vectors, _as_vector_array(other_vectors))
+
+    def cross(self, other_vectors: Union['VectorArray', Vector, np.ndarray]) -> 'VectorArray':
+        return VectorArray(np.cross(self.vectors, _as_vector_array(other_vectors)))
+
+    def normalize(self):
+        """
+Makes every vector a unit vector, vectors with no length are left as they are.
+        """
+        magnitude = self.magnitude[:, None]
+        np.divide(self.vectors, magnitude, out=self.vectors, where=magnitude > 0)
+
+    def get_normalized(self) -> 'VectorArray':
+        normalized = VectorArray(self.vectors)
+        normalized.normalize()
+        return normalized
+
+    def reverse(self):
+        np.negative(self.vectors, out=self.vectors)
+
+    def get_reverse(self) -> 'VectorArray':
+        return VectorArray(-self.vectors)
+
+
+class RayArray:
+    """
+Lots of rays, each one starting at a row of starts and going along the same row of vectors.
+    """
+
+    __slots__ = "vectors", "starts"
+
+    def __init__(self, vectors: Union[VectorArray, np.ndarray], starts: np.ndarray):
+        """
+        :param vectors: The direction of each ray, (N, 3).
+        :param starts: An (N, 3) array of where each ray starts, or (3,) when they all start at the same place.
+        """
+        self.vectors: VectorArray = vectors if isinstance(vectors, VectorArray) else VectorArray(vectors)
+        self.starts: np.ndarray = np.broadcast_to(
+            np.asarray(starts, dtype=np.float64).reshape(-1, 3), self.vectors.vectors.shape
+        )
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __str__(self):
+        return f"RayArray: {len(self.starts)} rays"
+
+    def __getitem__(self, index: int) -> Ray:
+        return Ray(self.vectors[index], self.starts[index].tolist())
+
+    @classmethod
+    def from_rays(cls, rays: list[Ray]) -> 'RayArray':
+        return cls(VectorArray.from_vectors([a.vector for a in rays]), [a.start for a in rays])
+
+    def get_points(self, distances: np.ndarray) -> np.ndarray:
+        """
+        :param distances: How many times along its vector to go along each ray, (N,).
+        :return: An (N, 3) array of the point that far along each ray.
+        """
+        return self.starts + self.vectors.vectors * np.reshape(distances, (-1, 1))
+
+
+class PlaneArray:
+    """
+Lots of planes, each going through a row of points at right angles to the same row of normals.
+    """
+
+    __slots__ = "normals", "points", "constants"
+
+    def __init__(self, normals: Union[VectorArray, np.ndarray], points: np.ndarray):
+        """
+        :param normals: The normal of each plane, (N, 3).
+        :param points: An (N, 3) array of a point on each plane, or (3,) when they all go through the same point.
+        """
+        self.normals: VectorArray = normals if isinstance(normals, VectorArray) else VectorArray(normals)
+        self.points: np.ndarray = None
+        self.constants: np.ndarray = None
+        self.change_points(points)
+
+    def __len__(self):
+        return len(self.constants)
+
+    def __str__(self):
+        return f"PlaneArray: {len(self.constants)} planes"
+
+    def __getitem__(self, index: int) -> Plane:
+        return Plane(self.normals[index], self.points[index].tolist())
+
+    @classmethod
+    def from_planes(cls, planes: list[Plane]) -> 'PlaneArray':
+        return cls(VectorArray.from_vectors([a.normal for a in planes]), [a.point for a in planes])
+
+    def update_constants(self):
+        self.constants = -_dot_rows(self.normals.vectors, self.points)
+
+    def change_points(self, new_points: np.ndarray):
+        self.points = np.broadcast_to(
+            np.asarray(new_points, dtype=np.float64).reshape(-1, 3), self.normals.vectors.shape
+        )
+        self.update_constants()
+
+    def get_ray_distances(self, rays: RayArray) -> np.ndarray:
+        """
+Finds how many times along its vector each ray goes before hitting its plane, pairing planes and rays row by row.
+        :return: An (N,) array of distances, NaN where the ray is parallel to its plane.
+        """
+        numerators = self.constants + _dot_rows(self.normals.vectors, rays.starts)
+        denominators = _dot_rows(self.normals.vectors, rays.vectors.vectors)
+        distances = np.full(np.broadcast(numerators, denominators).shape, np.nan)
+        np.divide(-numerators, denominators, out=distances, where=denominators != 0)
+        return distances
+
+    def get_intersects_with_rays(self, rays: RayArray) -> np.ndarray:
+        """
+Finds where each ray hits its plane, pairing planes and rays row by row.
+Parallel rays don't raise ParallelError like Plane.get_intersect_with_ray, as one shouldn't stop all the others.
+        :return: An (N, 3) array of points, NaN where the ray is parallel to its plane.
+        """
+        return rays.get_points(self.get_ray_distances(rays))
+
+    def get_every_ray_distance(self, rays: RayArray) -> np.ndarray:
+        """
+Finds how many times along its vector every ray goes before hitting every plane.
+        :return: A (P, R) array of distances, row p being the distances to plane p, NaN where a ray is parallel to it.
+        """
+        numerators = self.constants[:, None] + self.normals.vectors @ rays.starts.T
+        denominators = self.normals.vectors @ rays.vectors.vectors.T
+        distances = np.full(numerators.shape, np.nan)
+        np.divide(-numerators, denominators, out=distances, where=denominators != 0)
+        return distances
+
+    def get_intersects_with_every_ray(self, rays: RayArray) -> np.ndarray:
+        """
+Finds where every ray hits every plane.
+        :return: A (P, R, 3) array of points, NaN where a ray is parallel to a plane.
+        """
+        distances = self.get_every_ray_distance(rays)
+        return rays.starts + rays.vectors.vectors * distances[:, :, None]
+
+    def get_shortest_distances_to_points(self, points: np.ndarray) -> np.ndarray:
+        """
+        :param points: An (N, 3) array of points, paired with the planes row by row, or (3,) for one point.
+        :return: An (N,) array of how far each point is from its plane.
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        numerators = np.abs(_dot_rows(self.normals.vectors, points) + self.constants)
+        return numerators / self.normals.magnitude
+
+
 def main():
     tests = {
         "Dot": True,
@@ -185,6 +429,7 @@ def main():
         "Cross Product": True,
         "Ray Intersection With Plane": True,
         "Shortest Distance From Plane To Point": True,
+        "Arrays": True,
     }
 
     detailed_printing = 0
@@ -455,6 +700,41 @@ def main():
             if detailed_printing:
                 input("Press enter to continue")
 
+    if tests["Arrays"]:
+        print("\n", " Arrays ".center(50, '-'))
+
+        print("Test 1")
+        planes = PlaneArray([[0, 0, 1], [2, 1, -4], [4, 5, -2]], [[0, 0, 0], [0, 0, -1], [4, 0, -1]])
+        rays = RayArray([[0, 0, 15], [1, 3, 1], [3, -4, 1]], [[17, 22, -16], [0, 2, 0], [2, 0, 5]])
+        disp(f"Planes = {planes}")
+        disp(f"Rays = {rays}")
+        expected_result = [[17.0, 22.0, 0.0], [2.0, 8.0, 2.0], [-4.0, 8.0, 3.0]]
+        disp(f"Expected result = {expected_result}")
+        result = planes.get_intersects_with_rays(rays).tolist()
+        disp(f"Result          = {result}")
+        pass_fail = "Passed" if result == expected_result else "Failed"
+        print(f"\t{pass_fail}")
+        if pass_fail == "Failed":
+            passed_all = False
+            if detailed_printing:
+                input("Press enter to continue")
+
+        print("Test 2")
+        vectors1 = VectorArray([[1, 0, 0], [10, 5, 2]])
+        vectors2 = VectorArray([[1, 1, 0], [7, 6, 9]])
+        disp(f"Vectors 1 = {vectors1}")
+        disp(f"Vectors 2 = {vectors2}")
+        expected_result = [[0.0, 0.0, 1.0], [33.0, -76.0, 25.0]]
+        disp(f"Expected result = {expected_result}")
+        result = vectors1.cross(vectors2).vectors.tolist()
+        disp(f"Result          = {result}")
+        pass_fail = "Passed" if result == expected_result else "Failed"
+        print(f"\t{pass_fail}")
+        if pass_fail == "Failed":
+            passed_all = False
+            if detailed_printing:
+                input("Press enter to continue")
+
     print("\n")
     print("=" * 50)
     if passed_all:
@@ -0,0 +1,261 @@
+from typing import Optional, Union
+
+import numpy as np
+
+from ThreeDRenderer.CuboidBatch import CuboidBatch
+from ThreeDRenderer.Mesh import Mesh, cuboid_faces
+
+
+def _merge_runs(values: np.ndarray) -> tuple[np.ndarray, ...]:
+    """
+Greedily merges the cells of each slice of a grid into rectangles of the same value.
+Cells with the same value next to each other in a row are joined into runs first, then runs that are exactly the same
+in the rows next to each other are joined into rectangles.
+    :param values: An (S, R, C) array, cells with a value of 0 are empty.
+    :return: The slice, first row, last row + 1, first column, last column + 1 and value of each rectangle.
+    """
+    slices, rows, columns = values.shape
+    padded = np.zeros((slices, rows, columns + 2), dtype=values.dtype)
+    padded[:, :, 1:-1] = values
+
+    # Every place the value changes along a row, a run goes from one change to the next one in the same row
+    s, r, c = np.nonzero(padded[:, :, 1:] != padded[:, :, :-1])
+    same_row = (s[:-1] == s[1:]) & (r[:-1] == r[1:])
+    s, r, starts, ends = s[:-1][same_row], r[:-1][same_row], c[:-1][same_row], c[1:][same_row]
+    run_values = values[s, r, starts]
+    solid = run_values != 0
+    s, r, starts, ends, run_values = s[solid], r[solid], starts[solid], ends[solid], run_values[solid]
+    if not len(s):
+        return s, r, r, starts, ends, run_values
+
+    # Put runs that could be joined next to each other, then a rectangle starts wherever the next run doesn't carry on
+    # the one before it
+    order = np.lexsort((r, run_values, ends, starts, s))
+    s, r, starts, ends, run_values = s[order], r[order], starts[order], ends[order], run_values[order]
+    new = np.ones(len(s), dtype=bool)
+    new[1:] = (
+        (s[1:] != s[:-1]) | (starts[1:] != starts[:-1]) | (ends[1:] != ends[:-1])
+        | (run_values[1:] != run_values[:-1]) | (r[1:] != r[:-1] + 1)
+    )
+    firsts = np.flatnonzero(new)
+    lasts = np.append(firsts[1:], len(s)) - 1
+    return s[firsts], r[firsts], r[lasts] + 1, starts[firsts], ends[firsts], run_values[firsts]
+
+
+class VoxelWorld:
+    """
+A world of blocks on a grid, split into chunks that are each stored as one small array of block values.
+A value of 0 is empty, anything else is a solid block, the values can be used to colour them.
+
+Each chunk is turned into one mesh of only the faces that can be seen, faces between two solid blocks are left out,
+and faces next to each other on the same plane are merged into bigger rectangles.
+Meshes are kept between frames, and only made again for chunks with blocks that changed.
+    """
+
+    __slots__ = "chunk_size", "voxel_size", "dtype", "chunks", "version", "_meshes", "_triangle_values", "_dirty"
+
+    def __init__(self, chunk_size: int = 16, voxel_size: float = 1, dtype: type = np.uint8):
+        """
+        :param chunk_size: How many blocks wide, high and long each chunk is.
+        :param voxel_size: How big each block is.
+        :param dtype: The type of the block values, np.uint8 for up to 255 different blocks, or np.uint16.
+        """
+        self.chunk_size: int = chunk_size
+        self.voxel_size: float = voxel_size
+        self.dtype: type = dtype
+
+        # The values of every block in each chunk, indexed with [x, y, z], by the position of the chunk in chunks
+        self.chunks: dict[tuple[int, int, int], np.ndarray] = {}
+
+        # Goes up every time a block changes
+        self.version: int = 0
+
+        # Each chunk's mesh, None when it has nothing to draw, and the block value of each of its triangles
+        self._meshes: dict[tuple[int, int, int], Optional[Mesh]] = {}
+        self._triangle_values: dict[tuple[int, int, int], np.ndarray] = {}
+
+        # Chunks that have changed since their mesh was made
+        self._dirty: set[tuple[int, int, int]] = set()
+
+    def __len__(self):
+        return sum(int(np.count_nonzero(chunk)) for chunk in self.chunks.values())
+
+    def __str__(self):
+        return f"VoxelWorld: {len(self.chunks)} chunks of {self.chunk_size}x{self.chunk_size}x{self.chunk_size}"
+
+    # region - Blocks
+    def get(self, positions: np.ndarray) -> np.ndarray:
+        """
+Gets the values of the blocks at the given positions, blocks in chunks that don't exist are 0.
+        :param positions: The integer x, y and z of a block, either (3,) or (N, 3).
+        :return: An (N,) array of values.
+        """
+        positions = np.asarray(positions, dtype=np.int64).reshape(-1, 3)
+        keys, local = np.divmod(positions, self.chunk_size)
+        values = np.zeros(len(positions), dtype=self.dtype)
+        for key, indexes in self._group_by_chunk(keys):
+            chunk = self.chunks.get(key)
+            if chunk is not None:
+                values[indexes] = chunk[tuple(local[indexes].T)]
+        return values
+
+    def set(self, positions: np.ndarray, values: Union[int, np.ndarray]):
+        """
+Sets the values of the blocks at the given positions, making chunks as needed.
+        :param positions: The integer x, y and z of a block, either (3,) or (N, 3).
+        :param values: The value of every block, or an (N,) array of the value of each, 0 removes a block.
+        """
+        positions = np.asarray(positions, dtype=np.int64).reshape(-1, 3)
+        values = np.broadcast_to(np.asarray(values, dtype=self.dtype), len(positions))
+        keys, local = np.divmod(positions, self.chunk_size)
+        for key, indexes in self._group_by_chunk(keys):
+            self._get_chunk(key)[tuple(local[indexes].T)] = values[indexes]
+            self._mark_dirty(key, local[indexes].min(axis=0), local[indexes].max(axis=0))
+
+    def fill(self,
+             mins: Union[list[int, int, int], tuple[int, int, int]],
+             maxs: Union[list[int, int, int], tuple[int, int, int]],
+             value: int):
+        """
+Sets every block in a box to the same value, a chunk at a time.
+        :param mins: The smallest x, y and z of the blocks in the box.
+        :param maxs: The largest x, y and z of the blocks in the box, plus one.
+        :param value: The value to set them to, 0 removes them.
+        """
+        mins, maxs = np.asarray(mins, dtype=np.int64), np.asarray(maxs, dtype=np.int64)
+        if (maxs <= mins).any():
+            return
+        first_key, last_key = mins // self.chunk_size, (maxs - 1) // self.chunk_size
+        for key in np.ndindex(*(last_key - first_key + 1)):
+            key = tuple((first_key + key).tolist())
+            origin = np.array(key) * self.chunk_size
+            local_mins = np.maximum(mins - origin, 0)
+            local_maxs = np.minimum(maxs - origin, self.chunk_size)
+            chunk = self._get_chunk(key)
+            chunk[tuple(slice(a, b) for a, b in zip(local_mins.tolist(), local_maxs.tolist()))] = value
+            self._mark_dirty(key, local_mins, local_maxs - 1)
+
+    def _group_by_chunk(self, keys: np.ndarray):
+        """
+Goes through each different chunk position, with the indexes of the rows of keys in that chunk.
+        """
+        unique_keys, inverse = np.unique(keys, axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        order = np.argsort(inverse, kind="stable")
+        splits = np.cumsum(np.bincount(inverse, minlength=len(unique_keys)))[:-1]
+        for key, indexes in zip(unique_keys.tolist(), np.split(order, splits)):
+            yield tuple(key), indexes
+
+    def _get_chunk(self, key: tuple[int, int, int]) -> np.ndarray:
+        """
+Gets the values of a chunk, making it empty first if it doesn't exist yet.
+        """
+        chunk = self.chunks.get(key)
+        if chunk is None:
+            chunk = self.chunks[key] = np.zeros((self.chunk_size,) * 3, dtype=self.dtype)
+        return chunk
+
+    def _mark_dirty(self, key: tuple[int, int, int], local_mins: np.ndarray, local_maxs: np.ndarray):
+        """
+Marks a chunk as changed, and its neighbours when the change touches the side next to them,
+as blocks on the side of a chunk hide faces of the blocks next to them in the neighbour.
+        :param local_mins: The smallest x, y and z of the blocks that changed, in the chunk.
+        :param local_maxs: The largest x, y and z of the blocks that changed, in the chunk.
+        """
+        self.version += 1
+        self._dirty.add(key)
+        for axis in range(3):
+            for side, touching in ((-1, local_mins[axis] == 0), (1, local_maxs[axis] == self.chunk_size - 1)):
+                neighbour = list(key)
+                neighbour[axis] += side
+                if touching and tuple(neighbour) in self.chunks:
+                    self._dirty.add(tuple(neighbour))
+    # endregion - Blocks
+
+    # region - Meshing
+    @property
+    def meshes(self) -> list[Mesh]:
+        """
+The mesh of every chunk with something to draw, as of the last update.
+        """
+        return [mesh_ for mesh_ in self._meshes.values() if mesh_ is not None]
+
+    @property
+    def triangle_values(self) -> list[np.ndarray]:
+        """
+The block value of each triangle of every mesh in meshes, in the same order.
+        """
+        return [self._triangle_values[key] for key, mesh_ in self._meshes.items() if mesh_ is not None]
+
+    def update(self) -> int:
+        """
+Makes the meshes of the chunks that changed since the last update, should be called before rendering.
+        :return: How many chunks were meshed.
+        """
+        dirty, self._dirty = self._dirty, set()
+        for key in dirty:
+            if key not in self.chunks:
+                continue
+            self._meshes[key], self._triangle_values[key] = self._mesh_chunk(key)
+        return len(dirty)
+
+    def _mesh_chunk(self, key: tuple[int, int, int]) -> tuple[Optional[Mesh], np.ndarray]:
+        """
+Makes the mesh of one chunk, with only the faces that can be seen, merged into as few rectangles as it can.
+        :return: The mesh, or None if there is nothing to draw, and the block value of each triangle.
+        """
+        size = self.chunk_size
+        chunk = self.chunks[key]
+
+        # The chunk with the sides of its neighbours around it, so faces on its sides can be checked the same way
+        padded = np.zeros((size + 2,) * 3, dtype=self.dtype)
+        padded[1:-1, 1:-1, 1:-1] = chunk
+        for axis in range(3):
+            for side in (-1, 1):
+                neighbour_key = list(key)
+                neighbour_key[axis] += side
+                neighbour = self.chunks.get(tuple(neighbour_key))
+                if neighbour is None:
+                    continue
+                # The layer of the neighbour touching this chunk, put in the layer of padding on that side
+                target = [slice(1, -1)] * 3
+                target[axis] = 0 if side == -1 else size + 1
+                source = [slice(None)] * 3
+                source[axis] = size - 1 if side == -1 else 0
+                padded[tuple(target)] = neighbour[tuple(source)]
+
+        face_corners = []
+        face_values = []
+        for face, normal in enumerate(CuboidBatch.normals.astype(np.int64).tolist()):
+            # Faces can only be seen when the block in front of them is empty
+            axis = int(np.flatnonzero(normal)[0])
+            in_front = [slice(1, -1)] * 3
+            in_front[axis] = slice(1 + normal[axis], size + 1 + normal[axis])
+            values = np.where(padded[tuple(in_front)] == 0, chunk, 0)
+
+            # Merge the faces in each layer along the normal into rectangles
+            u_axis, v_axis = [a for a in range(3) if a != axis]
+            layers, u_starts, u_ends, v_starts, v_ends, rectangle_values = _merge_runs(np.moveaxis(values, axis, 0))
+            if not len(layers):
+                continue
+
+            # Each rectangle is the face of a box one block thick, so the corners are found the same way as a cuboid's
+            mins = np.empty((len(layers), 3), dtype=np.int64)
+            sizes = np.empty((len(layers), 3), dtype=np.int64)
+            mins[:, axis], mins[:, u_axis], mins[:, v_axis] = layers, u_starts, v_starts
+            sizes[:, axis], sizes[:, u_axis], sizes[:, v_axis] = 1, u_ends - u_starts, v_ends - v_starts
+            face_corners.append(mins[:, None] + CuboidBatch.corner_offsets[cuboid_faces[face]] * sizes[:, None])
+            face_values.append(rectangle_values)
+
+        if not face_corners:
+            return None, np.empty(0, dtype=self.dtype)
+
+        # Rectangles share corners, so each is only one vertex and shared edges are only drawn once
+        corners = np.concatenate(face_corners).reshape(-1, 3).astype(np.int64)
+        vertices, indexes = np.unique(corners, axis=0, return_inverse=True)
+        vertices = (vertices + np.array(key) * size) * self.voxel_size
+        mesh_ = Mesh.from_face_arrays(vertices, indexes.reshape(-1), np.full(len(corners) // 4, 4))
+
+        # Every rectangle is split into two triangles, one after the other
+        return mesh_, np.repeat(np.concatenate(face_values), 2)
+    # endregion - Meshing
@@ -1,3 +1,11 @@
 from ThreeDRenderer.Cuboid import Cuboid
+from ThreeDRenderer.CuboidBatch import CuboidBatch
 from ThreeDRenderer.Camera import Camera
+from ThreeDRenderer.BVH import BVH
+from ThreeDRenderer.CollisionWorld import CollisionWorld
+from ThreeDRenderer.SceneNode import SceneNode
+from ThreeDRenderer.Mesh import Mesh
+from ThreeDRenderer.Instances import InstanceBatch
+from ThreeDRenderer.VoxelWorld import VoxelWorld
+import ThreeDRenderer.ModelFiles
 import ThreeDRenderer.renderer
@@ -1 +1,21 @@
-from ThreeDRenderer.renderer.cuboid import cuboid
+from ThreeDRenderer.renderer.cache import ProjectionCache, get_state
+from ThreeDRenderer.renderer.clipping import clip_edges_to_near_plane, clip_triangles_to_near_plane
+from ThreeDRenderer.renderer.cuboid import cuboid, cuboids, scene
+from ThreeDRenderer.renderer.framebuffer import Framebuffer, draw_lines, draw_points, draw_triangles
+from ThreeDRenderer.renderer.instances import instances
+from ThreeDRenderer.renderer.lines import LineBatch, cull_lines
+from ThreeDRenderer.renderer.lod import LevelOfDetail, get_screen_sizes
+from ThreeDRenderer.renderer.mesh import mesh, meshes
+from ThreeDRenderer.renderer.occlusion import OcclusionCuller, build_depth_pyramid
+from ThreeDRenderer.renderer.parallel import ParallelRenderer
+from ThreeDRenderer.renderer.profiler import FrameProfiler
+from ThreeDRenderer.renderer.projection import (
+    clip_to_screen, get_bounding_spheres, get_corners_array, get_cuboid_edges, get_cuboid_triangles, get_face_planes,
+    get_face_planes_from_corners, get_facing_faces, get_screen_region_planes, project_edges, project_points,
+    project_triangles, to_clip_space
+)
+from ThreeDRenderer.renderer.raster import clip_lines, rasterize_lines, rasterize_triangles
+from ThreeDRenderer.renderer.shading import flat_shade
+from ThreeDRenderer.renderer.stats import FrameStats
+from ThreeDRenderer.renderer.text import HUD, TextCache
+from ThreeDRenderer.renderer.voxels import voxels
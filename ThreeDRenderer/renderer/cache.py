@@ -0,0 +1,228 @@
+from typing import Callable, Optional, Union
+
+import numpy as np
+
+from ThreeDRenderer.Camera import Camera
+from ThreeDRenderer.renderer.framebuffer import Framebuffer, draw_lines, draw_points, draw_triangles
+from ThreeDRenderer.renderer.lines import LineBatch
+from ThreeDRenderer.renderer.stats import FrameStats
+import pygame
+
+
+# The most numbers in an array, or things in a list, tuple or dict, that are compared one at a time
+_SMALL = 16
+
+
+def get_state(value) -> object:
+    """
+Turns something given to a render function into a value that can be compared with ==, and is only equal to the
+last one when nothing that changes the picture has changed, without looking at more than a few numbers.
+Anything with a version, like a Camera, Cuboid, CuboidBatch, Mesh, InstanceBatch, SceneNode or VoxelWorld,
+is only compared by which object it is and its version.
+Small arrays, lists, tuples and dicts, like a colour, are compared by what is in them.
+Anything bigger, or anything else that can't be compared like a LevelOfDetail, is only compared by which object it is,
+so a big array or list that is changed in place has to be given as a new one instead.
+    """
+    if hasattr(value, "version"):
+        return id(value), value.version
+    if isinstance(value, np.ndarray):
+        if value.size > _SMALL:
+            return id(value)
+        return value.shape, value.dtype.str, value.tobytes()
+    if isinstance(value, (list, tuple)) and len(value) <= _SMALL:
+        return tuple(get_state(a) for a in value)
+    if isinstance(value, dict) and len(value) <= _SMALL:
+        return tuple((key, get_state(a)) for key, a in value.items())
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return id(value)
+
+
+class _Recording:
+    """
+Stands in for a surface, keeping everything drawn onto it so it can be drawn again somewhere else.
+    """
+
+    __slots__ = "size", "calls", "_lows", "_highs"
+
+    def __init__(self, size: tuple[int, int]):
+        self.size: tuple[int, int] = size
+
+        # Each draw function and what it was given, in the order they were drawn
+        self.calls: list[tuple[Callable, tuple]] = []
+
+        # The smallest and largest screen coordinates drawn to by each call
+        self._lows: list[np.ndarray] = []
+        self._highs: list[np.ndarray] = []
+
+    def get_size(self) -> tuple[int, int]:
+        return self.size
+
+    def draw_lines(self,
+                   starts: np.ndarray,
+                   ends: np.ndarray,
+                   colour: Union[list[int, int, int], tuple[int, int, int], np.ndarray] = (255, 255, 255)):
+        self._add(draw_lines, (starts, ends, colour), np.concatenate((starts, ends)))
+
+    def draw_points(self,
+                    points: np.ndarray,
+                    colour: Union[list[int, int, int], tuple[int, int, int], np.ndarray] = (255, 255, 255)):
+        self._add(draw_points, (points, colour), points)
+
+    def draw_triangles(self,
+                       points: np.ndarray,
+                       depths: np.ndarray,
+                       colours: Union[list[int, int, int], tuple[int, int, int], np.ndarray] = (255, 255, 255)):
+        self._add(draw_triangles, (points, depths, colours), points)
+
+    def _add(self, function: Callable, arguments: tuple, positions: np.ndarray):
+        """
+Keeps a call, and how far across the screen it reaches.
+        """
+        positions = np.asarray(positions, dtype=np.float64).reshape(-1, 2)
+        if not len(positions):
+            return
+        self.calls.append((function, arguments))
+        self._lows.append(positions.min(axis=0))
+        self._highs.append(positions.max(axis=0))
+
+    def get_bounds(self) -> Optional[pygame.Rect]:
+        """
+The rectangle of the screen everything recorded was drawn inside, None when nothing was.
+        """
+        if not self.calls:
+            return None
+        # Coordinates are truncated when drawn, so a pixel is added on each side for anything rounding outwards
+        left, top = np.clip(np.floor(np.min(self._lows, axis=0)) - 1, 0, self.size).astype(int).tolist()
+        right, bottom = np.clip(np.ceil(np.max(self._highs, axis=0)) + 2, 0, self.size).astype(int).tolist()
+        if right <= left or bottom <= top:
+            return None
+        return pygame.Rect(left, top, right - left, bottom - top)
+
+    def replay(self, surface: Union[pygame.Surface, Framebuffer, LineBatch]):
+        """
+Draws everything recorded onto a surface, in the same order.
+        """
+        for function, arguments in self.calls:
+            function(surface, *arguments)
+
+
+class ProjectionCache:
+    """
+Keeps what each object looked like on the screen the last time it was drawn, so when neither the camera nor the
+object has changed it can be drawn again without projecting anything.
+The camera and the objects count up a version every time they change, so checking is only comparing a few numbers,
+which is why only objects with a version can be drawn through it.
+
+The parts of the screen that changed since the last frame are kept as dirty rectangles,
+to be given to pygame.display.update instead of flipping the whole screen.
+    """
+
+    __slots__ = "projected", "reused", "_entries", "_drawn", "_dirty_rects", "_projected", "_reused"
+
+    def __init__(self):
+        # How many objects had to be projected again, and how many were drawn from the cache, in the last frame
+        self.projected: int = 0
+        self.reused: int = 0
+
+        # The state each object was drawn with, what was drawn, where on the screen, what the render function counted,
+        # and the object and everything else given, by render function and object.
+        # What was given is kept so the ids in the state can't be given to something else
+        self._entries: dict[
+            tuple[Callable, int], tuple[object, _Recording, Optional[pygame.Rect], Optional[FrameStats], tuple]
+        ] = {}
+
+        # What has been drawn this frame, anything not drawn again has gone from the screen
+        self._drawn: set[tuple[Callable, int]] = set()
+        self._dirty_rects: list[pygame.Rect] = []
+        self._projected: int = 0
+        self._reused: int = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __str__(self):
+        return f"ProjectionCache: {self.projected} projected, {self.reused} reused"
+
+    def draw(self,
+             camera: Camera,
+             surface: Union[pygame.Surface, Framebuffer, LineBatch],
+             render: Callable,
+             object_,
+             *args,
+             **kwargs) -> bool:
+        """
+Draws an object with a render function, like renderer.cuboids or renderer.scene, only projecting it again when
+the camera, the object or anything else given has changed since it was last drawn.
+Each object can be drawn once a frame by each render function.
+A stats keyword, a FrameStats, isn't compared, what the render function counted the last time it was called is kept
+and added to it every time the object is drawn, so the counts are the same whether it was projected again or not.
+        :param render: The render function, called as render(camera, surface, object_, *args, **kwargs).
+        :param object_: What is drawn, anything with a version, like a CuboidBatch or a SceneNode.
+        :return: True if the object had to be projected again.
+        """
+        if not hasattr(object_, "version"):
+            raise TypeError(
+                f"object_ must have a version, like a CuboidBatch or SceneNode, not {type(object_).__name__}"
+            )
+        stats = kwargs.pop("stats", None)
+        key = render, id(object_)
+        state = camera.version, id(camera), surface.get_size(), get_state(object_), get_state(args), get_state(kwargs)
+        self._drawn.add(key)
+
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == state:
+            self._reused += 1
+            entry[1].replay(surface)
+            if stats is not None and entry[3] is not None:
+                stats.add(entry[3])
+            return False
+
+        recording = _Recording(surface.get_size())
+        counted = None
+        if stats is not None:
+            counted = kwargs["stats"] = FrameStats()
+        render(camera, recording, object_, *args, **kwargs)
+        kwargs.pop("stats", None)
+        bounds = recording.get_bounds()
+        self._entries[key] = state, recording, bounds, counted, (object_, args, kwargs)
+        self._add_dirty(None if entry is None else entry[2], bounds)
+
+        self._projected += 1
+        recording.replay(surface)
+        if stats is not None:
+            stats.add(counted)
+        return True
+
+    def end_frame(self) -> list[pygame.Rect]:
+        """
+Forgets the objects that weren't drawn this frame, and finishes the frame's counts.
+        :return: The rectangles of the screen that have changed since the last frame, empty when nothing has.
+        """
+        for key in [key for key in self._entries if key not in self._drawn]:
+            self._add_dirty(self._entries.pop(key)[2], None)
+
+        dirty_rects, self._dirty_rects = self._dirty_rects, []
+        self._drawn = set()
+        self.projected, self.reused = self._projected, self._reused
+        self._projected = self._reused = 0
+        return dirty_rects
+
+    def clear(self):
+        """
+Forgets everything drawn, so every object is projected again the next time it is drawn.
+        """
+        for entry in self._entries.values():
+            self._add_dirty(entry[2], None)
+        self._entries = {}
+
+    def _add_dirty(self, old_bounds: Optional[pygame.Rect], new_bounds: Optional[pygame.Rect]):
+        """
+Marks where an object was and where it is now as changed.
+        """
+        if old_bounds is None and new_bounds is None:
+            return
+        if old_bounds is None or new_bounds is None:
+            self._dirty_rects.append((old_bounds or new_bounds).copy())
+        else:
+            self._dirty_rects.append(old_bounds.union(new_bounds))
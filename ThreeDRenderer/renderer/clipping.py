@@ -0,0 +1,91 @@
+import numpy as np
+
+
+def clip_edges_to_near_plane(
+        starts: np.ndarray,
+        ends: np.ndarray,
+        near_distance: float
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+Clips edges in clip space so that no part of them is closer to the camera than the near plane.
+Edges completely behind the near plane are dropped, edges crossing it have the end behind it moved onto it.
+Clip space is linear, so moving along the edge in clip space is the same as moving along it in 3D space.
+    :param starts: An (E, 4) array of the start of each edge in clip space, w is the distance in front of the camera.
+    :param ends: An (E, 4) array of the end of each edge in clip space.
+    :param near_distance: The distance of the near plane from the camera.
+    :return: The starts and ends of the edges that are kept, and an (E,) boolean array of which edges were kept.
+    """
+    start_in_front = starts[:, 3] >= near_distance
+    end_in_front = ends[:, 3] >= near_distance
+
+    # Drop the edges completely behind before doing anything else
+    kept = start_in_front | end_in_front
+    starts, ends = starts[kept], ends[kept]
+    start_in_front, end_in_front = start_in_front[kept], end_in_front[kept]
+
+    # Move the end that is behind onto the near plane
+    crossing = start_in_front != end_in_front
+    if crossing.any():
+        starts = starts.copy()
+        ends = ends.copy()
+        crossing_starts, crossing_ends = starts[crossing], ends[crossing]
+        t = (near_distance - crossing_starts[:, 3]) / (crossing_ends[:, 3] - crossing_starts[:, 3])
+        on_plane = crossing_starts + (crossing_ends - crossing_starts) * t[:, None]
+
+        start_behind = crossing & ~start_in_front
+        end_behind = crossing & ~end_in_front
+        starts[start_behind] = on_plane[~start_in_front[crossing]]
+        ends[end_behind] = on_plane[~end_in_front[crossing]]
+
+    return starts, ends, kept
+
+
+def _point_on_near_plane(a: np.ndarray, b: np.ndarray, near_distance: float) -> np.ndarray:
+    """
+Finds where the lines from a to b cross the near plane, for (T, 4) arrays of clip space points.
+    """
+    t = (near_distance - a[:, 3]) / (b[:, 3] - a[:, 3])
+    return a + (b - a) * t[:, None]
+
+
+def clip_triangles_to_near_plane(triangles: np.ndarray, near_distance: float) -> tuple[np.ndarray, np.ndarray]:
+    """
+Clips triangles in clip space so that no part of them is closer to the camera than the near plane.
+Triangles completely behind the near plane are dropped, triangles with one corner in front are cut down to a smaller
+triangle, and triangles with two corners in front become a quad, made of two triangles.
+The corners of the new triangles go around in the same direction as the originals.
+    :param triangles: A (T, 3, 4) array of the corners of each triangle in clip space.
+    :param near_distance: The distance of the near plane from the camera.
+    :return: A (K, 3, 4) array of the clipped triangles, and a (K,) array of which triangle each came from.
+    """
+    in_front = triangles[:, :, 3] >= near_distance
+    in_front_count = in_front.sum(axis=1)
+    indexes = np.arange(len(triangles))
+
+    whole = in_front_count == 3
+    one = np.flatnonzero(in_front_count == 1)
+    two = np.flatnonzero(in_front_count == 2)
+    if not len(one) and not len(two):
+        return triangles[whole], indexes[whole]
+
+    # Rotate the corners so the odd one out, in front or behind, comes first, this keeps the direction they go around
+    odd_one_out = np.concatenate((np.argmax(in_front[one], axis=1), np.argmin(in_front[two], axis=1)))
+    rotated = np.concatenate((one, two))
+    order = (odd_one_out[:, None] + np.arange(3)) % 3
+    corners = triangles[rotated[:, None], order]
+    a, b, c = corners[:, 0], corners[:, 1], corners[:, 2]
+    ab = _point_on_near_plane(a, b, near_distance)
+    ca = _point_on_near_plane(c, a, near_distance)
+
+    # One in front, the triangle shrinks towards it
+    split = len(one)
+    shrunk = np.stack((a[:split], ab[:split], ca[:split]), axis=1)
+
+    # Two in front, the quad between them and the near plane
+    a, b, c, ab, ca = a[split:], b[split:], c[split:], ab[split:], ca[split:]
+    quads = np.concatenate((np.stack((ab, b, c), axis=1), np.stack((ab, c, ca), axis=1)))
+
+    return (
+        np.concatenate((triangles[whole], shrunk, quads)),
+        np.concatenate((indexes[whole], one, two, two))
+    )
@@ -1,44 +1,269 @@
+from typing import Union
+
+import numpy as np
+
+from ThreeDRenderer.BVH import BVH
 from ThreeDRenderer.Camera import Camera
 from ThreeDRenderer.Cuboid import Cuboid
-from ThreeDRenderer.Vector_Math import Ray, get_vector_from_to
+from ThreeDRenderer.CuboidBatch import CuboidBatch
+from ThreeDRenderer.SceneNode import SceneNode
+from ThreeDRenderer.renderer.framebuffer import Framebuffer, draw_lines, draw_triangles
+from ThreeDRenderer.renderer.lines import LineBatch
+from ThreeDRenderer.renderer.lod import LevelOfDetail
+from ThreeDRenderer.renderer.occlusion import OcclusionCuller
+from ThreeDRenderer.renderer.projection import (
+    get_bounding_spheres, get_corners_array, get_cuboid_edges, get_cuboid_triangles, get_face_planes,
+    get_face_planes_from_corners, get_facing_faces, project_edges, project_points, project_triangles
+)
+from ThreeDRenderer.renderer.shading import flat_shade
+from ThreeDRenderer.renderer.stats import FrameStats
 import pygame
 
 
-def cuboid(camera: Camera, surface: pygame.Surface, cuboid_: Cuboid):
-    # For each corner, get the corresponding position on the camera
-    points_on_view_plane = []
-    for corner in cuboid_.corners:
-        # Get the ray to the corner
-        ray = Ray(get_vector_from_to(camera.position, corner), camera.position)
-        # Position with respect to the camera
-        point = [
-            a - camera.view_plane.point[i] for i, a in enumerate(camera.view_plane.get_intersect_with_ray(ray))
-        ]
-        # Save it
-        points_on_view_plane.append(point)
-
-    # Convert the points from 3D space to 2D space
-    ...
-
-    # Convert the points to what will be drawn on the screen
-    window_x_size, window_y_size = surface.get_size()
-    x_scale = window_x_size / (2 * camera.x_limit)
-    y_scale = window_y_size / (2 * camera.y_limit)
-    draw_points = []
-    for point in points_on_view_plane:
-        draw_points.append(
-            [
-                point[0] * x_scale + window_x_size / 2,
-                point[1] * y_scale + window_y_size / 2
-            ]
-        )
+def _fill_cuboids(
+        camera: Camera,
+        surface: Union[pygame.Surface, Framebuffer, LineBatch],
+        corners: np.ndarray,
+        colours: np.ndarray,
+        facing: np.ndarray = None,
+        normals: np.ndarray = None
+):
+    """
+Draws the faces of cuboids as flat shaded triangles.
+    :param corners: The (N * 8, 3) array of corners made by get_corners_array.
+    :param colours: An (N, 3) array of the colour of each cuboid.
+    :param facing: Optional (N, 6) boolean array of the faces to draw, back faces are skipped before projecting.
+    :param normals: Optional (N, 6, 3) array of the unit normal of each face, for cuboids that have been rotated,
+    if None every cuboid is lined up with the axes.
+    """
+    count = len(corners) // 8
+    triangles = np.arange(count * 12)
+    if facing is not None:
+        triangles = triangles[np.repeat(facing.reshape(-1), 2)]
+
+    points, depths, clipped = project_triangles(
+        camera, corners, get_cuboid_triangles(count)[triangles], surface.get_size()
+    )
+    triangles = triangles[clipped]
+
+    if normals is None:
+        # Every cuboid has the same six normals, so there are only six different amounts of shading
+        shades = flat_shade(CuboidBatch.normals, (255, 255, 255)).astype(np.uint16)
+        faces = (triangles // 2) % 6
+    else:
+        shades = flat_shade(normals.reshape(-1, 3), (255, 255, 255)).astype(np.uint16)
+        faces = triangles // 2
+    triangle_colours = (colours[triangles // 12].astype(np.uint16) * shades[faces] // 255).astype(np.uint8)
+
+    draw_triangles(surface, points, depths, triangle_colours)
+
+
+def cuboid(
+        camera: Camera,
+        surface: Union[pygame.Surface, Framebuffer, LineBatch],
+        cuboid_: Cuboid,
+        filled: bool = False,
+        colour: Union[list[int, int, int], tuple[int, int, int]] = (255, 255, 255),
+        cull_back_faces: bool = True
+):
+    """
+Renders one cuboid.
+    :param filled: If True the faces are drawn as flat shaded, depth tested triangles, otherwise the edges are drawn.
+    :param colour: The colour of the edges, or of the faces before they are shaded.
+    :param cull_back_faces: If True only the faces facing the camera, or their edges, are drawn.
+    """
+    # Don't bother with cuboids that can't be seen
+    if not camera.frustum.cuboid_is_visible(cuboid_):
+        return
+
+    # Faces facing away from the camera are hidden behind the ones facing it
+    facing = None
+    if cull_back_faces:
+        facing = get_facing_faces(get_face_planes([cuboid_]), camera.position)
+
+    if filled:
+        _fill_cuboids(camera, surface, np.array(cuboid_.corners, dtype=np.float64), np.array([colour[:3]]), facing)
+        return
+
+    # Get the position of each connection on the screen, cut short where they go behind the camera
+    edges = cuboid_.corner_connections if facing is None else get_cuboid_edges(1, facing)
+    starts, ends, _ = project_edges(camera, cuboid_.corners, edges, surface.get_size())
 
     # Numbering the corners, for debugging purposes
     # font = pygame.font.Font(None, 32)
-    # for i, point in enumerate(draw_points):
+    # for i, point in enumerate(project_points(camera, cuboid_.corners, surface.get_size()).tolist()):
     #     pygame.draw.circle(surface, (255, 255, 255), point, 5, 1)
     #     surface.blit(font.render(f"{i}", False, (255, 255, 255)), [a + 5 for a in point])
 
     # Draw the connections
-    for i, j, in cuboid_.corner_connections:
-        pygame.draw.line(surface, (255, 255, 255), draw_points[i], draw_points[j], 1)
+    draw_lines(surface, starts, ends, colour)
+
+
+def cuboids(
+        camera: Camera,
+        surface: Union[pygame.Surface, Framebuffer, LineBatch],
+        cuboids_: Union[list[Cuboid], CuboidBatch],
+        bvh: BVH = None,
+        filled: bool = False,
+        colour: Union[list[int, int, int], tuple[int, int, int], np.ndarray] = (255, 255, 255),
+        cull_back_faces: bool = True,
+        visible: np.ndarray = None,
+        lod: LevelOfDetail = None,
+        occlusion: OcclusionCuller = None,
+        stats: FrameStats = None
+):
+    """
+Renders a whole list, or batch, of cuboids at once.
+    :param surface: A pygame surface, a Framebuffer to render without a display, or a LineBatch to draw later.
+    :param bvh: Optional BVH built over cuboids_, used to find the visible cuboids without checking all of them.
+    :param filled: If True the faces are drawn as flat shaded, depth tested triangles, otherwise the edges are drawn.
+    :param colour: The colour of the edges, or of the faces before they are shaded.
+    Filled cuboids can also be given an (N, 3) array of a colour for each cuboid.
+    :param cull_back_faces: If True only the faces facing the camera, or their edges, are drawn.
+    :param visible: Optional (N,) boolean array of the cuboids that could be seen, when they have already been
+    culled some other way. Used instead of the camera's frustum or the BVH.
+    :param lod: Optional LevelOfDetail, cuboids that only cover a few pixels are drawn as outlines or points instead.
+    :param occlusion: Optional OcclusionCuller, filled cuboids hidden behind the nearest big ones are skipped.
+    Wireframes don't hide anything behind them, so it isn't used for them.
+    :param stats: Optional FrameStats to add how many cuboids and faces were submitted, culled and drawn to.
+    """
+    if not len(cuboids_):
+        return
+    stats = FrameStats() if stats is None else stats
+    stats.cuboids_submitted += len(cuboids_)
+
+    # Skip the cuboids that can't be seen before doing any projecting
+    spheres = get_bounding_spheres(cuboids_) if bvh is None or lod is not None else None
+    if visible is not None:
+        visible = np.asarray(visible, dtype=bool)
+    elif bvh is None:
+        visible = camera.frustum.spheres_are_visible(*spheres)
+    else:
+        visible = np.zeros(len(cuboids_), dtype=bool)
+        visible[bvh.query_frustum(camera.frustum)] = True
+    count = int(visible.sum())
+    stats.cuboids_outside_frustum += len(cuboids_) - count
+    if not count:
+        return
+
+    # Cuboids completely behind nearer ones can't be seen either
+    if occlusion is not None and filled:
+        visible = occlusion.get_visible(
+            camera, surface.get_size(), get_corners_array(cuboids_).reshape(-1, 8, 3), visible
+        )
+        stats.cuboids_occluded += count - int(visible.sum())
+        count = int(visible.sum())
+        if not count:
+            return
+
+    # Cuboids too small to be worth projecting every corner of are drawn as something simpler
+    if lod is not None:
+        centers, radii = spheres
+        lod_colour = np.asarray(colour, dtype=np.uint8)
+        lod_colour = lod_colour if lod_colour.ndim == 1 else lod_colour[visible]
+        visible[visible] = lod.apply(camera, surface, centers[visible], radii[visible], lod_colour)
+        stats.cuboids_simplified += count - int(visible.sum())
+        count = int(visible.sum())
+        if not count:
+            return
+
+    corners = get_corners_array(cuboids_, visible)
+
+    # Faces facing away from the camera are hidden behind the ones facing it, for every cuboid at once
+    facing = None
+    if cull_back_faces:
+        facing = get_facing_faces(get_face_planes(cuboids_, visible), camera.position)
+    _count_drawn(stats, count, facing)
+
+    if filled:
+        colours = np.broadcast_to(np.asarray(colour, dtype=np.uint8), (len(cuboids_), 3))
+        _fill_cuboids(camera, surface, corners, colours[visible], facing)
+        return
+
+    _draw_edges(camera, surface, corners, colour, facing)
+
+
+def _count_drawn(stats: FrameStats, count: int, facing: np.ndarray = None):
+    """
+Adds the cuboids that are projected, and their faces, to the stats.
+    :param facing: Optional (N, 6) boolean array of the faces that are drawn, the rest were back face culled.
+    """
+    stats.cuboids_drawn += count
+    stats.faces_submitted += 6 * count
+    if facing is not None:
+        stats.faces_back_facing += 6 * count - int(facing.sum())
+
+
+def _draw_edges(
+        camera: Camera,
+        surface: Union[pygame.Surface, Framebuffer, LineBatch],
+        corners: np.ndarray,
+        colour: Union[list[int, int, int], tuple[int, int, int]],
+        facing: np.ndarray = None
+):
+    """
+Draws the edges of cuboids.
+    :param corners: The (N * 8, 3) array of corners made by get_corners_array.
+    :param facing: Optional (N, 6) boolean array of the faces to draw the edges of.
+    """
+    # Project the connections of every visible cuboid in one go
+    edges = get_cuboid_edges(len(corners) // 8, facing)
+    starts, ends, _ = project_edges(camera, corners, edges, surface.get_size())
+
+    # Draw the connections
+    draw_lines(surface, starts, ends, colour)
+
+
+def scene(
+        camera: Camera,
+        surface: Union[pygame.Surface, Framebuffer, LineBatch],
+        root: SceneNode,
+        filled: bool = False,
+        colour: Union[list[int, int, int], tuple[int, int, int]] = (255, 255, 255),
+        cull_back_faces: bool = True,
+        lod: LevelOfDetail = None,
+        stats: FrameStats = None
+):
+    """
+Renders every cuboid in a scene graph, updating whatever moved since the last frame first.
+Whole branches that can't be seen are skipped using the bounds kept by each node.
+    :param root: The root node of the scene.
+    :param filled: If True the faces are drawn as flat shaded, depth tested triangles, otherwise the edges are drawn.
+    :param colour: The colour of the edges, or of the faces before they are shaded.
+    :param cull_back_faces: If True only the faces facing the camera, or their edges, are drawn.
+    :param lod: Optional LevelOfDetail, cuboids that only cover a few pixels are drawn as outlines or points instead.
+    :param stats: Optional FrameStats to add how many cuboids and faces were submitted, culled and drawn to.
+    """
+    stats = FrameStats() if stats is None else stats
+    root.update()
+    corners = root.get_visible_corners(camera.frustum)
+    stats.cuboids_submitted += root.count
+    stats.cuboids_outside_frustum += root.count - len(corners)
+    if not len(corners):
+        return
+
+    # Cuboids too small to be worth projecting every corner of are drawn as something simpler
+    if lod is not None:
+        centers = corners.mean(axis=1)
+        radii = np.sqrt(((corners - centers[:, None]) ** 2).sum(axis=2).max(axis=1))
+        count = len(corners)
+        corners = corners[lod.apply(camera, surface, centers, radii, colour)]
+        stats.cuboids_simplified += count - len(corners)
+        if not len(corners):
+            return
+
+    # Nodes can be rotated and scaled, so the faces are found from the corners instead of assuming they line up,
+    # both for culling and for shading
+    planes = get_face_planes_from_corners(corners) if cull_back_faces or filled else None
+    facing = None
+    if cull_back_faces:
+        facing = get_facing_faces(planes, camera.position)
+    _count_drawn(stats, len(corners), facing)
+
+    corners = corners.reshape(-1, 3)
+    if filled:
+        colours = np.array([colour[:3]] * (len(corners) // 8), dtype=np.uint8)
+        _fill_cuboids(camera, surface, corners, colours, facing, planes[:, :, :3])
+        return
+
+    _draw_edges(camera, surface, corners, colour, facing)
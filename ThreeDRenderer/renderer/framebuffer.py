@@ -0,0 +1,259 @@
+import struct
+import zlib
+from typing import Union
+
+import numpy as np
+
+from ThreeDRenderer.renderer.raster import rasterize_lines, rasterize_triangles
+import pygame
+
+
+class Framebuffer:
+    """
+A surface made from a NumPy array, that can be rendered to without pygame or a display.
+Has the parts of pygame.Surface the renderer uses, so it can be passed anywhere a surface can.
+Lines drawn on it are exactly the same pixels pygame.draw.line would draw.
+Also has a depth buffer, so filled triangles only cover what is behind them.
+    """
+
+    __slots__ = "pixels", "depth", "size", "region"
+
+    def __init__(self,
+                 size: Union[list[int, int], tuple[int, int]],
+                 pixels: np.ndarray = None,
+                 depth: np.ndarray = None,
+                 region: Union[list[int, int, int, int], tuple[int, int, int, int]] = None):
+        """
+        :param size: The width and height in pixels.
+        :param pixels: Optional (height, width, 3) uint8 array to draw into, so other arrays can be drawn into directly.
+        :param depth: Optional contiguous (height, width) float32 array to use as the depth buffer.
+        :param region: Optional left, top, width and height of the only part of the frame this holds, for rendering
+        a frame in tiles. Everything is still projected for the whole frame, so the pixels are the same either way.
+        pixels and depth are then only the size of the region.
+        """
+        self.size: tuple[int, int] = tuple(size)
+        self.region: tuple[int, int, int, int] = (0, 0, *self.size) if region is None else tuple(region)
+
+        width, height = self.region[2:]
+        if pixels is None:
+            pixels = np.zeros((height, width, 3), dtype=np.uint8)
+        elif pixels.shape != (height, width, 3) or pixels.dtype != np.uint8:
+            raise ValueError(f"pixels must be a ({height}, {width}, 3) uint8 array, not {pixels.shape} {pixels.dtype}")
+        if depth is None:
+            depth = np.full((height, width), np.inf, dtype=np.float32)
+        elif depth.shape != (height, width) or depth.dtype != np.float32 or not depth.flags.c_contiguous:
+            raise ValueError(f"depth must be a contiguous ({height}, {width}) float32 array")
+
+        # Indexed with [y, x], the same as an image
+        self.pixels: np.ndarray = pixels
+
+        # The depth of whatever was drawn at each pixel, from 0 at the near plane to 1 at the far plane
+        self.depth: np.ndarray = depth
+
+    def __str__(self):
+        if self.region[2:] != self.size:
+            return f"Framebuffer: {self.region[2]}x{self.region[3]} at {self.region[:2]} of {self.size[0]}x{self.size[1]}"
+        return f"Framebuffer: {self.get_width()}x{self.get_height()}"
+
+    def get_size(self) -> tuple[int, int]:
+        return self.size
+
+    def get_width(self) -> int:
+        return self.size[0]
+
+    def get_height(self) -> int:
+        return self.size[1]
+
+    def fill(self, colour: Union[list[int, int, int], tuple[int, int, int]]):
+        self.pixels[:] = colour[:3]
+
+    def clear(self, colour: Union[list[int, int, int], tuple[int, int, int]] = (0, 0, 0)):
+        """
+Fills the pixels with a colour and empties the depth buffer, ready for the next frame.
+        """
+        self.pixels[:] = colour[:3]
+        self.depth.fill(np.inf)
+
+    def draw_lines(self,
+                   starts: np.ndarray,
+                   ends: np.ndarray,
+                   colour: Union[list[int, int, int], tuple[int, int, int], np.ndarray] = (255, 255, 255)):
+        """
+Draws 1 pixel wide lines, all at once.
+        :param starts: An (E, 2) array of the start of each line, in screen coordinates.
+        :param ends: An (E, 2) array of the end of each line, in screen coordinates.
+        :param colour: One colour for every line, or an (E, 3) array of a colour for each line.
+        """
+        colour = np.asarray(colour, dtype=np.uint8)
+        left, top, width, height = self.region
+
+        if self.region[2:] != self.size:
+            # Lines nowhere near the region are skipped, with a margin for the rounding done when they are clipped
+            starts = np.asarray(starts, dtype=np.float64).reshape(-1, 2)
+            ends = np.asarray(ends, dtype=np.float64).reshape(-1, 2)
+            lows, highs = np.minimum(starts, ends), np.maximum(starts, ends)
+            near = (
+                (highs[:, 0] >= left - 2) & (lows[:, 0] < left + width + 2)
+                & (highs[:, 1] >= top - 2) & (lows[:, 1] < top + height + 2)
+            )
+            starts, ends = starts[near], ends[near]
+            if colour.ndim != 1:
+                colour = colour[near]
+
+        # The lines are clipped to the whole frame, the same as drawing all of it, then cut down to the region
+        xs, ys, lines = rasterize_lines(starts, ends, self.size)
+        inside = (xs >= left) & (xs < left + width) & (ys >= top) & (ys < top + height)
+        xs, ys, lines = xs[inside] - left, ys[inside] - top, lines[inside]
+
+        # Later lines are drawn over earlier ones, the same as drawing them one at a time
+        self.pixels[ys, xs] = colour if colour.ndim == 1 else colour[lines]
+
+    def draw_triangles(self,
+                       points: np.ndarray,
+                       depths: np.ndarray,
+                       colours: Union[list[int, int, int], tuple[int, int, int], np.ndarray] = (255, 255, 255)):
+        """
+Draws filled triangles, all at once, only where they are nearer than what has already been drawn.
+        :param points: A (T, 3, 2) array of the corners of each triangle, in screen coordinates.
+        :param depths: A (T, 3) array of the depth at each corner, from 0 at the near plane to 1 at the far plane.
+        :param colours: One colour for every triangle, or a (T, 3) array of a colour for each triangle.
+        """
+        colours = np.asarray(colours, dtype=np.uint8)
+        left, top, width = self.region[:3]
+        depth = self.depth.reshape(-1)
+
+        for xs, ys, pixel_depths, triangles in rasterize_triangles(points, depths, self.size, self.region):
+            xs, ys = xs - left, ys - top
+            indexes = ys * width + xs
+            pixel_depths = pixel_depths.astype(np.float32)
+
+            # Keep the nearest depth at each pixel, then only draw the pixels that are the nearest
+            np.minimum.at(depth, indexes, pixel_depths)
+            nearest = pixel_depths <= depth[indexes]
+            self.pixels[ys[nearest], xs[nearest]] = colours if colours.ndim == 1 else colours[triangles[nearest]]
+
+    def to_surface(self) -> pygame.Surface:
+        """
+Copies the pixels into a new pygame surface.
+        """
+        return pygame.surfarray.make_surface(self.pixels.swapaxes(0, 1))
+
+    def save_png(self, path: str, compression: int = 1):
+        """
+Saves the pixels as an RGB PNG file, without needing pygame or anything else.
+        :param path: Where to save the file.
+        :param compression: The zlib compression level, 0 to 9. Low is faster, wireframes compress well anyway.
+        """
+        height, width = self.pixels.shape[:2]
+
+        # Every row starts with a filter type, 0 meaning no filter
+        rows = np.zeros((height, width * 3 + 1), dtype=np.uint8)
+        rows[:, 1:] = self.pixels.reshape(height, -1)
+
+        def chunk(kind: bytes, data: bytes) -> bytes:
+            return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+        with open(path, "wb") as file:
+            file.write(b"\x89PNG\r\n\x1a\n")
+            file.write(chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)))
+            file.write(chunk(b"IDAT", zlib.compress(rows.tobytes(), compression)))
+            file.write(chunk(b"IEND", b""))
+
+    def save_raw(self, path: str):
+        """
+Saves the pixels as raw RGB bytes, row by row from the top, the fastest way of dumping lots of frames.
+Can be read back with numpy.fromfile(path, numpy.uint8).reshape(height, width, 3).
+        :param path: Where to save the file.
+        """
+        self.pixels.tofile(path)
+
+
+def draw_lines(surface: Union[pygame.Surface, Framebuffer],
+               starts: np.ndarray,
+               ends: np.ndarray,
+               colour: Union[list[int, int, int], tuple[int, int, int], np.ndarray] = (255, 255, 255)):
+    """
+Draws 1 pixel wide lines onto either a pygame surface or a Framebuffer, both give the same pixels.
+Anything with its own draw_lines method, like a Framebuffer or a LineBatch, is given all the lines at once.
+A pygame surface has every line rasterized at once, then written into its pixels in one go.
+    :param surface: Where to draw the lines.
+    :param starts: An (E, 2) array of the start of each line, in screen coordinates.
+    :param ends: An (E, 2) array of the end of each line, in screen coordinates.
+    :param colour: One colour for every line, or an (E, 3) array of a colour for each line.
+    """
+    if hasattr(surface, "draw_lines"):
+        surface.draw_lines(starts, ends, colour)
+        return
+
+    colour = np.asarray(colour, dtype=np.uint8)
+
+    # pygame only draws inside the clip area, which the rasterizer doesn't know about
+    if surface.get_clip() != surface.get_rect():
+        colours = np.broadcast_to(colour, (len(starts), 3)).tolist()
+        for start, end, line_colour in zip(np.asarray(starts).tolist(), np.asarray(ends).tolist(), colours):
+            pygame.draw.line(surface, line_colour, start, end, 1)
+        return
+
+    xs, ys, lines = rasterize_lines(starts, ends, surface.get_size())
+    if not len(xs):
+        return
+
+    # surfarray is indexed with [x, y], 24 bit surfaces can only be accessed as colours,
+    # everything else as the mapped colour values pygame would have used
+    if surface.get_bytesize() == 3:
+        pixels = pygame.surfarray.pixels3d(surface)
+        pixels[xs, ys] = colour if colour.ndim == 1 else colour[lines]
+    else:
+        pixels = pygame.surfarray.pixels2d(surface)
+        if colour.ndim == 1:
+            pixels[xs, ys] = surface.map_rgb(colour.tolist())
+        else:
+            unique, inverse = np.unique(colour, axis=0, return_inverse=True)
+            mapped = np.array([surface.map_rgb(a) for a in unique.tolist()], dtype=pixels.dtype)
+            pixels[xs, ys] = mapped[inverse.reshape(-1)[lines]]
+    # The surface stays locked until the pixel array is gone
+    del pixels
+
+
+def draw_points(surface: Union[pygame.Surface, Framebuffer],
+                points: np.ndarray,
+                colour: Union[list[int, int, int], tuple[int, int, int], np.ndarray] = (255, 255, 255)):
+    """
+Draws single pixels onto either a pygame surface or a Framebuffer, as lines that start and end at the same place.
+Anything with its own draw_points method, like a LineBatch, is given all the points at once.
+    :param surface: Where to draw the points.
+    :param points: An (N, 2) array of the position of each point, in screen coordinates.
+    :param colour: One colour for every point, or an (N, 3) array of a colour for each point.
+    """
+    if hasattr(surface, "draw_points"):
+        surface.draw_points(points, colour)
+        return
+    draw_lines(surface, points, points, colour)
+
+
+def draw_triangles(surface: Union[pygame.Surface, Framebuffer],
+                   points: np.ndarray,
+                   depths: np.ndarray,
+                   colours: Union[list[int, int, int], tuple[int, int, int], np.ndarray] = (255, 255, 255)):
+    """
+Draws filled, depth tested triangles onto either a pygame surface or a Framebuffer.
+A pygame surface has no depth buffer of its own, so the triangles are only tested against each other.
+    :param surface: Where to draw the triangles.
+    :param points: A (T, 3, 2) array of the corners of each triangle, in screen coordinates.
+    :param depths: A (T, 3) array of the depth at each corner, from 0 at the near plane to 1 at the far plane.
+    :param colours: One colour for every triangle, or a (T, 3) array of a colour for each triangle.
+    """
+    if hasattr(surface, "draw_triangles"):
+        surface.draw_triangles(points, depths, colours)
+        return
+
+    # 24 and 32 bit surfaces can be drawn into directly, anything else is drawn into a copy that is copied back
+    if surface.get_bytesize() in (3, 4):
+        pixels = pygame.surfarray.pixels3d(surface)
+        Framebuffer(surface.get_size(), pixels.swapaxes(0, 1)).draw_triangles(points, depths, colours)
+        # The surface stays locked until the pixel array is gone
+        del pixels
+    else:
+        framebuffer = Framebuffer(surface.get_size(), pygame.surfarray.array3d(surface).swapaxes(0, 1).copy())
+        framebuffer.draw_triangles(points, depths, colours)
+        pygame.surfarray.blit_array(surface, framebuffer.pixels.swapaxes(0, 1))
@@ -0,0 +1,80 @@
+from typing import Union
+
+import numpy as np
+
+from ThreeDRenderer.Camera import Camera
+from ThreeDRenderer.Instances import InstanceBatch
+from ThreeDRenderer.renderer.framebuffer import Framebuffer, draw_lines, draw_triangles
+from ThreeDRenderer.renderer.lines import LineBatch
+from ThreeDRenderer.renderer.lod import LevelOfDetail
+from ThreeDRenderer.renderer.projection import project_edges, project_triangles
+from ThreeDRenderer.renderer.shading import flat_shade
+import pygame
+
+
+def instances(
+        camera: Camera,
+        surface: Union[pygame.Surface, Framebuffer, LineBatch],
+        instances_: InstanceBatch,
+        filled: bool = False,
+        colour: Union[list[int, int, int], tuple[int, int, int], np.ndarray] = (255, 255, 255),
+        cull_back_faces: bool = True,
+        lod: LevelOfDetail = None
+):
+    """
+Renders every instance in a batch at once, transforming and projecting all of them together.
+    :param filled: If True the triangles are drawn flat shaded and depth tested, otherwise the edges are drawn.
+    :param colour: The colour of the edges, or of the triangles before they are shaded.
+    Filled instances can also be given an (N, 3) array of a colour for each instance.
+    :param cull_back_faces: If True only the triangles facing the camera, or their edges, are drawn.
+    :param lod: Optional LevelOfDetail, instances that only cover a few pixels are drawn as outlines or points instead.
+    """
+    if not len(instances_):
+        return
+
+    # Skip the instances that can't be seen, using the template's sphere moved and scaled to each one
+    visible = np.flatnonzero(camera.frustum.spheres_are_visible(instances_.center, instances_.radius))
+    if not len(visible):
+        return
+
+    # Instances too small to be worth transforming every vertex of are drawn as something simpler
+    if lod is not None:
+        lod_colour = np.asarray(colour, dtype=np.uint8)
+        lod_colour = lod_colour if lod_colour.ndim == 1 else lod_colour[visible]
+        centers, radii = instances_.center[visible], instances_.radius[visible]
+        visible = visible[lod.apply(camera, surface, centers, radii, lod_colour)]
+        if not len(visible):
+            return
+
+    template = instances_.template
+    vertex_count = len(template.vertices)
+    vertices = instances_.get_vertices(visible).reshape(-1, 3)
+
+    # Each instance sees the camera from a different place, so the template's triangles are checked against the
+    # camera's position in the template's space, for every instance at once
+    facing = None
+    if cull_back_faces:
+        facing = template.get_facing_triangles(instances_.get_local_positions(camera.position, visible))
+
+    if filled:
+        if facing is None:
+            instance_indexes, triangle_indexes = np.divmod(np.arange(len(visible) * len(template)), len(template))
+        else:
+            instance_indexes, triangle_indexes = np.nonzero(facing)
+        triangles = template.triangles[triangle_indexes] + (instance_indexes * vertex_count)[:, None]
+        points, depths, sources = project_triangles(camera, vertices, triangles, surface.get_size())
+
+        # Only the normals of the triangles that made it through clipping are needed
+        instance_indexes, triangle_indexes = instance_indexes[sources], triangle_indexes[sources]
+        normals = instances_.get_normals(visible)[instance_indexes, triangle_indexes]
+        colours = np.broadcast_to(np.asarray(colour, dtype=np.uint8), (len(instances_), 3))[visible]
+        draw_triangles(surface, points, depths, flat_shade(normals, colours[instance_indexes]))
+        return
+
+    if facing is None:
+        edges = (template.edges + (np.arange(len(visible)) * vertex_count)[:, None, None]).reshape(-1, 2)
+    else:
+        instance_indexes, edge_indexes = np.nonzero(template.get_facing_edges(facing))
+        edges = template.edges[edge_indexes] + (instance_indexes * vertex_count)[:, None]
+    starts, ends, _ = project_edges(camera, vertices, edges, surface.get_size())
+    draw_lines(surface, starts, ends, colour)
@@ -0,0 +1,175 @@
+from time import perf_counter
+from typing import Union
+
+import numpy as np
+
+from ThreeDRenderer.renderer.framebuffer import Framebuffer, draw_lines, draw_triangles
+from ThreeDRenderer.renderer.stats import FrameStats
+import pygame
+
+
+def cull_lines(
+        starts: np.ndarray,
+        ends: np.ndarray,
+        size: Union[list[int, int], tuple[int, int]],
+        min_length: float = 1.0
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+Finds the lines that are worth drawing.
+    :param starts: An (E, 2) array of the start of each line, in screen coordinates.
+    :param ends: An (E, 2) array of the end of each line, in screen coordinates.
+    :param size: The width and height of the screen.
+    :param min_length: Lines shorter than this many pixels along both axes are dropped, 0 keeps them all.
+    :return: An (E,) boolean array of lines that are on the screen, and one of lines that are long enough.
+    """
+    # A line is off the screen when both ends are past the same edge, coordinates are truncated when drawn
+    # so anything above -1 still lands on the first row or column
+    starts, ends = np.trunc(starts), np.trunc(ends)
+    width, height = size
+    on_screen = ~(
+        ((starts[:, 0] < 0) & (ends[:, 0] < 0))
+        | ((starts[:, 0] >= width) & (ends[:, 0] >= width))
+        | ((starts[:, 1] < 0) & (ends[:, 1] < 0))
+        | ((starts[:, 1] >= height) & (ends[:, 1] >= height))
+    )
+
+    if min_length <= 0:
+        return on_screen, np.ones(len(starts), dtype=bool)
+    long_enough = np.abs(ends - starts).max(axis=1, initial=0) >= min_length
+    return on_screen, long_enough
+
+
+class LineBatch:
+    """
+Collects all the lines of a frame, then draws them all with one call.
+Can be passed to the renderer anywhere a surface can, nothing is drawn until submit is called.
+    """
+
+    __slots__ = (
+        "surface", "min_length", "stats", "_starts", "_ends", "_colours", "_points", "_point_colours", "_triangles"
+    )
+
+    def __init__(self, surface: Union[pygame.Surface, Framebuffer], min_length: float = 1.0):
+        """
+        :param surface: Where the lines are drawn when they are submitted.
+        :param min_length: Lines shorter than this many pixels are dropped, 0 draws everything.
+        """
+        self.surface: Union[pygame.Surface, Framebuffer] = surface
+        self.min_length: float = min_length
+
+        # What happened the last time the lines were submitted
+        self.stats: FrameStats = FrameStats()
+
+        self._starts: list[np.ndarray] = []
+        self._ends: list[np.ndarray] = []
+        self._colours: list[np.ndarray] = []
+
+        # Points are kept apart from the lines, they would all be dropped for being too short
+        self._points: list[np.ndarray] = []
+        self._point_colours: list[np.ndarray] = []
+
+        # Each call's triangles are kept apart, as they are only depth tested against each other on a pygame surface
+        self._triangles: list[tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+
+    def __len__(self):
+        return sum(len(starts) for starts in self._starts) + sum(len(points) for points in self._points)
+
+    def __str__(self):
+        return f"LineBatch: {len(self)} lines waiting"
+
+    def get_size(self) -> tuple[int, int]:
+        return self.surface.get_size()
+
+    def draw_lines(self,
+                   starts: np.ndarray,
+                   ends: np.ndarray,
+                   colour: Union[list[int, int, int], tuple[int, int, int], np.ndarray] = (255, 255, 255)):
+        """
+Adds lines to be drawn when the batch is submitted.
+        :param starts: An (E, 2) array of the start of each line, in screen coordinates.
+        :param ends: An (E, 2) array of the end of each line, in screen coordinates.
+        :param colour: One colour for every line, or an (E, 3) array of a colour for each line.
+        """
+        starts = np.asarray(starts, dtype=np.float64).reshape(-1, 2)
+        if not len(starts):
+            return
+        self._starts.append(starts)
+        self._ends.append(np.asarray(ends, dtype=np.float64).reshape(-1, 2))
+        self._colours.append(np.broadcast_to(np.asarray(colour, dtype=np.uint8), (len(starts), 3)))
+
+    def draw_points(self,
+                    points: np.ndarray,
+                    colour: Union[list[int, int, int], tuple[int, int, int], np.ndarray] = (255, 255, 255)):
+        """
+Adds single pixels to be drawn along with the lines when the batch is submitted.
+        :param points: An (N, 2) array of the position of each point, in screen coordinates.
+        :param colour: One colour for every point, or an (N, 3) array of a colour for each point.
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        if not len(points):
+            return
+        self._points.append(points)
+        self._point_colours.append(np.broadcast_to(np.asarray(colour, dtype=np.uint8), (len(points), 3)))
+
+    def draw_triangles(self,
+                       points: np.ndarray,
+                       depths: np.ndarray,
+                       colours: Union[list[int, int, int], tuple[int, int, int], np.ndarray] = (255, 255, 255)):
+        """
+Adds triangles to be drawn when the batch is submitted, before any of the lines so the lines go over them.
+        """
+        if len(points):
+            self._triangles.append((points, depths, colours))
+
+    def discard(self):
+        """
+Empties the batch without drawing anything, for when everything in it is already on the screen.
+        """
+        self._starts, self._ends, self._colours, self._points, self._point_colours = [], [], [], [], []
+        self._triangles = []
+
+    def submit(self) -> FrameStats:
+        """
+Draws every triangle, then culls and draws every line added since the last submit, then empties the batch.
+        :return: The stats of what was drawn, also saved as stats.
+        """
+        start_time = perf_counter()
+        self.stats.reset()
+
+        for points, depths, colours in self._triangles:
+            draw_triangles(self.surface, points, depths, colours)
+        self._triangles = []
+
+        if self._starts or self._points:
+            starts = np.concatenate(self._starts or [np.empty((0, 2))])
+            ends = np.concatenate(self._ends or [np.empty((0, 2))])
+            colours = np.concatenate(self._colours or [np.empty((0, 3), dtype=np.uint8)])
+            points = np.concatenate(self._points or [np.empty((0, 2))])
+            point_colours = np.concatenate(self._point_colours or [np.empty((0, 3), dtype=np.uint8)])
+            self._starts, self._ends, self._colours, self._points, self._point_colours = [], [], [], [], []
+
+            on_screen, long_enough = cull_lines(starts, ends, self.surface.get_size(), self.min_length)
+            kept = on_screen & long_enough
+            self.stats.lines_submitted = len(starts)
+            self.stats.lines_off_screen = int((~on_screen).sum())
+            self.stats.lines_too_short = int((on_screen & ~long_enough).sum())
+            self.stats.lines_drawn = int(kept.sum())
+
+            # Points only need to be on the screen
+            points_kept, _ = cull_lines(points, points, self.surface.get_size(), 0)
+            self.stats.points_drawn = int(points_kept.sum())
+
+            if self.stats.lines_drawn or self.stats.points_drawn:
+                # The points are drawn as lines that start and end at the same place, in the same call as the lines
+                starts = np.concatenate((starts[kept], points[points_kept]))
+                ends = np.concatenate((ends[kept], points[points_kept]))
+                colours = np.concatenate((colours[kept], point_colours[points_kept]))
+
+                # Most frames only use one colour, which is cheaper to draw with
+                if (colours == colours[0]).all():
+                    colours = colours[0]
+                draw_lines(self.surface, starts, ends, colours)
+                self.stats.draw_calls = 1
+
+        self.stats.draw_time = perf_counter() - start_time
+        return self.stats
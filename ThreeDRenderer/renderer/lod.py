@@ -0,0 +1,113 @@
+from typing import Union
+
+import numpy as np
+
+from ThreeDRenderer.Camera import Camera
+from ThreeDRenderer.renderer.framebuffer import Framebuffer, draw_lines, draw_points
+from ThreeDRenderer.renderer.lines import LineBatch
+from ThreeDRenderer.renderer.projection import clip_to_screen, to_clip_space
+import pygame
+
+
+def get_screen_sizes(
+        camera: Camera,
+        centers: np.ndarray,
+        radii: np.ndarray,
+        window_size: Union[list[int, int], tuple[int, int]]
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+Works out how big spheres look on the screen, only projecting their centers.
+The view plane is 10 away and x_limit wide each side of the middle, so something of radius r at a distance d is
+r / d * 10 / x_limit of half the screen wide.
+    :param centers: An (N, 3) array of sphere centers.
+    :param radii: An (N,) array of sphere radii.
+    :param window_size: The size of the surface the spheres will be drawn to.
+    :return: The (N, 2) screen coordinates of each center, and the (N,) width in pixels of each sphere on the screen.
+    Spheres reaching past the near plane are given a width of infinity, as they could cover the whole screen.
+    """
+    clip_points = to_clip_space(camera, centers)
+    depths = clip_points[:, 3]
+    near = depths - radii <= camera.near_distance
+
+    positions = np.zeros((len(depths), 2), dtype=np.float64)
+    positions[~near] = clip_to_screen(clip_points[~near], window_size)
+    sizes = np.full(len(depths), np.inf)
+    sizes[~near] = radii[~near] / depths[~near] * 10 / camera.x_limit * window_size[0]
+    return positions, sizes
+
+
+class LevelOfDetail:
+    """
+Decides how much detail each object is drawn with, from how big it looks on the screen.
+Objects that only cover a few pixels are drawn as the outline of the square around them,
+ones smaller than a pixel as one pixel, and ones smaller still not at all.
+So lots of far away objects cost about as much as the pixels they cover.
+    """
+
+    __slots__ = "skip_size", "point_size", "outline_size", "full", "outlines", "points", "skipped"
+
+    def __init__(self, skip_size: float = 0.25, point_size: float = 1, outline_size: float = 6):
+        """
+        :param skip_size: Objects less than this many pixels wide aren't drawn, 0 draws everything.
+        :param point_size: Objects less than this many pixels wide are drawn as a single pixel.
+        :param outline_size: Objects less than this many pixels wide are drawn as a square outline, 0 never does.
+        """
+        self.skip_size: float = skip_size
+        self.point_size: float = point_size
+        self.outline_size: float = outline_size
+
+        # How many objects were given each level of detail the last time it was used
+        self.full: int = 0
+        self.outlines: int = 0
+        self.points: int = 0
+        self.skipped: int = 0
+
+    def __str__(self):
+        return (
+            f"LevelOfDetail: {self.full} full, {self.outlines} outlines, {self.points} points, {self.skipped} skipped"
+        )
+
+    def apply(
+            self,
+            camera: Camera,
+            surface: Union[pygame.Surface, Framebuffer, LineBatch],
+            centers: np.ndarray,
+            radii: np.ndarray,
+            colour: Union[list[int, int, int], tuple[int, int, int], np.ndarray] = (255, 255, 255)
+    ) -> np.ndarray:
+        """
+Draws the objects that are too small to be worth drawing properly as points and outlines, and skips the smallest.
+        :param centers: An (N, 3) array of the center of the sphere around each object.
+        :param radii: An (N,) array of the radius of the sphere around each object.
+        :param colour: One colour for every object, or an (N, 3) array of a colour for each object.
+        :return: An (N,) boolean array of the objects that still need drawing properly.
+        """
+        positions, sizes = get_screen_sizes(camera, centers, radii, surface.get_size())
+        colour = np.asarray(colour, dtype=np.uint8)
+
+        full = sizes >= self.outline_size
+        outlines = ~full & (sizes >= self.point_size)
+        points = (sizes < self.point_size) & (sizes >= self.skip_size)
+
+        self.full = int(full.sum())
+        self.outlines = int(outlines.sum())
+        self.points = int(points.sum())
+        self.skipped = len(sizes) - self.full - self.outlines - self.points
+
+        if self.points:
+            draw_points(surface, positions[points], colour if colour.ndim == 1 else colour[points])
+
+        if self.outlines:
+            # The four sides of the square around each sphere
+            half = sizes[outlines, None] / 2
+            lows, highs = positions[outlines] - half, positions[outlines] + half
+            corners = np.stack(
+                (lows, np.stack((highs[:, 0], lows[:, 1]), axis=1), highs, np.stack((lows[:, 0], highs[:, 1]), axis=1)),
+                axis=1
+            )
+            draw_lines(
+                surface, corners.reshape(-1, 2), np.roll(corners, -1, axis=1).reshape(-1, 2),
+                colour if colour.ndim == 1 else np.repeat(colour[outlines], 4, axis=0)
+            )
+
+        return full
@@ -0,0 +1,87 @@
+from typing import Union
+
+import numpy as np
+
+from ThreeDRenderer.Camera import Camera
+from ThreeDRenderer.Mesh import Mesh
+from ThreeDRenderer.renderer.framebuffer import Framebuffer, draw_lines, draw_triangles
+from ThreeDRenderer.renderer.lines import LineBatch
+from ThreeDRenderer.renderer.projection import project_edges, project_triangles
+from ThreeDRenderer.renderer.shading import flat_shade
+import pygame
+
+
+def mesh(
+        camera: Camera,
+        surface: Union[pygame.Surface, Framebuffer, LineBatch],
+        mesh_: Mesh,
+        filled: bool = False,
+        colour: Union[list[int, int, int], tuple[int, int, int]] = (255, 255, 255),
+        cull_back_faces: bool = True
+):
+    """
+Renders one mesh.
+    :param filled: If True the triangles are drawn flat shaded and depth tested, otherwise the edges are drawn.
+    :param colour: The colour of the edges, or of the triangles before they are shaded.
+    :param cull_back_faces: If True only the triangles facing the camera, or their edges, are drawn.
+    """
+    meshes(camera, surface, [mesh_], filled, colour, cull_back_faces)
+
+
+def meshes(
+        camera: Camera,
+        surface: Union[pygame.Surface, Framebuffer, LineBatch],
+        meshes_: list[Mesh],
+        filled: bool = False,
+        colour: Union[list[int, int, int], tuple[int, int, int], np.ndarray] = (255, 255, 255),
+        cull_back_faces: bool = True,
+        triangle_colours: list[np.ndarray] = None
+):
+    """
+Renders a list of meshes at once, their vertices are put together so there is one projection and one draw.
+    :param filled: If True the triangles are drawn flat shaded and depth tested, otherwise the edges are drawn.
+    :param colour: The colour of the edges, or of the triangles before they are shaded.
+    Filled meshes can also be given an (N, 3) array of a colour for each mesh.
+    :param cull_back_faces: If True only the triangles facing the camera, or their edges, are drawn.
+    :param triangle_colours: Optional (T, 3) array of the colour of each triangle of each mesh, used instead of colour
+    for filled meshes.
+    """
+    # Don't bother with meshes that can't be seen
+    colours = np.broadcast_to(np.asarray(colour, dtype=np.uint8), (len(meshes_), 3))
+    visible = [i for i, mesh_ in enumerate(meshes_) if camera.frustum.sphere_is_visible(mesh_.center, mesh_.radius)]
+    if not visible:
+        return
+
+    vertices = []
+    triangles = []
+    normals = []
+    edges = []
+    kept_colours = []
+    offset = 0
+    for i in visible:
+        mesh_ = meshes_[i]
+        # Triangles facing away from the camera are hidden behind the ones facing it
+        facing = mesh_.get_facing_triangles(camera.position) if cull_back_faces else None
+
+        vertices.append(mesh_.vertices)
+        if filled:
+            kept = mesh_.triangles if facing is None else mesh_.triangles[facing]
+            triangles.append(kept + offset)
+            normals.append(mesh_.normals if facing is None else mesh_.normals[facing])
+            if triangle_colours is None:
+                kept_colours.append(np.broadcast_to(colours[i], (len(kept), 3)))
+            else:
+                kept_colours.append(triangle_colours[i] if facing is None else triangle_colours[i][facing])
+        else:
+            edges.append((mesh_.edges if facing is None else mesh_.edges[mesh_.get_facing_edges(facing)]) + offset)
+        offset += len(mesh_.vertices)
+    vertices = np.concatenate(vertices)
+
+    if filled:
+        points, depths, sources = project_triangles(camera, vertices, np.concatenate(triangles), surface.get_size())
+        shaded = flat_shade(np.concatenate(normals), np.concatenate(kept_colours))
+        draw_triangles(surface, points, depths, shaded[sources])
+        return
+
+    starts, ends, _ = project_edges(camera, vertices, np.concatenate(edges), surface.get_size())
+    draw_lines(surface, starts, ends, colour)
@@ -0,0 +1,244 @@
+from math import acos
+from typing import Union
+
+import numpy as np
+
+from ThreeDRenderer.Camera import Camera
+from ThreeDRenderer.renderer.framebuffer import Framebuffer
+from ThreeDRenderer.renderer.projection import (
+    clip_to_screen, get_cuboid_triangles, get_face_planes_from_corners, get_facing_faces, project_triangles,
+    to_clip_space
+)
+
+
+def build_depth_pyramid(depth: np.ndarray) -> list[np.ndarray]:
+    """
+Makes each level of a depth pyramid, every texel holding the furthest depth of the 2x2 texels under it.
+Goes on until the level is 1x1, so something of any size can be checked against a few texels of some level.
+    :param depth: The (height, width) depth buffer, the first level.
+    :return: Every level, starting with the depth buffer.
+    """
+    levels = [depth]
+    while levels[-1].shape != (1, 1):
+        level = levels[-1]
+        height, width = level.shape
+        # Odd sizes are padded with something nearer than anything, so the padding never counts
+        padded = np.full((height + height % 2, width + width % 2), -np.inf, dtype=level.dtype)
+        padded[:height, :width] = level
+        levels.append(padded.reshape(padded.shape[0] // 2, 2, padded.shape[1] // 2, 2).max(axis=(1, 3)))
+    return levels
+
+
+class OcclusionCuller:
+    """
+Finds cuboids that are completely hidden behind nearer ones, so they don't need projecting or drawing.
+The nearest big cuboids are drawn into a small depth buffer, which is made into a depth pyramid,
+then everything else is checked against the few texels of the pyramid that cover it on the screen.
+
+Camera positions near the last one see almost the same thing, so the last results can be reused until the camera
+has moved or turned far enough, or for a number of frames.
+    """
+
+    __slots__ = (
+        "scale", "occluder_count", "min_occluder_size", "reuse_frames", "reuse_distance", "reuse_angle",
+        "pyramid", "occluders", "tested", "occluded", "reused", "_hidden", "_camera_state", "_frames_reused"
+    )
+
+    def __init__(self,
+                 scale: int = 4,
+                 occluder_count: int = 32,
+                 min_occluder_size: float = 32,
+                 reuse_frames: int = 0,
+                 reuse_distance: float = 0.5,
+                 reuse_angle: float = 0.02):
+        """
+        :param scale: How many times smaller the depth buffer is than the screen.
+        :param occluder_count: The most cuboids drawn into the depth buffer.
+        :param min_occluder_size: How many pixels wide a cuboid has to look to be drawn into the depth buffer.
+        :param reuse_frames: How many frames in a row the last results can be used again, 0 never does.
+        :param reuse_distance: How far the camera can move before the results can't be used again.
+        :param reuse_angle: How far in radians the camera can turn before the results can't be used again.
+        """
+        self.scale: int = scale
+        self.occluder_count: int = occluder_count
+        self.min_occluder_size: float = min_occluder_size
+        self.reuse_frames: int = reuse_frames
+        self.reuse_distance: float = reuse_distance
+        self.reuse_angle: float = reuse_angle
+
+        # The depth pyramid from the last time it was made
+        self.pyramid: list[np.ndarray] = []
+
+        # What happened the last time it was used
+        self.occluders: int = 0
+        self.tested: int = 0
+        self.occluded: int = 0
+        self.reused: bool = False
+
+        # Which cuboids were hidden last time, and where the camera was
+        self._hidden: np.ndarray = None
+        self._camera_state: tuple = None
+        self._frames_reused: int = 0
+
+    def __str__(self):
+        return (
+            f"OcclusionCuller: {self.occluded}/{self.tested} occluded by {self.occluders} occluders"
+            f"{', reused' if self.reused else ''}"
+        )
+
+    def invalidate(self):
+        """
+Stops the last results from being used again, should be called when the cuboids move.
+        """
+        self._hidden = None
+
+    def get_visible(self,
+                    camera: Camera,
+                    window_size: Union[list[int, int], tuple[int, int]],
+                    corners: np.ndarray,
+                    visible: np.ndarray = None) -> np.ndarray:
+        """
+Finds which cuboids aren't hidden behind the nearest big ones.
+        :param window_size: The size of the surface the cuboids will be drawn to.
+        :param corners: An (N, 8, 3) array of the corners of each cuboid, in the same order as Cuboid.corners.
+        :param visible: Optional (N,) boolean array of the cuboids that could be seen, like ones inside the frustum,
+        the rest aren't checked or used as occluders.
+        :return: An (N,) boolean array, False where the cuboid is definitely hidden.
+        """
+        corners = np.asarray(corners, dtype=np.float64).reshape(-1, 8, 3)
+        visible = np.ones(len(corners), dtype=bool) if visible is None else np.asarray(visible, dtype=bool)
+
+        camera_state = (
+            tuple(camera.position), tuple(camera.looking_vector.vector), camera.x_limit, tuple(window_size)
+        )
+        if self._can_reuse(camera_state, len(corners)):
+            self._frames_reused += 1
+            self.reused = True
+            return visible & ~self._hidden
+        self._camera_state = camera_state
+        self._frames_reused = 0
+        self.reused = False
+
+        candidates = np.flatnonzero(visible)
+        clip_points = to_clip_space(camera, corners[candidates].reshape(-1, 3)).reshape(-1, 8, 4)
+
+        # Anything reaching past the near plane can't be projected, so it can't be checked
+        in_front = (clip_points[:, :, 3] > camera.near_distance).all(axis=1)
+        screen = np.zeros((len(candidates), 8, 2), dtype=np.float64)
+        screen[in_front] = clip_to_screen(clip_points[in_front].reshape(-1, 4), window_size).reshape(-1, 8, 2)
+        lows, highs = screen.min(axis=1), screen.max(axis=1)
+        nearest = np.full(len(candidates), -np.inf)
+        nearest[in_front] = (clip_points[in_front, :, 2] / clip_points[in_front, :, 3]).min(axis=1)
+
+        # The nearest of the cuboids that look big enough, anything crossing the near plane could cover the screen
+        sizes = np.where(in_front, (highs - lows).max(axis=1), np.inf)
+        big = np.flatnonzero(sizes >= self.min_occluder_size)
+        distances = np.linalg.norm(corners[candidates[big]].mean(axis=1) - camera.position, axis=1)
+        occluders = big[np.argsort(distances, kind="stable")[:self.occluder_count]]
+        self._build_pyramid(camera, window_size, corners[candidates[occluders]])
+
+        # The occluders can't hide themselves
+        tested = in_front.copy()
+        tested[occluders] = False
+        hidden = np.zeros(len(corners), dtype=bool)
+        hidden[candidates[tested]] = self._is_hidden(
+            lows[tested] / self.scale, highs[tested] / self.scale, nearest[tested]
+        )
+
+        self.occluders = len(occluders)
+        self.tested = int(tested.sum())
+        self.occluded = int(hidden.sum())
+        self._hidden = hidden
+        return visible & ~hidden
+
+    def _can_reuse(self, camera_state: tuple, count: int) -> bool:
+        """
+Checks if the camera is close enough to where it was when the results were last found to use them again.
+        """
+        if self._hidden is None or len(self._hidden) != count or self._frames_reused >= self.reuse_frames:
+            return False
+        (position, looking, x_limit, window_size), (old_position, old_looking, old_x_limit, old_window_size) = (
+            camera_state, self._camera_state
+        )
+        if x_limit != old_x_limit or window_size != old_window_size:
+            return False
+        moved = sum((a - b) ** 2 for a, b in zip(position, old_position)) ** 0.5
+        turned = acos(max(-1.0, min(1.0, sum(a * b for a, b in zip(looking, old_looking)))))
+        return moved <= self.reuse_distance and turned <= self.reuse_angle
+
+    def _build_pyramid(self,
+                       camera: Camera,
+                       window_size: Union[list[int, int], tuple[int, int]],
+                       corners: np.ndarray):
+        """
+Draws the faces of the occluders facing the camera into a small depth buffer, and makes the pyramid from it.
+        :param corners: An (M, 8, 3) array of the corners of the occluders.
+        """
+        # Rounded up, so the texels reach every pixel of the screen
+        width, height = max(1, -(-window_size[0] // self.scale)), max(1, -(-window_size[1] // self.scale))
+        depth = np.full((height, width), np.inf, dtype=np.float32)
+
+        if len(corners):
+            facing = get_facing_faces(get_face_planes_from_corners(corners), camera.position)
+            kept = np.flatnonzero(np.repeat(facing.reshape(-1), 2))
+            # Projected straight to the small size, so the corners land in the same place as they do on the screen
+            points, depths, sources = project_triangles(
+                camera, corners.reshape(-1, 3), get_cuboid_triangles(len(corners))[kept], window_size
+            )
+            # Moved a texel in, so the occluders are also drawn into a ring of texels around the screen
+            points = points / self.scale + 1
+            owners = kept[sources] // 12
+            order = np.argsort(owners, kind="stable")
+            splits = np.flatnonzero(np.diff(owners[order])) + 1
+
+            # Each texel only has the depth of the middle of it, so an occluder only counts at a texel when it covers
+            # the middle of it and of all 8 around it, then it is convex so it covers the whole texel,
+            # and the furthest of the 9 depths is never nearer than it is anywhere in the texel.
+            # Each occluder is drawn on its own, so gaps between occluders thinner than a texel can't be missed,
+            # but one occluder in front of another doesn't stop the one behind from counting.
+            for triangles in np.split(order, splits) if len(order) else []:
+                lows = np.floor(points[triangles].reshape(-1, 2).min(axis=0)).astype(int) - 1
+                highs = np.ceil(points[triangles].reshape(-1, 2).max(axis=0)).astype(int) + 2
+                left, top = np.maximum(lows, 0).tolist()
+                right, bottom = np.minimum(highs, (width + 2, height + 2)).tolist()
+                if right - left < 3 or bottom - top < 3:
+                    continue
+                occluder = Framebuffer((width + 2, height + 2), region=(left, top, right - left, bottom - top))
+                occluder.draw_triangles(points[triangles], depths[triangles])
+
+                # Only the texels with all 8 around them drawn, which are a texel further up and left on the screen
+                furthest = np.max([
+                    occluder.depth[y:y + bottom - top - 2, x:x + right - left - 2] for y in range(3) for x in range(3)
+                ], axis=0)
+                covered = depth[top:bottom - 2, left:right - 2]
+                np.minimum(covered, furthest, out=covered)
+
+        self.pyramid = build_depth_pyramid(depth)
+
+    def _is_hidden(self, lows: np.ndarray, highs: np.ndarray, nearest: np.ndarray) -> np.ndarray:
+        """
+Checks rectangles against the depth pyramid, using the level where each one covers at most 2x2 texels.
+        :param lows: An (N, 2) array of the top left corner of each rectangle, in texels of the first level.
+        :param highs: An (N, 2) array of the bottom right corner of each rectangle.
+        :param nearest: An (N,) array of the nearest depth of anything in each rectangle.
+        :return: An (N,) boolean array, True where everything under the rectangle is nearer than it.
+        """
+        height, width = self.pyramid[0].shape
+        lows = np.clip(np.floor(lows), 0, (width - 1, height - 1)).astype(np.int64)
+        highs = np.clip(np.floor(highs), 0, (width - 1, height - 1)).astype(np.int64)
+
+        # At level L texels are 2^L wide, so a rectangle less than 2^L wide covers 2 of them at most
+        spans = (highs - lows).max(axis=1, initial=0)
+        levels = np.minimum(np.ceil(np.log2(spans + 1)).astype(np.int64), len(self.pyramid) - 1)
+
+        furthest = np.full(len(nearest), np.inf)
+        for level in np.unique(levels).tolist():
+            at_level = np.flatnonzero(levels == level)
+            low, high = lows[at_level] >> level, highs[at_level] >> level
+            texels = self.pyramid[level]
+            # The four texels in the corners of the rectangle, which are the same texel when it only covers one
+            furthest[at_level] = np.maximum.reduce([
+                texels[low[:, 1], low[:, 0]], texels[low[:, 1], high[:, 0]],
+                texels[high[:, 1], low[:, 0]], texels[high[:, 1], high[:, 0]]
+            ])
+        return nearest > furthest
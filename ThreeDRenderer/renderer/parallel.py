@@ -0,0 +1,240 @@
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from time import perf_counter
+from typing import Union
+
+import numpy as np
+
+from ThreeDRenderer.Camera import Camera
+from ThreeDRenderer.Cuboid import Cuboid
+from ThreeDRenderer.CuboidBatch import CuboidBatch
+from ThreeDRenderer.Frustum import spheres_are_inside
+from ThreeDRenderer.renderer.cuboid import cuboids
+from ThreeDRenderer.renderer.framebuffer import Framebuffer
+from ThreeDRenderer.renderer.projection import get_screen_region_planes
+
+
+# What each worker process has attached to, kept between tasks so the scene is only read when it changes
+_worker_memory: dict[str, shared_memory.SharedMemory] = {}
+_worker_scene: dict[str, object] = {"key": None, "cuboids": None, "colours": None}
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """
+Attaches a worker to a block of shared memory, once.
+    """
+    if name not in _worker_memory:
+        _worker_memory[name] = shared_memory.SharedMemory(name=name)
+    return _worker_memory[name]
+
+
+def _render_tile(
+        frame_name: str,
+        size: tuple[int, int],
+        region: tuple[int, int, int, int],
+        scene_name: str,
+        colours_name: str,
+        count: int,
+        version: int,
+        camera_data: bytes,
+        options: dict
+) -> float:
+    """
+Renders one tile of a frame in a worker process, straight into the shared frame.
+    :return: How many seconds it took.
+    """
+    start_time = perf_counter()
+
+    # Only rebuild the cuboids when they have been changed
+    key = scene_name, version
+    if _worker_scene["key"] != key:
+        dimensions = np.ndarray((count, 6), dtype=np.float64, buffer=_attach(scene_name).buf)
+        _worker_scene["cuboids"] = CuboidBatch.from_arrays(*dimensions.T)
+        _worker_scene["colours"] = np.ndarray((count, 3), dtype=np.uint8, buffer=_attach(colours_name).buf)
+        _worker_scene["key"] = key
+    cuboids_ = _worker_scene["cuboids"]
+
+    camera = pickle.loads(camera_data)
+    left, top, width, height = region
+    frame = np.ndarray((size[1], size[0], 3), dtype=np.uint8, buffer=_attach(frame_name).buf)
+    tile = Framebuffer(size, frame[top:top + height, left:left + width], region=region)
+    tile.clear(options["background"])
+
+    # Only the cuboids that can be seen through this tile, with a small margin for lines rounding outwards
+    planes = get_screen_region_planes(camera, (left - 2, top - 2, width + 4, height + 4), size)
+    visible = spheres_are_inside(planes, cuboids_.center, cuboids_.radius)
+    if visible.any():
+        colour = options["colour"]
+        if colour is None:
+            colour = _worker_scene["colours"] if options["filled"] else (255, 255, 255)
+        cuboids(
+            camera, tile, cuboids_,
+            filled=options["filled"],
+            colour=colour,
+            cull_back_faces=options["cull_back_faces"],
+            visible=visible
+        )
+
+    return perf_counter() - start_time
+
+
+class ParallelRenderer:
+    """
+Renders frames of cuboids across a pool of worker processes.
+The frame is split into tiles, each worker renders whole tiles straight into a frame in shared memory,
+so putting the tiles back together is free. Every tile is projected for the whole frame, so the frame is the same as
+rendering it in one go.
+The cuboids are copied into shared memory once, and again only when update_cuboids is called,
+so each frame the only thing sent to the workers is the camera.
+    """
+
+    __slots__ = (
+        "size", "tile_size", "workers", "tiles", "framebuffer", "tile_times",
+        "_pool", "_frame_memory", "_scene_memory", "_colours_memory", "_cuboids", "_count", "_version"
+    )
+
+    def __init__(self,
+                 size: Union[list[int, int], tuple[int, int]],
+                 cuboids_: Union[list[Cuboid], CuboidBatch],
+                 colours: np.ndarray = None,
+                 workers: int = None,
+                 tile_size: Union[list[int, int], tuple[int, int]] = (256, 256)):
+        """
+        :param size: The width and height of the frames.
+        :param cuboids_: The cuboids to render, a list of cuboids or a CuboidBatch.
+        :param colours: Optional (N, 3) array of the colour of each cuboid, used when they are filled.
+        :param workers: How many worker processes to use, if None then one for each CPU.
+        :param tile_size: The width and height of the tiles, more tiles than workers keeps every worker busy.
+        """
+        self.size: tuple[int, int] = tuple(size)
+        self.tile_size: tuple[int, int] = tuple(tile_size)
+        self.workers: int = workers or os.cpu_count() or 1
+
+        # The left, top, width and height of each tile
+        self.tiles: list[tuple[int, int, int, int]] = [
+            (left, top, min(self.tile_size[0], self.size[0] - left), min(self.tile_size[1], self.size[1] - top))
+            for top in range(0, self.size[1], self.tile_size[1])
+            for left in range(0, self.size[0], self.tile_size[0])
+        ]
+
+        # The frame the workers render into, shared with them
+        self._frame_memory = shared_memory.SharedMemory(create=True, size=self.size[0] * self.size[1] * 3)
+        self.framebuffer: Framebuffer = Framebuffer(
+            self.size, np.ndarray((self.size[1], self.size[0], 3), dtype=np.uint8, buffer=self._frame_memory.buf)
+        )
+
+        # How long each tile took to render in the last frame
+        self.tile_times: list[float] = []
+
+        self._scene_memory: shared_memory.SharedMemory = None
+        self._colours_memory: shared_memory.SharedMemory = None
+        self._cuboids: Union[list[Cuboid], CuboidBatch] = None
+        self._count: int = 0
+        self._version: int = 0
+        self.set_cuboids(cuboids_, colours)
+
+        self._pool: ProcessPoolExecutor = ProcessPoolExecutor(max_workers=self.workers)
+
+    def __str__(self):
+        return f"ParallelRenderer: {self.size[0]}x{self.size[1]}, {len(self.tiles)} tiles, {self.workers} workers"
+
+    def __enter__(self) -> 'ParallelRenderer':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def set_cuboids(self, cuboids_: Union[list[Cuboid], CuboidBatch], colours: np.ndarray = None):
+        """
+Changes which cuboids are rendered, copying them into shared memory.
+        :param cuboids_: The cuboids to render, a list of cuboids or a CuboidBatch.
+        :param colours: Optional (N, 3) array of the colour of each cuboid, used when they are filled.
+        """
+        count = len(cuboids_)
+        if self._scene_memory is None or count != self._count:
+            self._release(self._scene_memory, self._colours_memory)
+            # Shared memory can't be empty
+            self._scene_memory = shared_memory.SharedMemory(create=True, size=max(count * 6 * 8, 1))
+            self._colours_memory = shared_memory.SharedMemory(create=True, size=max(count * 3, 1))
+
+        self._cuboids = cuboids_
+        self._count = count
+        colour_array = np.ndarray((count, 3), dtype=np.uint8, buffer=self._colours_memory.buf)
+        colour_array[:] = (255, 255, 255) if colours is None else colours
+        self.update_cuboids()
+
+    def update_cuboids(self):
+        """
+Copies the cuboids into shared memory again, after they have been moved.
+        """
+        dimensions = np.ndarray((self._count, 6), dtype=np.float64, buffer=self._scene_memory.buf)
+        if isinstance(self._cuboids, CuboidBatch):
+            dimensions[:] = self._cuboids.dimensions
+        else:
+            dimensions[:] = np.array(
+                [[a.x, a.y, a.z, a.width, a.height, a.length] for a in self._cuboids], dtype=np.float64
+            ).reshape(-1, 6)
+        self._version += 1
+
+    def render(self,
+               camera: Camera,
+               filled: bool = False,
+               colour: Union[list[int, int, int], tuple[int, int, int]] = None,
+               background: Union[list[int, int, int], tuple[int, int, int]] = (0, 0, 0),
+               cull_back_faces: bool = True) -> Framebuffer:
+        """
+Renders a frame, the same as renderer.cuboids would.
+        :param camera: The camera to render from, the size of its window should be the size of the frames.
+        :param filled: If True the faces are drawn as flat shaded, depth tested triangles, otherwise the edges are drawn.
+        :param colour: The colour of every cuboid, if None then white edges, or the colours given with the cuboids.
+        :param background: The colour of everything else.
+        :param cull_back_faces: If True only the faces facing the camera, or their edges, are drawn.
+        :return: The frame, a Framebuffer in shared memory, it is drawn over by the next frame.
+        """
+        camera_data = pickle.dumps(camera)
+        options = {
+            "filled": filled,
+            "colour": None if colour is None else tuple(colour[:3]),
+            "background": tuple(background[:3]),
+            "cull_back_faces": cull_back_faces,
+        }
+
+        futures = [
+            self._pool.submit(
+                _render_tile,
+                self._frame_memory.name, self.size, region,
+                self._scene_memory.name, self._colours_memory.name, self._count, self._version,
+                camera_data, options
+            )
+            for region in self.tiles
+        ]
+        self.tile_times = [future.result() for future in futures]
+        return self.framebuffer
+
+    def close(self):
+        """
+Stops the workers and frees the shared memory, the renderer can't be used afterwards.
+        """
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        self.framebuffer = None
+        self._release(self._frame_memory, self._scene_memory, self._colours_memory)
+        self._frame_memory = self._scene_memory = self._colours_memory = None
+
+    @staticmethod
+    def _release(*memories: shared_memory.SharedMemory):
+        """
+Closes and removes blocks of shared memory.
+        """
+        for memory in memories:
+            if memory is None:
+                continue
+            try:
+                memory.close()
+            except BufferError:
+                # Something still has an array using it, it is closed when that array is gone
+                pass
+            memory.unlink()
@@ -0,0 +1,226 @@
+import csv
+import json
+from collections import deque
+from contextlib import nullcontext
+from time import perf_counter
+from typing import Union
+
+import numpy as np
+import pygame
+
+from ThreeDRenderer.renderer.stats import FrameStats
+
+
+# Given out by every scope while profiling is off, so timing something costs almost nothing
+_disabled_scope = nullcontext()
+
+
+class _Scope:
+    """
+Times one named stage of a frame, adding to its total for the frame, so a stage can be timed more than once a frame.
+    """
+
+    __slots__ = "profiler", "name", "start"
+
+    def __init__(self, profiler: 'FrameProfiler', name: str):
+        self.profiler: FrameProfiler = profiler
+        self.name: str = name
+        self.start: float = 0.0
+
+    def __enter__(self):
+        self.start = perf_counter()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        timings = self.profiler._timings
+        timings[self.name] = timings.get(self.name, 0.0) + perf_counter() - self.start
+
+
+class FrameProfiler:
+    """
+Times each stage of every frame and keeps the last few hundred frames, for showing on screen or saving to a file.
+Each stage is timed by putting it in a "with profiler.scope(name)" block, and end_frame is called once a frame.
+While it isn't enabled, scopes do nothing and end_frame only notes the time.
+    """
+
+    __slots__ = "enabled", "history", "frames", "_scopes", "_timings", "_counts", "_last_frame", "_frame_number"
+
+    def __init__(self, enabled: bool = True, history: int = 300):
+        """
+        :param enabled: Whether to start profiling straight away.
+        :param history: How many frames are kept for the stats and the saved files.
+        """
+        self.enabled: bool = enabled
+        self.history: int = history
+
+        # The timings, in seconds, and counts of each frame, oldest first
+        self.frames: deque[dict] = deque(maxlen=history)
+
+        self._scopes: dict[str, _Scope] = {}
+        self._timings: dict[str, float] = {}
+        self._counts: dict[str, int] = {}
+        self._last_frame: float = perf_counter()
+        self._frame_number: int = 0
+
+    def __str__(self):
+        return f"FrameProfiler: {len(self.frames)}/{self.history} frames, {'enabled' if self.enabled else 'disabled'}"
+
+    def scope(self, name: str) -> Union[_Scope, nullcontext]:
+        """
+Times everything inside a with block as part of a stage of the frame.
+        :param name: The name of the stage, like "projection".
+        """
+        if not self.enabled:
+            return _disabled_scope
+        scope = self._scopes.get(name)
+        if scope is None:
+            scope = self._scopes[name] = _Scope(self, name)
+        return scope
+
+    def count(self, name: str, amount: int = 1):
+        """
+Adds to a count for this frame, like how many lines were drawn.
+        """
+        if self.enabled:
+            self._counts[name] = self._counts.get(name, 0) + amount
+
+    def add_stats(self, stats: FrameStats):
+        """
+Counts what the renderer drew and culled this frame, from the FrameStats of a LineBatch,
+or one given to renderer.cuboids or renderer.scene.
+        """
+        if not self.enabled:
+            return
+        self.count("draw_calls", stats.draw_calls)
+        self.count("lines_submitted", stats.lines_submitted)
+        self.count("lines_culled", stats.lines_off_screen + stats.lines_too_short)
+        self.count("lines_drawn", stats.lines_drawn)
+        self.count("points_drawn", stats.points_drawn)
+        self.count("cuboids_submitted", stats.cuboids_submitted)
+        self.count("cuboids_frustum_culled", stats.cuboids_outside_frustum)
+        self.count("cuboids_occluded", stats.cuboids_occluded)
+        self.count("cuboids_lod", stats.cuboids_simplified)
+        self.count("cuboids_drawn", stats.cuboids_drawn)
+        self.count("faces_submitted", stats.faces_submitted)
+        self.count("faces_back_face_culled", stats.faces_back_facing)
+        self.count("faces_drawn", stats.faces_submitted - stats.faces_back_facing)
+
+    def end_frame(self):
+        """
+Finishes the frame, the frame's time is everything since the last frame ended.
+        """
+        now = perf_counter()
+        if self.enabled:
+            self._frame_number += 1
+            self.frames.append({
+                "frame_number": self._frame_number,
+                "frame": now - self._last_frame,
+                "timings": self._timings,
+                "counts": self._counts,
+            })
+            self._timings = {}
+            self._counts = {}
+        self._last_frame = now
+
+    def clear(self):
+        """
+Forgets every frame so far.
+        """
+        self.frames.clear()
+        self._timings = {}
+        self._counts = {}
+        self._last_frame = perf_counter()
+
+    def get_names(self) -> tuple[list[str], list[str]]:
+        """
+        :return: The names of every stage and every count in the kept frames, in the order they were first seen.
+        """
+        stages = {}
+        counts = {}
+        for frame in self.frames:
+            stages.update(dict.fromkeys(frame["timings"]))
+            counts.update(dict.fromkeys(frame["counts"]))
+        return list(stages), list(counts)
+
+    def get_stats(self) -> dict[str, dict[str, float]]:
+        """
+The mean, p95 and max of the frame time, each stage and each count over the kept frames.
+Stages and counts missing from a frame count as 0 for it.
+        :return: A dictionary of "frame", each stage and each count, to a dictionary of "mean", "p95" and "max".
+        """
+        if not self.frames:
+            return {}
+        stages, counts = self.get_names()
+        columns = {"frame": [frame["frame"] for frame in self.frames]}
+        for name in stages:
+            columns[name] = [frame["timings"].get(name, 0.0) for frame in self.frames]
+        for name in counts:
+            columns[name] = [frame["counts"].get(name, 0) for frame in self.frames]
+
+        stats = {}
+        for name, values in columns.items():
+            values = np.array(values, dtype=np.float64)
+            stats[name] = {
+                "mean": float(values.mean()),
+                "p95": float(np.percentile(values, 95)),
+                "max": float(values.max()),
+            }
+        return stats
+
+    def get_lines(self) -> list[str]:
+        """
+        :return: The stats written out as lines of text, times in milliseconds.
+        """
+        stats = self.get_stats()
+        if not stats:
+            return ["No frames profiled"]
+        stages, counts = self.get_names()
+
+        frame = stats["frame"]
+        lines = [
+            f"Frame: {frame['mean'] * 1000:.2f}ms mean, {frame['p95'] * 1000:.2f}ms p95, "
+            f"{frame['max'] * 1000:.2f}ms max, {1 / frame['mean']:.0f} fps"
+        ]
+        for name in stages:
+            lines.append(
+                f"  {name}: {stats[name]['mean'] * 1000:.2f}ms, {stats[name]['p95'] * 1000:.2f}ms, "
+                f"{stats[name]['max'] * 1000:.2f}ms"
+            )
+        for name in counts:
+            lines.append(f"  {name}: {stats[name]['mean']:.0f}, {stats[name]['p95']:.0f}, {stats[name]['max']:.0f}")
+        return lines
+
+    def draw(self,
+             surface: pygame.Surface,
+             font: pygame.font.Font,
+             position: Union[list[int, int], tuple[int, int]] = (0, 0),
+             colour: Union[list[int, int, int], tuple[int, int, int]] = (125, 125, 125)):
+        """
+Draws the stats onto a surface, one line under another.
+        :param position: Where the top left of the first line goes.
+        """
+        for i, line in enumerate(self.get_lines()):
+            surface.blit(font.render(line, False, colour), (position[0], position[1] + i * font.get_linesize()))
+
+    def save_csv(self, path: str):
+        """
+Saves the kept frames as a CSV file, a row for each frame with a column for each stage and count.
+Times are in seconds.
+        """
+        stages, counts = self.get_names()
+        with open(path, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(["frame_number", "frame"] + stages + counts)
+            for frame in self.frames:
+                writer.writerow(
+                    [frame["frame_number"], frame["frame"]]
+                    + [frame["timings"].get(name, 0.0) for name in stages]
+                    + [frame["counts"].get(name, 0) for name in counts]
+                )
+
+    def save_json(self, path: str):
+        """
+Saves the stats and the kept frames as a JSON file.
+Times are in seconds.
+        """
+        with open(path, "w") as file:
+            json.dump({"stats": self.get_stats(), "frames": list(self.frames)}, file, indent=2)
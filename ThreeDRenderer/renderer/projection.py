@@ -0,0 +1,244 @@
+from typing import Union
+
+import numpy as np
+
+from ThreeDRenderer.Camera import Camera
+from ThreeDRenderer.Cuboid import Cuboid
+from ThreeDRenderer.CuboidBatch import CuboidBatch
+from ThreeDRenderer.renderer.clipping import clip_edges_to_near_plane, clip_triangles_to_near_plane
+from ThreeDRenderer.Vector_Math import ParallelError
+
+
+def get_corners_array(cuboids_, mask: np.ndarray = None) -> np.ndarray:
+    """
+Packs the corners of every cuboid given into one contiguous (N * 8, 3) array.
+The corners of cuboid i are found in rows 8i to 8i + 7, in the same order as Cuboid.corners.
+    :param cuboids_: An iterable of cuboids, or a CuboidBatch.
+    :param mask: Optional boolean array, only the cuboids where it is True are included.
+    :return: The (N * 8, 3) array of corners.
+    """
+    if isinstance(cuboids_, CuboidBatch):
+        corners = cuboids_.corners if mask is None else cuboids_.corners[mask]
+        return corners.reshape(-1, 3)
+    if mask is not None:
+        cuboids_ = [cuboid_ for cuboid_, keep in zip(cuboids_, mask) if keep]
+    return np.array([cuboid_.corners for cuboid_ in cuboids_], dtype=np.float64).reshape(-1, 3)
+
+
+def get_bounding_spheres(cuboids_) -> tuple[np.ndarray, np.ndarray]:
+    """
+Gets the center and radius of every cuboid given, as used for frustum culling.
+    :param cuboids_: An iterable of cuboids, or a CuboidBatch.
+    :return: An (N, 3) array of centers and an (N,) array of radii.
+    """
+    if isinstance(cuboids_, CuboidBatch):
+        return cuboids_.center, cuboids_.radius
+    centers = np.array([cuboid_.center for cuboid_ in cuboids_], dtype=np.float64).reshape(-1, 3)
+    radii = np.array([cuboid_.radius for cuboid_ in cuboids_], dtype=np.float64)
+    return centers, radii
+
+
+def get_face_planes(cuboids_, mask: np.ndarray = None) -> np.ndarray:
+    """
+Packs the face planes of every cuboid given into one (N, 6, 4) array, the normal followed by the constant.
+    :param cuboids_: An iterable of cuboids, or a CuboidBatch.
+    :param mask: Optional boolean array, only the cuboids where it is True are included.
+    :return: The (N, 6, 4) array of planes, in the same order as Cuboid.faces.
+    """
+    if isinstance(cuboids_, CuboidBatch):
+        return cuboids_.faces if mask is None else cuboids_.faces[mask]
+    if mask is not None:
+        cuboids_ = [cuboid_ for cuboid_, keep in zip(cuboids_, mask) if keep]
+    return np.array(
+        [[[*face.normal.vector, face.constant] for face in cuboid_.faces] for cuboid_ in cuboids_], dtype=np.float64
+    ).reshape(-1, 6, 4)
+
+
+def get_face_planes_from_corners(corners: np.ndarray) -> np.ndarray:
+    """
+Finds the face planes of cuboids from their corners alone, so they can be rotated, scaled or mirrored.
+    :param corners: An (N, 8, 3) array of the corners of each cuboid, in the same order as Cuboid.corners.
+    :return: The (N, 6, 4) array of planes, in the same order as Cuboid.faces, with unit normals pointing outwards.
+    """
+    corners = np.asarray(corners, dtype=np.float64).reshape(-1, 8, 3)
+    faces = corners[:, Cuboid.surface_corners]  # (N, 6, 4, 3)
+    face_centers = faces.mean(axis=2)
+
+    # Two edges of each face give its normal, which is turned to point away from the center of the cuboid
+    normals = np.cross(faces[:, :, 1] - faces[:, :, 0], faces[:, :, 3] - faces[:, :, 0])
+    outwards = np.einsum("nfk,nfk->nf", normals, face_centers - corners.mean(axis=1)[:, None])
+    normals *= np.where(outwards < 0, -1, 1)[:, :, None] / np.linalg.norm(normals, axis=2, keepdims=True)
+
+    planes = np.empty(normals.shape[:2] + (4,), dtype=np.float64)
+    planes[:, :, :3] = normals
+    planes[:, :, 3] = -np.einsum("nfk,nfk->nf", normals, face_centers)
+    return planes
+
+
+def get_facing_faces(
+        planes: np.ndarray,
+        position: Union[list[float, float, float], tuple[float, float, float]]
+) -> np.ndarray:
+    """
+Finds which faces face towards a position, the rest are back faces that can't be seen from there.
+    :param planes: An (N, 6, 4) array of face planes, as made by get_face_planes.
+    :param position: Where the faces are being looked at from, usually the camera's position.
+    :return: An (N, 6) boolean array, True where the position is in front of the face.
+    """
+    return planes[:, :, :3] @ np.asarray(position, dtype=np.float64) + planes[:, :, 3] > 0
+
+
+# Which faces each corner connection is an edge of, (12, 6)
+_edge_faces: np.ndarray = np.array(
+    [[edge in face for face in Cuboid.surface_corner_connections] for edge in range(len(Cuboid.corner_connections))]
+)
+
+
+def get_cuboid_edges(count: int, facing: np.ndarray = None) -> np.ndarray:
+    """
+Gets the corner connections of a number of cuboids, as indexes into the array made by get_corners_array.
+    :param count: The number of cuboids.
+    :param facing: Optional (count, 6) boolean array of the faces to keep, as made by get_facing_faces.
+    Only the edges of those faces are included, using Cuboid.surface_corner_connections.
+    :return: An (count * 12, 2) array of indexes, or fewer if facing is given.
+    """
+    edges = (np.arange(count)[:, None, None] * 8 + np.array(Cuboid.corner_connections)).reshape(-1, 2)
+    if facing is None:
+        return edges
+    return edges[(facing @ _edge_faces.T).reshape(-1)]
+
+
+def get_cuboid_triangles(count: int) -> np.ndarray:
+    """
+Splits the faces of a number of cuboids into triangles, as indexes into the array made by get_corners_array.
+Each face in Cuboid.surface_corners becomes two triangles, so triangle i belongs to face (i // 2) % 6 of cuboid i // 12.
+    :param count: The number of cuboids.
+    :return: An (count * 12, 3) array of indexes.
+    """
+    # The corners of each face go around it in order, so each face is split along the diagonal from its first corner
+    faces = np.array(Cuboid.surface_corners)
+    triangles = np.stack((faces[:, [0, 1, 2]], faces[:, [0, 2, 3]]), axis=1).reshape(12, 3)
+    return (np.arange(count)[:, None, None] * 8 + triangles).reshape(-1, 3)
+
+
+def to_clip_space(camera: Camera, points: np.ndarray) -> np.ndarray:
+    """
+Transforms points in 3D space to clip space using the camera's view projection matrix, one matrix multiply.
+    :param camera: The camera used to view the points.
+    :param points: An (N, 3) array of points in 3D space.
+    :return: An (N, 4) array of points in clip space, w is the distance in front of the camera.
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    matrix = camera.view_projection_matrix
+    return points @ matrix[:, :3].T + matrix[:, 3]
+
+
+def clip_to_screen(clip_points: np.ndarray, window_size: Union[list[int, int], tuple[int, int]]) -> np.ndarray:
+    """
+Divides clip space points by w and scales them to the screen.
+    :param clip_points: An (N, 4) array of points in clip space, w must not be 0.
+    :param window_size: The size of the surface the points will be drawn to.
+    :return: An (N, 2) array of screen coordinates.
+    """
+    half_size = np.array(window_size, dtype=np.float64) / 2
+    return clip_points[:, :2] / clip_points[:, 3:] * half_size + half_size
+
+
+def get_screen_region_planes(
+        camera: Camera,
+        region: Union[list[float, float, float, float], tuple[float, float, float, float]],
+        window_size: Union[list[int, int], tuple[int, int]]
+) -> np.ndarray:
+    """
+Gets the planes of the part of the camera's frustum that is seen through a region of the screen.
+Taken straight from the view projection matrix, where each side is where a clip space coordinate equals w at the
+edge of the region.
+    :param camera: The camera looking through the screen.
+    :param region: The left, top, width and height of the region, in screen coordinates.
+    :param window_size: The size of the whole screen.
+    :return: A (6, 4) array of planes with unit normals pointing inwards, in the same order as Frustum.planes.
+    """
+    matrix = camera.view_projection_matrix
+    left, top, width, height = region
+    half_width, half_height = window_size[0] / 2, window_size[1] / 2
+
+    # The edges of the region from -1 to 1, the same as x and y in clip space after dividing by w
+    x_low, x_high = left / half_width - 1, (left + width) / half_width - 1
+    y_low, y_high = top / half_height - 1, (top + height) / half_height - 1
+
+    planes = np.array([
+        matrix[3] - [0, 0, 0, camera.near_distance],  # Near, w is the distance in front of the camera
+        matrix[3] - matrix[2],                         # Far, z is w at the far plane
+        x_high * matrix[3] - matrix[0],                # Right
+        matrix[0] - x_low * matrix[3],                 # Left
+        y_high * matrix[3] - matrix[1],                # Top, up is towards the bottom of the screen
+        matrix[1] - y_low * matrix[3],                 # Bottom
+    ])
+    return planes / np.linalg.norm(planes[:, :3], axis=1)[:, None]
+
+
+def project_points(
+        camera: Camera,
+        points: np.ndarray,
+        window_size: Union[list[int, int], tuple[int, int]]
+) -> np.ndarray:
+    """
+Projects points in 3D space to screen coordinates.
+Gives the same points as intersecting a ray from the camera to each point with the view plane,
+but using the camera's matrices for all the points at once.
+    :param camera: The camera used to view the points.
+    :param points: An (N, 3) array of points in 3D space.
+    :param window_size: The size of the surface the points will be drawn to.
+    :return: An (N, 2) array of screen coordinates.
+    """
+    clip_points = to_clip_space(camera, points)
+    if not clip_points[:, 3].all():
+        raise ParallelError(f"{camera.view_plane} is parallel to a ray from the camera")
+    return clip_to_screen(clip_points, window_size)
+
+
+def project_edges(
+        camera: Camera,
+        points: np.ndarray,
+        edges: np.ndarray,
+        window_size: Union[list[int, int], tuple[int, int]]
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+Projects edges between points to screen coordinates, clipping them against the camera's near plane first.
+Edges behind the camera are dropped and edges going behind it are cut short, so nothing is mirrored or divided by 0.
+    :param camera: The camera used to view the points.
+    :param points: An (N, 3) array of points in 3D space.
+    :param edges: An (E, 2) array of indexes into points, the start and end of each edge.
+    :param window_size: The size of the surface the edges will be drawn to.
+    :return: The (K, 2) screen coordinates of the start and end of each kept edge, and an (E,) boolean array of
+    which edges were kept.
+    """
+    clip_points = to_clip_space(camera, points)
+    edges = np.asarray(edges).reshape(-1, 2)
+    starts, ends, kept = clip_edges_to_near_plane(
+        clip_points[edges[:, 0]], clip_points[edges[:, 1]], camera.near_distance
+    )
+    return clip_to_screen(starts, window_size), clip_to_screen(ends, window_size), kept
+
+
+def project_triangles(
+        camera: Camera,
+        points: np.ndarray,
+        triangles: np.ndarray,
+        window_size: Union[list[int, int], tuple[int, int]]
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+Projects triangles between points to screen coordinates, clipping them against the camera's near plane first.
+    :param camera: The camera used to view the points.
+    :param points: An (N, 3) array of points in 3D space.
+    :param triangles: A (T, 3) array of indexes into points, the corners of each triangle.
+    :param window_size: The size of the surface the triangles will be drawn to.
+    :return: The (K, 3, 2) screen coordinates of the corners of each triangle, the (K, 3) depth of each corner,
+    from 0 at the near plane to 1 at the far plane, and a (K,) array of which triangle each came from.
+    """
+    clip_points = to_clip_space(camera, points)
+    corners, sources = clip_triangles_to_near_plane(
+        clip_points[np.asarray(triangles).reshape(-1, 3)], camera.near_distance
+    )
+    screen = clip_to_screen(corners.reshape(-1, 4), window_size).reshape(-1, 3, 2)
+    return screen, corners[:, :, 2] / corners[:, :, 3], sources
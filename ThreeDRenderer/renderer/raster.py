@@ -0,0 +1,229 @@
+from typing import Iterator, Union
+
+import numpy as np
+
+
+def _round_half_away(values: np.ndarray) -> np.ndarray:
+    """
+Rounds to the nearest integer, with halves going away from 0, the same as adding 0.5 and casting in C.
+    """
+    return np.trunc(values + np.copysign(0.5, values)).astype(np.int64)
+
+
+def clip_lines(
+        starts: np.ndarray,
+        ends: np.ndarray,
+        size: Union[list[int, int], tuple[int, int]]
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+Clips lines with integer end points to a rectangle from (0, 0) to size, the same way pygame.draw.line does.
+    :param starts: An (E, 2) integer array of the start of each line.
+    :param ends: An (E, 2) integer array of the end of each line.
+    :param size: The width and height of the rectangle.
+    :return: The clipped starts and ends of the lines that are kept, and an (E,) boolean array of which were kept.
+    """
+    width, height = size
+    x1, y1 = starts[:, 0], starts[:, 1]
+    p2 = ends[:, 0] - x1
+    p4 = ends[:, 1] - y1
+
+    # Liang-Barsky, done for all the lines at once
+    lower = np.zeros(len(starts))
+    upper = np.ones(len(starts))
+    kept = np.ones(len(starts), dtype=bool)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for p, q_low, q_high in ((p2, x1, width - x1), (p4, y1, height - y1)):
+            # A line parallel to an edge and outside of it can't be seen
+            kept &= ~((p == 0) & ((q_low < 0) | (q_high < 0)))
+            r_low = -q_low / p
+            r_high = q_high / p
+            moving = p != 0
+            lower = np.where(moving, np.maximum(lower, np.where(p > 0, r_low, r_high)), lower)
+            upper = np.where(moving, np.minimum(upper, np.where(p > 0, r_high, r_low)), upper)
+    kept &= lower <= upper
+
+    x1, y1, p2, p4 = x1[kept], y1[kept], p2[kept], p4[kept]
+    lower, upper = lower[kept], upper[kept]
+    clipped_starts = np.stack((x1 + _round_half_away(p2 * lower), y1 + _round_half_away(p4 * lower)), axis=1)
+    clipped_ends = np.stack((x1 + _round_half_away(p2 * upper), y1 + _round_half_away(p4 * upper)), axis=1)
+    return clipped_starts, clipped_ends, kept
+
+
+def rasterize_lines(
+        starts: np.ndarray,
+        ends: np.ndarray,
+        size: Union[list[int, int], tuple[int, int]]
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+Finds the pixels covered by 1 pixel wide lines, giving exactly the same pixels as pygame.draw.line.
+The end points are truncated to integers and clipped to the surface, then Bresenham's algorithm is used.
+Each step of Bresenham's algorithm has a closed form, so every pixel of every line is found at once.
+    :param starts: An (E, 2) array of the start of each line, in screen coordinates.
+    :param ends: An (E, 2) array of the end of each line, in screen coordinates.
+    :param size: The width and height of the surface.
+    :return: Arrays of the x and y of every pixel, and which line each pixel belongs to.
+    """
+    starts = np.asarray(starts, dtype=np.float64).reshape(-1, 2)
+    ends = np.asarray(ends, dtype=np.float64).reshape(-1, 2)
+
+    # pygame truncates to C ints, anything too big to fit would be far off the screen anyway
+    limit = 2 ** 30
+    starts = np.trunc(np.clip(starts, -limit, limit)).astype(np.int64)
+    ends = np.trunc(np.clip(ends, -limit, limit)).astype(np.int64)
+
+    starts, ends, kept = clip_lines(starts, ends, size)
+    lines = np.flatnonzero(kept)
+
+    # Everything per pixel is done with 32 bit integers, clipped lines are never longer than the surface
+    x1, y1 = starts[:, 0].astype(np.int32), starts[:, 1].astype(np.int32)
+    dx = np.abs(ends[:, 0] - x1).astype(np.int32)
+    dy = np.abs(ends[:, 1] - y1).astype(np.int32)
+    sx = np.where(x1 < ends[:, 0], 1, -1).astype(np.int32)
+    sy = np.where(y1 < ends[:, 1], 1, -1).astype(np.int32)
+
+    # Each step always moves along the major axis, and sometimes along the minor axis
+    x_major = dx > dy
+    major = np.where(x_major, dx, dy)
+    minor = np.where(x_major, dy, dx)
+    major_x, major_y = np.where(x_major, sx, 0), np.where(x_major, 0, sy)
+    minor_x, minor_y = np.where(x_major, 0, sx), np.where(x_major, sy, 0)
+    # Bresenham's starting error, negated so the number of minor steps is a rounded up division
+    error = -(major // 2)
+    major = np.maximum(major, 1)
+
+    # One pixel for each step along the major axis, including both ends
+    counts = np.maximum(dx, dy) + 1
+    pixel_lines = np.repeat(np.arange(len(x1), dtype=np.int32), counts)
+    k = np.arange(int(counts.sum()), dtype=np.int32) - np.repeat((np.cumsum(counts) - counts).astype(np.int32), counts)
+
+    # The number of steps taken along the minor axis after k steps along the major axis
+    minor_steps = -(-(k * minor[pixel_lines] + error[pixel_lines]) // major[pixel_lines])
+
+    xs = x1[pixel_lines] + major_x[pixel_lines] * k + minor_x[pixel_lines] * minor_steps
+    ys = y1[pixel_lines] + major_y[pixel_lines] * k + minor_y[pixel_lines] * minor_steps
+
+    # Clipping can leave the end one past the edge of the surface
+    width, height = size
+    on_surface = (xs >= 0) & (xs < width) & (ys >= 0) & (ys < height)
+    return xs[on_surface], ys[on_surface], lines[pixel_lines[on_surface]]
+
+
+def _edge_coefficients(a: np.ndarray, b: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+Gets the edge function from a to b as p_x * A + p_y * B + C, for (T, 2) arrays of points.
+The edge function is twice the signed area of the triangle made by a, b and p.
+    """
+    x_change, y_change = b[:, 0] - a[:, 0], b[:, 1] - a[:, 1]
+    return -y_change, x_change, y_change * a[:, 0] - x_change * a[:, 1]
+
+
+def rasterize_triangles(
+        points: np.ndarray,
+        depths: np.ndarray,
+        size: Union[list[int, int], tuple[int, int]],
+        region: Union[list[int, int, int, int], tuple[int, int, int, int]] = None,
+        chunk_size: int = 1 << 22
+) -> Iterator[tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]]:
+    """
+Finds the pixels covered by triangles, and the depth of the triangle at each of them.
+A pixel is covered when its center is inside the triangle or on its edge, corners can go around either way.
+Each row of each triangle only checks the pixels between where the row crosses the triangle's edges,
+all at once, a chunk at a time to keep the memory used down.
+    :param points: A (T, 3, 2) array of the corners of each triangle, in screen coordinates.
+    :param depths: A (T, 3) array of the depth at each corner, which is interpolated linearly across the screen.
+    :param size: The width and height of the surface.
+    :param region: Optional left, top, width and height of the only part of the surface to find pixels in.
+    :param chunk_size: Roughly how many pixels are checked in each chunk.
+    :return: Yields arrays of the x, y and depth of every covered pixel, and which triangle each pixel belongs to.
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 3, 2)
+    depths = np.asarray(depths, dtype=np.float64).reshape(-1, 3)
+    region_left, region_top, width, height = (0, 0, *size) if region is None else region
+
+    # The range of pixel centers each triangle could cover, which are at 0.5 past each integer
+    with np.errstate(invalid="ignore"):
+        left = np.maximum(np.ceil(points[:, :, 0].min(axis=1) - 0.5), region_left)
+        right = np.minimum(np.floor(points[:, :, 0].max(axis=1) - 0.5), region_left + width - 1)
+        top = np.maximum(np.ceil(points[:, :, 1].min(axis=1) - 0.5), region_top)
+        bottom = np.minimum(np.floor(points[:, :, 1].max(axis=1) - 0.5), region_top + height - 1)
+    a, b, c = points[:, 0], points[:, 1], points[:, 2]
+    area = (b[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1]) - (c[:, 0] - a[:, 0]) * (b[:, 1] - a[:, 1])
+
+    # Off screen and zero area triangles can't cover anything
+    kept = np.flatnonzero((left <= right) & (top <= bottom) & (area != 0))
+    if not len(kept):
+        return
+    left, top = left[kept].astype(np.int64), top[kept].astype(np.int64)
+    box_widths = right[kept].astype(np.int64) - left + 1
+    counts = box_widths * (bottom[kept].astype(np.int64) - top + 1)
+    a, b, c, area, depths = a[kept], b[kept], c[kept], area[kept], depths[kept]
+
+    # The barycentric coordinates and depth are linear across the screen, so each is x * A + y * B + C,
+    # measured from the first pixel center of the bounding box to keep the numbers small
+    origin_x, origin_y = left + 0.5, top + 0.5
+    weight_a = [value / area for value in _edge_coefficients(b, c)]
+    weight_b = [value / area for value in _edge_coefficients(c, a)]
+    depth_changes = depths[:, 0] - depths[:, 2], depths[:, 1] - depths[:, 2]
+    depth = [depth_changes[0] * wa + depth_changes[1] * wb for wa, wb in zip(weight_a, weight_b)]
+    depth[2] = depth[2] + depths[:, 2]
+    linear = [
+        (x_coefficient, y_coefficient, x_coefficient * origin_x + y_coefficient * origin_y + constant)
+        for x_coefficient, y_coefficient, constant in (weight_a, weight_b, depth)
+    ]
+
+    # Every row of every bounding box
+    heights = counts // box_widths
+    row_triangles = np.repeat(np.arange(len(kept)), heights)
+    row_ys = np.arange(len(row_triangles)) - np.repeat(np.cumsum(heights) - heights, heights)
+
+    # Along a row each weight is start + x * slope, the third weight being 1 minus the other two.
+    # Each weight is only big enough on one side of where it crosses the tolerance, which gives the span of the row,
+    # the tolerance is bigger than the one used below so the span is never narrower than the pixels kept
+    (slope_a, row_a, start_a), (slope_b, row_b, start_b) = [
+        (x_coefficient[row_triangles], y_coefficient[row_triangles], constant[row_triangles])
+        for x_coefficient, y_coefficient, constant in linear[:2]
+    ]
+    start_a += row_a * row_ys
+    start_b += row_b * row_ys
+    lows = np.zeros(len(row_triangles))
+    highs = (box_widths[row_triangles] - 1).astype(np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for row_start, slope in ((start_a, slope_a), (start_b, slope_b), (1 - start_a - start_b, -slope_a - slope_b)):
+            crossing = (-1e-6 - row_start) / slope
+            lows = np.where(slope > 0, np.maximum(lows, crossing), lows)
+            highs = np.where(slope < 0, np.minimum(highs, crossing), highs)
+            highs = np.where((slope == 0) & (row_start < -1e-6), -1, highs)
+    lows = np.maximum(np.ceil(lows), 0).astype(np.int64)
+    highs = np.minimum(np.floor(highs), box_widths[row_triangles] - 1).astype(np.int64)
+    row_counts = np.maximum(highs - lows + 1, 0)
+
+    # Split the rows into chunks with about chunk_size pixels each, a long row can be a chunk on its own
+    row_ends = np.cumsum(row_counts)
+    start = 0
+    while start < len(row_triangles):
+        limit = (row_ends[start - 1] if start else 0) + chunk_size
+        stop = max(int(np.searchsorted(row_ends, limit, side="right")), start + 1)
+        chunk_counts = row_counts[start:stop]
+
+        # Every pixel of every span in the chunk, counting along the whole chunk and stepping back to each span's start
+        rows = np.repeat(np.arange(start, stop), chunk_counts)
+        span_starts = np.cumsum(chunk_counts) - chunk_counts - lows[start:stop]
+        x_offsets = np.arange(int(chunk_counts.sum())) - np.repeat(span_starts, chunk_counts)
+
+        # Only the row's start and slope are looked up for each pixel, not everything about its triangle
+        weight_a = start_a[rows] + slope_a[rows] * x_offsets
+        weight_b = start_b[rows] + slope_b[rows] * x_offsets
+        # A tiny tolerance so pixels exactly on an edge shared by two triangles aren't missed by both
+        inside = (weight_a >= -1e-9) & (weight_b >= -1e-9) & (weight_a + weight_b <= 1 + 1e-9)
+
+        # The depth is only needed for the pixels that are covered
+        rows, x_offsets = rows[inside], x_offsets[inside]
+        triangles, y_offsets = row_triangles[rows], row_ys[rows]
+        x_coefficient, y_coefficient, constant = linear[2]
+        yield (
+            left[triangles] + x_offsets,
+            top[triangles] + y_offsets,
+            x_coefficient[triangles] * x_offsets + y_coefficient[triangles] * y_offsets + constant[triangles],
+            kept[triangles]
+        )
+        start = stop
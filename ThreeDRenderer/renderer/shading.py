@@ -0,0 +1,29 @@
+from typing import Union
+
+import numpy as np
+
+
+# The direction towards the light, up is -y on the screen, so this is above, to the left and in front
+default_light_direction: tuple[float, float, float] = (-0.3, -1, -0.5)
+
+
+def flat_shade(
+        normals: np.ndarray,
+        colours: Union[list[int, int, int], tuple[int, int, int], np.ndarray],
+        light_direction: Union[list[float, float, float], tuple[float, float, float]] = default_light_direction,
+        ambient: float = 0.25
+) -> np.ndarray:
+    """
+Shades faces by how much they face towards a light infinitely far away, each face is one colour.
+    :param normals: An (F, 3) array of the outwards facing unit normal of each face.
+    :param colours: The colour of every face, or an (F, 3) array of a colour for each face.
+    :param light_direction: The direction towards the light, doesn't need to be a unit vector.
+    :param ambient: How bright faces facing away from the light are, from 0 to 1.
+    :return: An (F, 3) uint8 array of the shaded colour of each face.
+    """
+    light_direction = np.asarray(light_direction, dtype=np.float64)
+    light_direction = light_direction / np.linalg.norm(light_direction)
+
+    brightness = ambient + (1 - ambient) * np.maximum(np.asarray(normals) @ light_direction, 0)
+    shaded = np.asarray(colours, dtype=np.float64) * brightness[:, None]
+    return np.clip(shaded, 0, 255).astype(np.uint8)
@@ -0,0 +1,65 @@
+class FrameStats:
+    """
+Counts what the renderer did during one frame, for showing on screen or checking how fast things are.
+    """
+
+    __slots__ = (
+        "draw_calls", "lines_submitted", "lines_off_screen", "lines_too_short", "lines_drawn", "points_drawn",
+        "draw_time", "cuboids_submitted", "cuboids_outside_frustum", "cuboids_occluded", "cuboids_simplified",
+        "cuboids_drawn", "faces_submitted", "faces_back_facing"
+    )
+
+    def __init__(self):
+        self.reset()
+
+    def __str__(self):
+        return (
+            f"Draw calls: {self.draw_calls}, "
+            f"Lines: {self.lines_drawn}/{self.lines_submitted} "
+            f"({self.lines_off_screen} off screen, {self.lines_too_short} too short), "
+            f"Points: {self.points_drawn}, "
+            f"Cuboids: {self.cuboids_drawn}/{self.cuboids_submitted} "
+            f"({self.cuboids_outside_frustum} outside the frustum, {self.cuboids_occluded} occluded, "
+            f"{self.cuboids_simplified} simplified), "
+            f"Faces: {self.faces_submitted - self.faces_back_facing}/{self.faces_submitted}, "
+            f"Draw time: {self.draw_time * 1000:.2f}ms"
+        )
+
+    def add(self, other: 'FrameStats'):
+        """
+Adds everything another FrameStats counted to this one.
+        """
+        for name in self.__slots__:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+
+    def reset(self):
+        """
+Sets everything back to 0, ready for the next frame.
+        """
+        # How many times something was drawn, each one being a call from Python into pygame or NumPy
+        self.draw_calls: int = 0
+
+        # How many lines were given to be drawn, how many of those were dropped and why, and how many were drawn
+        self.lines_submitted: int = 0
+        self.lines_off_screen: int = 0
+        self.lines_too_short: int = 0
+        self.lines_drawn: int = 0
+
+        # How many single pixels were drawn, for things too small to draw properly
+        self.points_drawn: int = 0
+
+        # Seconds spent culling and drawing lines
+        self.draw_time: float = 0.0
+
+        # How many cuboids were given to renderer.cuboids or renderer.scene, how many of those were culled and why,
+        # and how many were projected, counted when the FrameStats is given to them
+        self.cuboids_submitted: int = 0
+        self.cuboids_outside_frustum: int = 0
+        self.cuboids_occluded: int = 0
+        # Drawn as an outline or a point by a LevelOfDetail instead
+        self.cuboids_simplified: int = 0
+        self.cuboids_drawn: int = 0
+
+        # The faces of the projected cuboids, and how many of those were culled for facing away from the camera
+        self.faces_submitted: int = 0
+        self.faces_back_facing: int = 0
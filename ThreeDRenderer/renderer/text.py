@@ -0,0 +1,166 @@
+from collections import OrderedDict
+from typing import Optional, Union
+
+import pygame
+
+
+class TextCache:
+    """
+Renders text with a font once, then hands out the same surface every time that text is drawn again.
+Only the most recently used texts are kept, so text that changes every frame can't use up all the memory.
+    """
+
+    __slots__ = "font", "colour", "antialias", "max_size", "hits", "misses", "_surfaces"
+
+    def __init__(self,
+                 font: pygame.font.Font,
+                 colour: Union[list[int, int, int], tuple[int, int, int]] = (255, 255, 255),
+                 antialias: bool = False,
+                 max_size: int = 256):
+        """
+        :param font: The font to render with.
+        :param colour: The colour of the text.
+        :param antialias: Whether the edges of the text are smoothed.
+        :param max_size: The most texts kept at once, the least recently used are forgotten first.
+        """
+        self.font: pygame.font.Font = font
+        self.colour: tuple[int, int, int] = tuple(colour)
+        self.antialias: bool = antialias
+        self.max_size: int = max_size
+
+        # How many times a text was already rendered, and how many times it had to be rendered
+        self.hits: int = 0
+        self.misses: int = 0
+
+        self._surfaces: OrderedDict[str, pygame.Surface] = OrderedDict()
+
+    def __len__(self):
+        return len(self._surfaces)
+
+    def __str__(self):
+        return f"TextCache: {len(self._surfaces)}/{self.max_size} texts, {self.hits} hits, {self.misses} misses"
+
+    def render(self, text: str) -> pygame.Surface:
+        """
+        :return: The text rendered, don't draw onto it as it is shared.
+        """
+        surface = self._surfaces.get(text)
+        if surface is not None:
+            self.hits += 1
+            self._surfaces.move_to_end(text)
+            return surface
+
+        self.misses += 1
+        surface = self._surfaces[text] = self.font.render(text, self.antialias, self.colour)
+        if len(self._surfaces) > self.max_size:
+            self._surfaces.popitem(last=False)
+        return surface
+
+    def blit(self, surface: pygame.Surface, text: str, position: Union[list[int, int], tuple[int, int]]):
+        """
+Draws text onto a surface.
+        :param position: Where the top left of the text goes.
+        """
+        surface.blit(self.render(text), position)
+
+    def clear(self):
+        """
+Forgets every text.
+        """
+        self._surfaces.clear()
+
+
+class HUD:
+    """
+Lines of text drawn on top of the frame as one surface, which is only put back together when a line changes.
+Every frame each line is given with text, then draw is called.
+    """
+
+    __slots__ = "cache", "composites", "_lines", "_drawn", "_surface", "_position"
+
+    # Filled in around the text, then skipped when drawing, text can't be this colour unless it is antialiased
+    colour_key: tuple[int, int, int] = (255, 0, 255)
+
+    def __init__(self, cache: TextCache):
+        """
+        :param cache: Renders the text of each line.
+        """
+        self.cache: TextCache = cache
+
+        # How many times the lines have been put back together
+        self.composites: int = 0
+
+        # The text and position of each line given this frame, and of the lines on the surface
+        self._lines: list[tuple[str, tuple[int, int]]] = []
+        self._drawn: list[tuple[str, tuple[int, int]]] = []
+
+        self._surface: pygame.Surface = None
+        self._position: tuple[int, int] = (0, 0)
+
+    def text(self, text: str, position: Union[list[int, int], tuple[int, int]]):
+        """
+Adds a line to be drawn this frame.
+        :param position: Where the top left of the text goes.
+        """
+        self._lines.append((text, (position[0], position[1])))
+
+    @property
+    def changed(self) -> bool:
+        """
+True when the lines given this frame aren't the ones last drawn, so drawing them will change the screen.
+        """
+        return self._lines != self._drawn
+
+    def get_rect(self) -> Optional[pygame.Rect]:
+        """
+The rectangle of the screen covered by the lines last put together, None when there are none.
+        """
+        if self._surface is None:
+            return None
+        return self._surface.get_rect(topleft=self._position)
+
+    def draw(self, surface: pygame.Surface):
+        """
+Draws every line given since the last time it was drawn, then starts again with no lines.
+        """
+        if self._lines != self._drawn:
+            self._composite(self._lines)
+        self._drawn = self._lines
+        self._lines = []
+
+        if self._surface is not None:
+            surface.blit(self._surface, self._position)
+
+    def discard(self):
+        """
+Forgets the lines given since the last time it was drawn without drawing them, for when they are already on the screen.
+        """
+        self._lines = []
+
+    def _composite(self, lines: list[tuple[str, tuple[int, int]]]):
+        """
+Puts every line onto one surface, only as big as it needs to be to hold them.
+        """
+        self.composites += 1
+        if not lines:
+            self._surface = None
+            return
+
+        rendered = [(self.cache.render(text), position) for text, position in lines]
+        rects = [text.get_rect(topleft=position) for text, position in rendered]
+        bounds = rects[0].unionall(rects[1:])
+
+        if self.cache.antialias:
+            # Smoothed edges need to be blended with what is behind them
+            self._surface = pygame.Surface(bounds.size, pygame.SRCALPHA)
+        else:
+            self._surface = pygame.Surface(bounds.size)
+            self._surface.fill(self.colour_key)
+
+        for text, rect in zip(rendered, rects):
+            self._surface.blit(text[0], rect.move(-bounds.x, -bounds.y))
+        self._position = bounds.topleft
+
+        if not self.cache.antialias:
+            # Skipping runs of the colour key is much faster to draw than blending every pixel
+            self._surface.set_colorkey(self.colour_key, pygame.RLEACCEL)
@@ -0,0 +1,39 @@
+from typing import Union
+
+import numpy as np
+
+from ThreeDRenderer.Camera import Camera
+from ThreeDRenderer.VoxelWorld import VoxelWorld
+from ThreeDRenderer.renderer.framebuffer import Framebuffer
+from ThreeDRenderer.renderer.lines import LineBatch
+from ThreeDRenderer.renderer.mesh import meshes
+import pygame
+
+
+def voxels(
+        camera: Camera,
+        surface: Union[pygame.Surface, Framebuffer, LineBatch],
+        world: VoxelWorld,
+        filled: bool = False,
+        colour: Union[list[int, int, int], tuple[int, int, int]] = (255, 255, 255),
+        cull_back_faces: bool = True,
+        palette: np.ndarray = None
+):
+    """
+Renders a voxel world, meshing the chunks that changed since the last frame first.
+Chunks that can't be seen are skipped using the sphere around each chunk's mesh.
+    :param filled: If True the faces are drawn flat shaded and depth tested, otherwise the edges are drawn.
+    :param colour: The colour of the edges, or of the faces before they are shaded.
+    :param cull_back_faces: If True only the faces facing the camera, or their edges, are drawn.
+    :param palette: Optional (K, 3) array of the colour of each block value, used instead of colour for filled faces.
+    """
+    world.update()
+    meshes_ = world.meshes
+    if not meshes_:
+        return
+
+    triangle_colours = None
+    if filled and palette is not None:
+        palette = np.asarray(palette, dtype=np.uint8)
+        triangle_colours = [palette[values] for values in world.triangle_values]
+    meshes(camera, surface, meshes_, filled, colour, cull_back_faces, triangle_colours)
@@ -0,0 +1,267 @@
+import argparse
+import contextlib
+import itertools
+import json
+import math
+import os
+import platform
+import sys
+import time
+import timeit
+
+import numpy as np
+
+# pygame says hello on stdout when it is imported, which would end up in the results
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+import ThreeDRenderer
+from ThreeDRenderer.Vector_Math import Plane, Ray, Vector
+
+
+def summarise(times: list[float]) -> dict:
+    """
+Turns a list of times in seconds into the numbers saved in the results.
+    """
+    times = np.array(times, dtype=np.float64)
+    return {
+        "mean": float(times.mean()),
+        "median": float(np.median(times)),
+        "p95": float(np.percentile(times, 95)),
+        "min": float(times.min()),
+        "max": float(times.max()),
+    }
+
+
+def time_call(function, repeat: int) -> dict:
+    """
+Times a function that takes no arguments, running it enough times that each measurement takes at least 0.2 seconds.
+    :return: The summary of the time taken per call, in seconds.
+    """
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    results = summarise([total / number for total in timer.repeat(repeat=repeat, number=number)])
+    results["calls"] = number * repeat
+    return results
+
+
+# region - Micro benchmarks
+def micro_benchmarks(repeat: int) -> dict[str, dict]:
+    """
+Times the small things that everything else is built from.
+    """
+    vector1 = Vector(10, 5, 2)
+    vector2 = Vector(7, 6, 9)
+    plane = Plane(Vector(0, 0, 1), [0, 0, 10])
+    ray = Ray(Vector(0.1, 0.2, 1), [0, 0, 0])
+    # Changed in place by the benchmarks that don't make anything new
+    vector3 = Vector(1, 2, 3)
+    intersect = [0.0, 0.0, 0.0]
+    cuboid1 = ThreeDRenderer.Cuboid(0, 0, 0, 10, 10, 10)
+    cuboid2 = ThreeDRenderer.Cuboid(5, 5, 5, 10, 10, 10)
+
+    camera = ThreeDRenderer.Camera((640, 360))
+    framebuffer = ThreeDRenderer.renderer.Framebuffer((640, 360))
+    in_view = ThreeDRenderer.Cuboid(-5, -5, 15, 10, 10, 10)
+
+    # Moving to the same place doesn't do anything, so it goes back and forth
+    moving_camera = ThreeDRenderer.Camera((640, 360))
+    positions = itertools.cycle(([0, 0, 0], [0, 0, 1]))
+
+    return {
+        "Vector.dot": time_call(lambda: vector1.dot(vector2), repeat),
+        "Vector.cross": time_call(lambda: vector1.cross(vector2), repeat),
+        "Vector.__mul__": time_call(lambda: vector1 * 2, repeat),
+        "Vector.imul": time_call(lambda: vector3.imul(1.0), repeat),
+        "Vector.iadd": time_call(lambda: vector3.iadd(vector2), repeat),
+        "Vector.__eq__": time_call(lambda: vector1 == vector2, repeat),
+        "Plane.__init__": time_call(lambda: Plane(vector1, [1, 2, 3]), repeat),
+        "Plane.update_constant": time_call(plane.update_constant, repeat),
+        "Plane.get_intersect_with_ray": time_call(lambda: plane.get_intersect_with_ray(ray), repeat),
+        "Plane.intersect_into": time_call(lambda: plane.intersect_into(ray, intersect), repeat),
+        "Camera.move_to": time_call(lambda: moving_camera.move_to(next(positions)), repeat),
+        "Cuboid.__init__": time_call(lambda: ThreeDRenderer.Cuboid(0, 0, 0, 10, 10, 10), repeat),
+        "Cuboid.collides_with": time_call(lambda: cuboid1.collides_with(cuboid2), repeat),
+        "renderer.cuboid": time_call(lambda: ThreeDRenderer.renderer.cuboid(camera, framebuffer, in_view), repeat),
+        "renderer.cuboid filled": time_call(
+            lambda: ThreeDRenderer.renderer.cuboid(camera, framebuffer, in_view, filled=True), repeat
+        ),
+    }
+# endregion - Micro benchmarks
+
+
+# region - Frame benchmarks
+def make_scene(count: int, seed: int = 0) -> ThreeDRenderer.CuboidBatch:
+    """
+Scatters cuboids in front of the camera, the space grows with the count so they are always about as spread out.
+    """
+    random = np.random.default_rng(seed)
+    spread = 20 * count ** (1 / 3)
+    return ThreeDRenderer.CuboidBatch.from_arrays(
+        random.uniform(-spread, spread, count),
+        random.uniform(-spread / 4, spread / 4, count),
+        random.uniform(0, 2 * spread, count),
+        random.uniform(1, 10, count),
+        random.uniform(1, 10, count),
+        random.uniform(1, 10, count),
+    )
+
+
+def camera_path(frames: int) -> list[tuple[list[float], float, float, float]]:
+    """
+The same moves every run, so runs can be compared.
+    :return: The movement, rotation, pitch change and fov change of each frame.
+    """
+    steps = []
+    for frame in range(frames):
+        t = frame / max(frames - 1, 1)
+        steps.append((
+            [math.sin(t * math.tau) * 0.5, 0, 1.0],  # Forwards, weaving left and right
+            math.cos(t * math.tau) * math.pi / 100,  # Looking around
+            math.sin(t * 2 * math.tau) * math.pi / 400,  # Nodding
+            math.sin(t * 3 * math.tau) * math.pi / 200,  # Zooming in and out
+        ))
+    return steps
+
+
+def frame_benchmark(count: int, frames: int, size: tuple[int, int], filled: bool) -> dict:
+    """
+Renders a scene along the camera path, timing every frame.
+    """
+    my_cuboids = make_scene(count)
+    framebuffer = ThreeDRenderer.renderer.Framebuffer(size)
+    lines = ThreeDRenderer.renderer.LineBatch(framebuffer)
+    my_camera = ThreeDRenderer.Camera(size)
+
+    times = []
+    lines_drawn = []
+    for movement, rotation, pitch, fov_change in camera_path(frames):
+        start = time.perf_counter()
+
+        my_camera.move(movement)
+        my_camera.rotate(rotation, pitch)
+        my_camera.change_x_fov_by(fov_change)
+
+        framebuffer.clear((0, 0, 0))
+        ThreeDRenderer.renderer.cuboids(my_camera, lines, my_cuboids, filled=filled)
+        lines.submit()
+
+        times.append(time.perf_counter() - start)
+        lines_drawn.append(lines.stats.lines_drawn)
+
+    results = summarise(times)
+    results["fps"] = 1 / results["mean"]
+    results["frames"] = frames
+    results["mean_lines_drawn"] = float(np.mean(lines_drawn))
+    return results
+# endregion - Frame benchmarks
+
+
+# region - Raster benchmarks
+def make_triangles(count: int, reach: float, size: tuple[int, int], seed: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    """
+Scatters triangles over the screen, each corner up to reach pixels from the triangle's center.
+    :return: The (T, 3, 2) corners and (T, 3) depths of the triangles.
+    """
+    random = np.random.default_rng(seed)
+    centers = random.uniform((0, 0), size, (count, 1, 2))
+    return centers + random.uniform(-reach, reach, (count, 3, 2)), random.uniform(0, 1, (count, 3))
+
+
+def raster_benchmarks(size: tuple[int, int], repeat: int) -> dict[str, dict]:
+    """
+Times filling triangles into a framebuffer, from lots of tiny ones to a few that cover most of the screen.
+    """
+    framebuffer = ThreeDRenderer.renderer.Framebuffer(size)
+    results = {}
+    for count, reach in ((100000, 4), (10000, 20), (1000, 100), (10, max(size))):
+        points, depths = make_triangles(count, reach, size)
+        result = time_call(lambda: framebuffer.draw_triangles(points, depths), repeat)
+        result["triangles_per_second"] = count / result["median"]
+        results[f"{count} triangles {reach}px"] = result
+    return results
+# endregion - Raster benchmarks
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """
+Finds everything that got slower than the baseline by more than the threshold, using the median times.
+    :return: A line describing each regression.
+    """
+    regressions = []
+    for group in ("micro", "raster", "frames"):
+        for name, new in results.get(group, {}).items():
+            old = baseline.get(group, {}).get(name)
+            if old is None:
+                continue
+            change = new["median"] / old["median"] - 1
+            if change > threshold:
+                regressions.append(f"{group} {name}: {old['median']:.3g}s -> {new['median']:.3g}s (+{change:.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Runs the benchmarks without a window and saves the results as JSON.")
+    parser.add_argument("--output", default="benchmark.json", help="Where to save the results, - for stdout.")
+    parser.add_argument("--counts", type=int, nargs="+", default=(10, 1000, 10000, 100000),
+                        help="The number of cuboids in each frame benchmark.")
+    parser.add_argument("--frames", type=int, default=30, help="How many frames each frame benchmark renders.")
+    parser.add_argument("--size", type=int, nargs=2, default=(1280, 720), help="The width and height of each frame.")
+    parser.add_argument("--filled", action="store_true", help="Draw filled faces instead of wireframes.")
+    parser.add_argument("--repeat", type=int, default=5, help="How many times each micro benchmark is measured.")
+    parser.add_argument("--skip-micro", action="store_true", help="Don't run the micro benchmarks.")
+    parser.add_argument("--skip-raster", action="store_true", help="Don't run the triangle filling benchmarks.")
+    parser.add_argument("--compare", help="Results from an earlier run to check for regressions against.")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="How much slower something can get before it counts as a regression, 0.1 is 10%%.")
+    args = parser.parse_args()
+
+    results = {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+            "frames": args.frames,
+            "size": list(args.size),
+            "filled": args.filled,
+        },
+        "micro": {},
+        "raster": {},
+        "frames": {},
+    }
+
+    # Everything printed while running goes to stderr, so stdout only has the results when they are sent there
+    with contextlib.redirect_stdout(sys.stderr):
+        if not args.skip_micro:
+            results["micro"] = micro_benchmarks(args.repeat)
+            for name, result in results["micro"].items():
+                print(f"{name:<32} {result['median'] * 1e6:10.3f} us")
+
+        if not args.skip_raster:
+            results["raster"] = raster_benchmarks(tuple(args.size), args.repeat)
+            for name, result in results["raster"].items():
+                print(f"{name:<32} {result['median'] * 1000:10.2f} ms "
+                      f"{result['triangles_per_second']:14,.0f} triangles/s")
+
+        for count in args.counts:
+            result = frame_benchmark(count, args.frames, tuple(args.size), args.filled)
+            results["frames"][f"{count} cuboids"] = result
+            print(f"{count:>7} cuboids {result['median'] * 1000:10.2f} ms median {result['p95'] * 1000:10.2f} ms p95")
+
+    if args.output == "-":
+        json.dump(results, sys.stdout, indent=2)
+    else:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as file:
+            regressions = compare(results, json.load(file), args.threshold)
+        for regression in regressions:
+            print(f"Regression: {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import argparse
+import math
+import os
+import time
+
+import numpy as np
+
+import ThreeDRenderer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Renders frames without a window, and saves them to files.")
+    parser.add_argument("output", help="The folder to save the frames in.")
+    parser.add_argument("--frames", type=int, default=120, help="How many frames to render.")
+    parser.add_argument("--size", type=int, nargs=2, default=(1280, 720), help="The width and height of each frame.")
+    parser.add_argument("--format", choices=("png", "raw"), default="png", help="What to save each frame as.")
+    parser.add_argument("--filled", action="store_true", help="Draw filled faces instead of wireframes.")
+    parser.add_argument("--workers", type=int, default=0, help="Render tiles across this many processes, 0 for none.")
+    args = parser.parse_args()
+
+    os.makedirs(args.output, exist_ok=True)
+    window_size = tuple(args.size)
+    framebuffer = ThreeDRenderer.renderer.Framebuffer(window_size)
+
+    # A grid of cuboids to look at
+    grid = np.arange(-50, 50, 20, dtype=np.float64)
+    x, z = np.meshgrid(grid, grid + 100)
+    my_cuboids = ThreeDRenderer.CuboidBatch.from_arrays(x.ravel(), -5, z.ravel(), 10, 10, 10)
+
+    my_camera = ThreeDRenderer.Camera(
+        window_size
+    )
+
+    parallel_renderer = None
+    if args.workers:
+        parallel_renderer = ThreeDRenderer.renderer.ParallelRenderer(window_size, my_cuboids, workers=args.workers)
+
+    start = time.perf_counter()
+    for frame in range(args.frames):
+        # Slowly turn while moving forwards
+        my_camera.rotate_to(math.sin(frame / 30) / 2, -0.1)
+        my_camera.move_to((0, 5, frame / 2))
+
+        if parallel_renderer is None:
+            framebuffer.clear((0, 0, 0))
+            ThreeDRenderer.renderer.cuboids(my_camera, framebuffer, my_cuboids, filled=args.filled)
+        else:
+            framebuffer = parallel_renderer.render(my_camera, filled=args.filled)
+
+        path = os.path.join(args.output, f"frame_{frame:05}.{args.format}")
+        if args.format == "png":
+            framebuffer.save_png(path)
+        else:
+            framebuffer.save_raw(path)
+
+    taken = time.perf_counter() - start
+    if parallel_renderer is not None:
+        parallel_renderer.close()
+    print(f"Rendered {args.frames} frames in {taken:.2f}s, {args.frames / taken:.1f} frames per second")
+
+
+if __name__ == "__main__":
+    main()
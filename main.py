@@ -29,6 +29,9 @@ def main():
 
     font = pygame.font.Font(None, 32)
 
+    # Text is only rendered when it changes, and the HUD is put together as one surface
+    hud = ThreeDRenderer.renderer.HUD(ThreeDRenderer.renderer.TextCache(font, (125, 125, 125)))
+
     my_cuboids = [
         ThreeDRenderer.Cuboid(-5, -5, 15, 10, 10, 10),
         ThreeDRenderer.Cuboid(-5, -5, 50, 10, 10, 10),
@@ -37,16 +40,45 @@ def main():
         ThreeDRenderer.Cuboid(-5, -5, 250, 10, 10, 10),
     ]
 
+    # The root of the scene graph, nodes under it can be moved, rotated and scaled along with their cuboids
+    my_scene = ThreeDRenderer.SceneNode(my_cuboids, name="Scene")
+
     my_camera = ThreeDRenderer.Camera(
         window_size
     )
 
+    # Every line of a frame is collected, then drawn all at once
+    lines = ThreeDRenderer.renderer.LineBatch(screen)
+    filled = False
+
+    # Cuboids that only cover a few pixels are drawn as outlines or points
+    lod = ThreeDRenderer.renderer.LevelOfDetail()
+    # How many cuboids and faces were culled each frame, for the profiler
+    scene_stats = ThreeDRenderer.renderer.FrameStats()
+
+    # The scene is only projected again when the camera or the scene changes,
+    # and only the parts of the screen that changed are updated
+    projection_cache = ThreeDRenderer.renderer.ProjectionCache()
+    # Set when the whole window needs updating, like when it is first shown or uncovered
+    update_everything = True
+
+    # Times each stage of the frame, off until p is pressed
+    profiler = ThreeDRenderer.renderer.FrameProfiler(enabled=False)
+    profiler_lines = []
+    draw_time = 0
+    frame_number = 0
+
     # Main loop
     while True:
-        for event in pygame.event.get():
+        with profiler.scope("events"):
+            events = pygame.event.get()
+        for event in events:
             if event.type == QUIT:
                 upon_exit()
 
+            if event.type == VIDEOEXPOSE:
+                update_everything = True
+
             if event.type == KEYDOWN:
                 if event.key == K_ESCAPE:
                     upon_exit()
@@ -55,7 +87,18 @@ def main():
                     my_camera.move_to((0, 0, 0))
 
                 if event.key == K_RCTRL:  # Reset rotation
-                    my_camera.rotate_to(0)
+                    my_camera.rotate_to(0, 0)
+
+                if event.key == K_f:  # Switch between wireframes and filled faces
+                    filled = not filled
+
+                if event.key == K_p:  # Start or stop profiling, and show what it found
+                    profiler.enabled = not profiler.enabled
+                    profiler.clear()
+
+                if event.key == K_o:  # Save what the profiler found
+                    profiler.save_csv("profile.csv")
+                    profiler.save_json("profile.json")
 
             if event.type == MOUSEMOTION:
                 mouse_diff = (event.pos[0] - mouse_pos[0], event.pos[1] - mouse_pos[1])
@@ -70,62 +113,117 @@ def main():
                 if event.button == 2:
                     my_camera.change_x_fov_to((math.pi/3))
 
-        screen.fill((0, 0, 0))
-
         """BELOW"""
-        pressed = pygame.key.get_pressed()
-        # Movement along axis
-        movement = [0, 0, 0]
-        if pressed[K_d]:
-            movement[0] += 0.5
-        if pressed[K_a]:
-            movement[0] -= 0.5
-        if pressed[K_w]:
-            movement[2] += 0.5
-        if pressed[K_s]:
-            movement[2] -= 0.5
-        if pressed[K_q]:
-            movement[1] -= 0.5
-        if pressed[K_e]:
-            movement[1] += 0.5
-        my_camera.move(movement)
-        # Camera rotation
-        rotation = 0
-        if pressed[K_LEFT]:
-            rotation -= math.pi / 100
-        if pressed[K_RIGHT]:
-            rotation += math.pi / 100
-        my_camera.rotate(rotation)
-
-        # Rounding position to get rid of annoying floating point rounding errors
-        my_camera.position = [round(a, 2) for a in my_camera.position]
-
-        # Rendering the cuboids
-        for my_cuboid in my_cuboids:
-            ThreeDRenderer.renderer.cuboid(my_camera, screen, my_cuboid)
-
-        # Useful information
-        screen.blit(font.render(f"View from: {my_camera.position}", False, (125, 125, 125)), (0, 0))
-        screen.blit(font.render(f"View {my_camera.view_plane}", False, (125, 125, 125)), (0, 25))
-        screen.blit(font.render(f"Plane center {my_camera.view_plane.point}", False, (125, 125, 125)), (0, 50))
-        screen.blit(font.render(f"{my_cuboids[0].corners[0]}", False, (125, 125, 125)), (0, 75))
-
-        screen.blit(font.render(f"X FOV: {round(my_camera.x_fov, 5)}", False, (125, 125, 125)), (0, 125))
-        screen.blit(font.render(f"X limit: {round(my_camera.x_limit, 5)}", False, (125, 125, 125)), (0, 150))
-        screen.blit(font.render(f"Y limit: {round(my_camera.y_limit, 5)}", False, (125, 125, 125)), (0, 175))
-
-        # Current controls
-        screen.blit(font.render(f"Movement: w, a, s, d, e, q", False, (125, 125, 125)), (950, 0))
-        screen.blit(font.render(f"Reset position: space", False, (125, 125, 125)), (950, 25))
-        screen.blit(font.render(f"Fov change: scroll wheel", False, (125, 125, 125)), (950, 50))
-        screen.blit(font.render(f"Reset fov: middle mouse down", False, (125, 125, 125)), (950, 75))
-        screen.blit(font.render(f"Rotation: left, right arrows", False, (125, 125, 125)), (950, 100))
-        screen.blit(font.render(f"Reset rotation: right control", False, (125, 125, 125)), (950, 125))
+        with profiler.scope("camera"):
+            pressed = pygame.key.get_pressed()
+            # Movement along axis
+            movement = [0, 0, 0]
+            if pressed[K_d]:
+                movement[0] += 0.5
+            if pressed[K_a]:
+                movement[0] -= 0.5
+            if pressed[K_w]:
+                movement[2] += 0.5
+            if pressed[K_s]:
+                movement[2] -= 0.5
+            if pressed[K_q]:
+                movement[1] -= 0.5
+            if pressed[K_e]:
+                movement[1] += 0.5
+            my_camera.move(movement)
+            # Camera rotation
+            rotation = 0
+            if pressed[K_LEFT]:
+                rotation -= math.pi / 100
+            if pressed[K_RIGHT]:
+                rotation += math.pi / 100
+            pitch = 0
+            if pressed[K_UP]:
+                pitch += math.pi / 100
+            if pressed[K_DOWN]:
+                pitch -= math.pi / 100
+            my_camera.rotate(rotation, pitch)
+
+            # Rounding position to get rid of annoying floating point rounding errors
+            my_camera.move_to([round(a, 2) for a in my_camera.position])
+
+        # Rendering the cuboids, all at once, projecting everything then drawing every line,
+        # or drawing the same lines as last time when nothing has changed
+        with profiler.scope("projection"):
+            scene_stats.reset()
+            projection_cache.draw(
+                my_camera, lines, ThreeDRenderer.renderer.scene, my_scene, filled=filled, lod=lod, stats=scene_stats
+            )
+        profiler.add_stats(scene_stats)
+        dirty_rects = projection_cache.end_frame()
+
+        with profiler.scope("hud"):
+            # Times change every frame, so they are only updated twice a second, otherwise the HUD would be put back
+            # together and its text rendered again every frame
+            if frame_number % 30 == 0:
+                draw_time = round(lines.stats.draw_time * 1000, 2)
+                profiler_lines = profiler.get_lines() if profiler.enabled else []
+
+            # Useful information
+            hud.text(f"View from: {my_camera.position}", (0, 0))
+            hud.text(f"View {my_camera.view_plane}", (0, 25))
+            hud.text(f"Plane center {my_camera.view_plane.point}", (0, 50))
+            hud.text(f"{my_cuboids[0].corners[0]}", (0, 75))
+
+            hud.text(f"X FOV: {round(my_camera.x_fov, 5)}", (0, 125))
+            hud.text(f"X limit: {round(my_camera.x_limit, 5)}", (0, 150))
+            hud.text(f"Y limit: {round(my_camera.y_limit, 5)}", (0, 175))
+
+            hud.text(f"Draw calls: {lines.stats.draw_calls}", (0, 225))
+            hud.text(f"Lines: {lines.stats.lines_drawn}/{lines.stats.lines_submitted}", (0, 250))
+            hud.text(f"Draw time: {draw_time}ms", (0, 275))
+            hud.text(f"Detail: {lod.full} full, {lod.outlines} outlines, {lod.points} points", (0, 300))
+
+            # Current controls
+            hud.text(f"Movement: w, a, s, d, e, q", (950, 0))
+            hud.text(f"Reset position: space", (950, 25))
+            hud.text(f"Fov change: scroll wheel", (950, 50))
+            hud.text(f"Reset fov: middle mouse down", (950, 75))
+            hud.text(f"Rotation: arrow keys", (950, 100))
+            hud.text(f"Reset rotation: right control", (950, 125))
+            hud.text(f"Filled faces: f", (950, 150))
+            hud.text(f"Profiler: p, save: o", (950, 175))
+
+            for i, line in enumerate(profiler_lines):
+                hud.text(line, (0, 325 + i * 25))
+
+            # Where the old text was needs drawing over as well as where the new text is
+            hud_changed = hud.changed
+            if hud_changed:
+                dirty_rects.append(hud.get_rect())
 
         """ABOVE"""
 
-        pygame.display.flip()
-        clock.tick(60)
+        # Nothing on the screen has changed, so there is nothing to draw
+        if not (dirty_rects or update_everything):
+            lines.discard()
+            hud.discard()
+        else:
+            with profiler.scope("clear"):
+                screen.fill((0, 0, 0))
+            with profiler.scope("rasterization"):
+                lines.submit()
+            profiler.add_stats(lines.stats)
+            with profiler.scope("hud"):
+                hud.draw(screen)
+                if hud_changed:
+                    dirty_rects.append(hud.get_rect())
+
+            with profiler.scope("flip"):
+                if update_everything:
+                    pygame.display.flip()
+                else:
+                    pygame.display.update([rect for rect in dirty_rects if rect is not None])
+            update_everything = False
+        with profiler.scope("waiting"):
+            clock.tick(60)
+        profiler.end_frame()
+        frame_number += 1
 
 
 if __name__ == "__main__":